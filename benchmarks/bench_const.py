@@ -0,0 +1,42 @@
+"""
+Measure how const expression expansion scales with the number of `${...}` blocks.
+
+Usage: python -m benchmarks.bench_const [max blocks]
+"""
+
+import sys
+import time
+
+from mlogpp.lexer import Lexer
+from mlogpp.parser import Parser
+
+
+def generate(blocks: int) -> str:
+    code = ""
+    for i in range(blocks):
+        # every tenth block expands into another const expression
+        if i % 10 == 0:
+            code += f"num x{i} = ${{ \"${{ {i} * 2 }}\" }}\n"
+        else:
+            code += f"num x{i} = ${{ {i} + 1 }}\n"
+
+    return code
+
+
+def main():
+    max_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+
+    blocks = 500
+    while blocks <= max_blocks:
+        tokens = Lexer.create("").lex_table(generate(blocks), "bench.mpp")
+
+        start = time.perf_counter()
+        Parser().parse(tokens)
+        elapsed = time.perf_counter() - start
+
+        print(f"{blocks:>6} blocks: {elapsed * 1000:8.1f} ms, {elapsed / blocks * 1e6:6.1f} us per block")
+        blocks *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Measure the startup time of the compiler and the CLI, and the slowest imported modules.
+
+Usage: python -m benchmarks.bench_import [runs]
+"""
+
+import subprocess
+import sys
+
+
+MODULES = ["mlogpp.cli", "mlogpp.compile"]
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Import a module in a new interpreter with `-X importtime`.
+
+    Returns:
+        Module -> cumulative import time in microseconds.
+    """
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for module in MODULES:
+        # the fastest run has the least noise
+        best = min((import_times(module) for _ in range(runs)), key=lambda times: times[module])
+
+        print(f"{module}: {best[module] / 1000:.1f} ms")
+        for name, us in sorted(best.items(), key=lambda item: -item[1])[1:11]:
+            print(f"    {name:<40} {us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure code generation of a program calling small vector math functions many times,
+with and without reusing the generated function bodies.
+
+Usage: python -m benchmarks.bench_inline [calls]
+"""
+
+import sys
+import time
+
+from mlogpp.builtins import BUILTINS
+from mlogpp.compile import parse_code
+from mlogpp.context import CompilationContext
+from mlogpp.generator import Gen
+from mlogpp.scope import Scope
+from mlogpp.template import Template
+from mlogpp.value_types import Type
+
+
+def generate(calls: int) -> str:
+    code = "struct Vec {\n    num x, y\n}\n"
+    code += "function add(Vec a, Vec b) -> Vec { return Vec(a.x + b.x, a.y + b.y) }\n"
+    code += "function scale(Vec a, num k) -> Vec { return Vec(a.x * k, a.y * k) }\n"
+    code += "function dot(Vec a, Vec b) -> num { return a.x * b.x + a.y * b.y }\n"
+    code += "function lerp(Vec a, Vec b, num t) -> Vec { return add(scale(a, 1 - t), scale(b, t)) }\n"
+    code += "Vec v = Vec(0, 0)\nnum d = 0\n"
+
+    for i in range(calls // 6):
+        code += f"v = lerp(v, Vec({i}, {i + 1}), 0.5)\n"
+        code += f"d += dot(v, Vec({i}, 1))\n"
+
+    code += "print(d)\n"
+
+    return code
+
+
+def best_of(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def gen(tree) -> int:
+    with CompilationContext():
+        Gen.reset()
+        Scope.reset(BUILTINS.copy())
+        Type.reset()
+
+        tree.gen()
+        return len(Gen.get())
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+
+    tree = parse_code(generate(calls), "bench.mpp")
+
+    for enabled in (False, True):
+        Template.ENABLED = enabled
+        elapsed = best_of(lambda: gen(tree))
+        print(f"templates {'on ' if enabled else 'off'}: {gen(tree)} instructions, {elapsed * 1000:8.1f} ms, "
+              f"{elapsed / calls * 1e6:6.1f} us per call")
+
+
+if __name__ == "__main__":
+    main()
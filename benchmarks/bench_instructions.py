@@ -0,0 +1,57 @@
+"""
+Measure construction and comparison of instructions, as done by the optimizer.
+
+Usage: python -m benchmarks.bench_instructions [count]
+"""
+
+import sys
+import time
+
+import mlogpp.compile  # noqa: F401, registers the builtin instructions
+from mlogpp.instruction import InstructionSet, InstructionOp, InstructionControl, InstructionNoop, InstructionJump
+from mlogpp.optimizer import Optimizer
+from mlogpp.ir import Symbols, to_ir
+
+
+def best_of(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def construct(count: int) -> list:
+    code = []
+    for i in range(count // 5):
+        code += [
+            InstructionSet(f"a{i}", i),
+            InstructionOp("add", f"b{i}", f"a{i}", 1),
+            InstructionControl("enabled", "switch1", f"b{i}", 0, 0, 0),
+            InstructionJump(f"label{i}", "lessThan", f"b{i}", 10),
+            InstructionNoop()
+        ]
+
+    return code
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    elapsed = best_of(lambda: construct(count))
+    print(f"construct {count} instructions: {elapsed * 1000:8.1f} ms, {elapsed / count * 1e9:6.0f} ns per instruction")
+
+    code = construct(count)
+    other = construct(count)
+    elapsed = best_of(lambda: [a == b for a, b in zip(code, other)])
+    print(f"compare {count} instructions:   {elapsed * 1000:8.1f} ms, {elapsed / count * 1e9:6.0f} ns per instruction")
+
+    ir = to_ir(code, Symbols())
+    elapsed = best_of(lambda: Optimizer._remove_noops(list(ir)))
+    print(f"remove noops from {count}:     {elapsed * 1000:8.1f} ms, {elapsed / count * 1e9:6.0f} ns per instruction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure the optimizer on a program with many blocks, a long chain of constants and repeated subexpressions.
+
+Usage: python -m benchmarks.bench_optimizer [segments]
+"""
+
+import sys
+import time
+
+from mlogpp.builtins import BUILTINS
+from mlogpp.compile import parse_code
+from mlogpp.context import CompilationContext
+from mlogpp.generator import Gen
+from mlogpp.optimizer import Optimizer
+from mlogpp.scope import Scope
+from mlogpp.value_types import Type
+
+
+def generate(segments: int) -> str:
+    code = "Block cell = getlink(0)\nnum acc = 0\nnum a = 1\n"
+
+    for i in range(segments):
+        # constants depending on the previous segment take one pass each to be calculated
+        code += f"num a{i} = a + {i} * 2\na = a{i}\n"
+        code += f"num b{i} = a{i} * 3 - {i}\n"
+        code += f"num c{i} = cell.x + a{i}\n"
+        code += f"if (c{i} > b{i}) {{\n"
+        code += f"    acc += (c{i} + b{i}) * (c{i} + b{i})\n"
+        code += "} else {\n"
+        code += f"    acc -= c{i} * 0 + b{i}\n"
+        code += "}\n"
+        code += f'print("segment ")\nprint({i})\nprint(acc)\n'
+
+    return code
+
+
+def optimize(tree) -> float:
+    with CompilationContext():
+        Gen.reset()
+        Scope.reset(BUILTINS.copy())
+        Type.reset()
+
+        tree.gen()
+        code = Gen.get()
+
+        start = time.perf_counter()
+        Optimizer.optimize(code)
+        return time.perf_counter() - start
+
+
+def main():
+    max_segments = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+
+    segments = 50
+    while segments <= max_segments:
+        tree = parse_code(generate(segments), "bench.mpp")
+
+        elapsed = min(optimize(tree) for _ in range(3))
+        print(f"{segments:>5} segments: {elapsed * 1000:8.1f} ms, {elapsed / segments * 1e3:6.2f} ms per segment")
+        segments *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measure parse throughput on expression-dense code.
+
+Usage: python -m benchmarks.bench_parse [copies]
+"""
+
+import os
+import sys
+import time
+
+from mlogpp.lexer import Lexer
+from mlogpp.parser import Parser
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "gpu", "gpu.mpp")
+
+
+def best_of(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with open(EXAMPLE) as f:
+        code = f.read()
+
+    # expressions of every precedence level, mostly literals and variables
+    code += "".join(f"num e{i} = -a * (b + {i}) ** 2 // 3 % c << 1 | d & ~e ^ f\n"
+                    f"num t{i} = !(a < {i} && b >= c || d == e) && x != y\n" for i in range(100))
+    code *= copies
+
+    tokens = Lexer.create(os.path.dirname(EXAMPLE)).lex_table(code, EXAMPLE)
+    count = len(tokens.kinds)
+
+    elapsed = best_of(lambda: Parser().parse(tokens))
+    print(f"{count} tokens, {code.count(chr(10))} lines: {elapsed * 1000:.1f} ms, "
+          f"{count / elapsed / 1000:.0f}k tokens/s")
+
+
+if __name__ == "__main__":
+    main()
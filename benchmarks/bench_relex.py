@@ -0,0 +1,55 @@
+"""
+Compare re-lexing a large file after a one line edit with lexing it from scratch.
+
+Usage: python -m benchmarks.bench_relex [copies]
+"""
+
+import os
+import sys
+import time
+
+from mlogpp.lexer import RegexLexer, IncrementalLexer
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "gpu", "gpu.mpp")
+
+
+def best_of(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with open(EXAMPLE) as f:
+        code = f.read() * copies
+
+    directory = os.path.dirname(EXAMPLE)
+    lines = code.count("\n")
+
+    full = best_of(lambda: RegexLexer(directory).lex_table(code, EXAMPLE))
+    print(f"{lines} lines, full lex: {full * 1000:.1f} ms")
+
+    lexer = IncrementalLexer(directory)
+    lexer.lex_table(code, EXAMPLE)
+
+    for name, line in (("start", 1), ("middle", lines // 2), ("end", lines - 1)):
+        # alternate between two versions of the line, so that every edit changes the code
+        original = lexer.source.code.splitlines(keepends=True)[line]
+        edits = [f"num edited = {line}\n", original]
+
+        def relex():
+            lexer.relex(line, line + 1, edits[0])
+            edits.reverse()
+
+        elapsed = best_of(relex)
+        print(f"relex at {name:>6}: {elapsed * 1000:.1f} ms ({full / elapsed:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
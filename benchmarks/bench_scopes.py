@@ -0,0 +1,68 @@
+"""
+Measure code generation on a program with many globals, deep block nesting and many inlined calls,
+where most of the time is spent resolving names and checking types.
+
+Usage: python -m benchmarks.bench_scopes [globals] [depth]
+"""
+
+import sys
+import time
+
+from mlogpp.builtins import BUILTINS
+from mlogpp.compile import parse_code
+from mlogpp.context import CompilationContext
+from mlogpp.generator import Gen
+from mlogpp.scope import Scope
+from mlogpp.value_types import Type
+
+
+def generate(globals_: int, depth: int) -> str:
+    code = "".join(f"num g{i} = {i}\n" for i in range(globals_))
+    code += "struct Vec {\n    num x, y\n}\n"
+    code += "function add(Vec a, Vec b) -> Vec { return Vec(a.x + b.x, a.y + b.y) }\n"
+    code += "Vec v = Vec(0, 0)\n"
+
+    for i in range(depth):
+        code += f"if (g{i % globals_} < {i}) {{\n"
+        code += f"num l{i} = g{(i * 7) % globals_} + g{(i * 13) % globals_}\n"
+        code += f"v = add(v, Vec(l{i}, g{i % globals_}))\n"
+
+    code += "print(v.x)\n" + "}\n" * depth
+
+    return code
+
+
+def best_of(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def gen(tree):
+    with CompilationContext():
+        Gen.reset()
+        Scope.reset(BUILTINS.copy())
+        Type.reset()
+
+        tree.gen()
+
+
+def main():
+    globals_ = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    max_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    depth = 250
+    while depth <= max_depth:
+        tree = parse_code(generate(globals_, depth), "bench.mpp")
+
+        elapsed = best_of(lambda: gen(tree))
+        print(f"{globals_} globals, depth {depth:>5}: {elapsed * 1000:8.1f} ms, {elapsed / depth * 1e6:6.1f} us per level")
+        depth *= 2
+
+
+if __name__ == "__main__":
+    main()
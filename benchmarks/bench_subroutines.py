@@ -0,0 +1,89 @@
+"""
+Compare inlining every call with calling functions as subroutines to fit an instruction budget,
+by the size of the compiled examples and the size and number of executed instructions of a program calling
+a large function many times, run in the emulator.
+
+Usage: python -m benchmarks.bench_subroutines [calls] [budget]
+"""
+
+import glob
+import sys
+
+from mlog_emulator.parser_ import Parser as EmulatorParser
+from mlog_emulator.vm import VM
+from mlogpp.compile import compile_code
+from mlogpp.context import CompilationContext
+from mlogpp.error import Error
+
+
+def generate(calls: int) -> str:
+    code = "num scale = 3\n"
+    code += "function mix(num a, num b) -> num {\n"
+    code += "    num r = a * scale + b\n"
+    code += "    if (r > 10) {\n        r = r - 7\n    } else {\n        r = r * 2 + 1\n    }\n"
+    code += "    if (r > 100) {\n        return r / 2\n    }\n"
+    for i in range(6):
+        code += f"    r = r * {i + 2} + a * b - scale\n    r = r % 1000\n"
+    code += "    return r + 1\n}\n"
+    code += "num x = 1\n"
+
+    for i in range(calls):
+        code += f"x = mix(x % 50, {i})\nscale = x % 7\n"
+
+    code += "print(x)\n"
+
+    return code
+
+
+def run(code: str) -> tuple[int, str]:
+    """
+    Run one iteration of the code.
+
+    Returns:
+        Number of executed instructions and the printed text.
+    """
+
+    vm = VM(*EmulatorParser.parse(code))
+    executed = 1
+    while vm.step():
+        executed += 1
+
+    return executed, vm.env["print_buffer"]
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    inlined = subroutines = 0
+    for path in sorted(glob.glob("examples/**/*.mpp", recursive=True)):
+        with open(path) as f:
+            code = f.read()
+
+        try:
+            inlined += len(compile_code(code, path, CompilationContext(None)).splitlines())
+            subroutines += len(compile_code(code, path, CompilationContext(budget)).splitlines())
+        except Error:
+            pass
+
+    print(f"examples:    {inlined:5} instructions inlined, {subroutines:5} with a budget of {budget}")
+
+    results = []
+    for budget_ in (None, budget):
+        ctx = CompilationContext(budget_)
+        code = compile_code(generate(calls), "bench.mpp", ctx)
+        results.append(run(code) + (len(code.splitlines()),))
+
+    assert results[0][1] == results[1][1], "the output differs"
+
+    for budget_, (executed, _, size) in zip((None, budget), results):
+        print(f"{'budget ' if budget_ else 'inlined'}: {size:5} instructions, {executed:5} executed, "
+              f"{executed / calls:6.1f} executed per call")
+
+    # call sites of the compilation with the budget
+    called = sum(not site.inline for site in ctx.call_sites.values())
+    print(f"called:  {called:5} of {len(ctx.call_sites)} calls")
+
+
+if __name__ == "__main__":
+    main()
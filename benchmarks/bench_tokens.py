@@ -0,0 +1,53 @@
+"""
+Compare memory and allocations of token lists and token tables.
+
+Usage: python -m benchmarks.bench_tokens [copies]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+from mlogpp.lexer import RegexLexer
+from mlogpp.parser import Parser
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "gpu", "gpu.mpp")
+
+
+def measure(name: str, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = snapshot.statistics("filename")
+    size = sum(stat.size for stat in stats)
+    count = sum(stat.count for stat in stats)
+    print(f"{name:>8}: {len(result)} tokens, {size / 1024:.0f} KiB in {count} blocks, {elapsed * 1000:.1f} ms")
+
+    return result, size, count
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with open(EXAMPLE) as f:
+        code = f.read() * copies
+
+    directory = os.path.dirname(EXAMPLE)
+
+    _, list_size, list_count = measure("list", lambda: RegexLexer(directory).lex(code, EXAMPLE))
+    table, table_size, table_count = measure("table", lambda: RegexLexer(directory).lex_table(code, EXAMPLE))
+
+    print(f"memory: {list_size / table_size:.1f}x less, allocations: {list_count / table_count:.1f}x fewer")
+
+    start = time.perf_counter()
+    Parser().parse(table)
+    print(f"parse from table: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,10 @@ class ABI:
     def function_return_pos(name: str) -> str:
         return f"__ret_pos@{name}"
 
+    @staticmethod
+    def function_entry(name: str, index: int) -> str:
+        return f"__entry{index}@{name}"
+
     @staticmethod
     def is_function(name: str) -> bool:
         return "()" in name
@@ -1,4 +1,4 @@
-from ..util import Position
+from ..util import Position, Source
 from ..values import *
 from ..generator import Gen
 from ..instruction import *
@@ -55,7 +55,7 @@ class CodeBlockNode(Node):
     code: list[Node]
 
     def __init__(self, code: list[Node]):
-        super().__init__(Position(0, 0, 0, "", ""))
+        super().__init__(Position(0, 0, 0, Source.intern("", "")))
 
         self.code = code
 
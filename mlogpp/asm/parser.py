@@ -10,12 +10,7 @@ class AsmParser(GenericParser):
 
     def _init(self):
         # convert keyword and builtin tokens into id tokens
-        for tok in self.tokens:
-            if tok.type == TokenType.KEYWORD:
-                tok.type = TokenType.ID
-
-            # if tok.value.endswith("="):
-            #     tok.type = TokenType.SET
+        self.tokens.retype(TokenType.KEYWORD, TokenType.ID)
 
         self.const_expressions = True
 
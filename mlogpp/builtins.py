@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import enum
-from typing import Callable, TypeVar
+from typing import Callable, TypeVar, TYPE_CHECKING
 
 from .instruction import *
 from .generator import Gen
 from .error import Error
-from .enums import ENUMS, SENSABLE, RULES, SETPROP, EnumRadarFilter, EnumLocateType, EnumRadarSort, EnumEffect, EnumTypeImpl
+from .enums import ENUMS, EnumRadarFilter, EnumLocateType, EnumRadarSort, EnumEffect, EnumTypeImpl
 from .node import Node
 from .values import TypeImpl, Type, Value
 
+if TYPE_CHECKING:
+    from .content import ContentDatabase
+
 
 class Param(enum.Enum):
     INPUT: Param = enum.auto()
@@ -106,6 +109,34 @@ class NativeMultiInsTypeImpl(TypeImpl):
         return self.instructions.get(name)
 
 
+class ContentMultiInsTypeImpl(NativeMultiInsTypeImpl):
+    """
+    Instruction with subcommands depending on the content of the targeted game version,
+    created for every version when it is first used.
+    """
+
+    functions: Callable[[ContentDatabase], dict[str, Value]]
+    # content -> subcommands
+    _instructions: dict[ContentDatabase, dict[str, Value]]
+
+    def __init__(self, functions: Callable[[ContentDatabase], dict[str, Value]],
+                 subname_function: Callable[[list[T]], T]):
+        self.functions = functions
+        self.subname_function = subname_function
+        self._instructions = {}
+
+    @property
+    def instructions(self) -> dict[str, Value]:
+        from .content import Content
+
+        content = Content.get()
+        if (instructions := self._instructions.get(content)) is None:
+            # subcommands created by another thread at the same time are equal
+            instructions = self._instructions.setdefault(content, self.functions(content))
+
+        return instructions
+
+
 def native_function_value(ins: type[Instruction], params: list[Type], ret: int = -1, outputs: list[int] = None, *,
                           constants: dict[int, str] = None) -> Value:
     if constants is None:
@@ -138,6 +169,32 @@ def native_multi_function_value(ins: type[Instruction], functions: dict[str, lis
                                                                              Value],
                                 subname_index: int = 0, subname_function: Callable[[list[T]], T]=None) -> Value:
 
+    return Value(Type.OBJECT, "null", type_impl=NativeMultiInsTypeImpl(
+        _native_functions(ins, functions, subname_index),
+        (lambda params: params[subname_index]) if subname_function is None else subname_function))
+
+
+def content_multi_function_value(ins: type[Instruction], functions: Callable[[ContentDatabase], dict],
+                                 subname_index: int = 0, subname_function: Callable[[list[T]], T] = None) -> Value:
+    """
+    Create an instruction with subcommands depending on the content of the targeted game version.
+
+    Args:
+        ins: The instruction.
+        functions: Creates the subcommands of a version, as in `native_multi_function_value`.
+        subname_index: Index of the subcommand in the parameters, -1 to append it.
+        subname_function: Gets the subcommand from the parameters of a generated instruction.
+
+    Returns:
+        The instruction.
+    """
+
+    return Value(Type.OBJECT, "null", type_impl=ContentMultiInsTypeImpl(
+        lambda content: _native_functions(ins, functions(content), subname_index),
+        (lambda params: params[subname_index]) if subname_function is None else subname_function))
+
+
+def _native_functions(ins: type[Instruction], functions: dict, subname_index: int) -> dict[str, Value]:
     func: dict[str, Value] = {}
     for n, f in functions.items():
         if isinstance(f, list):
@@ -176,8 +233,7 @@ def native_multi_function_value(ins: type[Instruction], functions: dict[str, lis
             else:
                 raise TypeError
 
-    return Value(Type.OBJECT, "null", type_impl=NativeMultiInsTypeImpl(
-        func, (lambda params: params[subname_index]) if subname_function is None else subname_function))
+    return func
 
 
 class BuiltinOperationTypeImpl(TypeImpl):
@@ -212,6 +268,14 @@ class BuiltinOperationTypeImpl(TypeImpl):
         return [Type.NUM] * self.params
 
 
+def _amounts(content: ContentDatabase) -> dict[str, Type]:
+    """
+    Get the properties of the items and liquids of a game version, which are sensed and set as their amount.
+    """
+
+    return {name: Type.NUM for name in content.category("items") + content.category("liquids")}
+
+
 BUILTIN_VARIABLES = {
     "@this": Value.variable("@this", Type.BLOCK, True),
     "@thisx": Value.variable("@thisx", Type.NUM, True),
@@ -281,9 +345,10 @@ BUILTIN_FUNCTIONS = {
     ),
     "radar": native_function_value(InstructionRadar, [EnumRadarFilter.type()] * 3 + [EnumRadarSort.type(), Type.BLOCK,
                                                                                    Type.NUM, Type.UNIT], 6),
-    "sensor": native_multi_function_value(
+    "sensor": content_multi_function_value(
         InstructionSensor,
-        {name: ([type_, Type.BLOCK | Type.UNIT], 0) for name, type_ in SENSABLE.items()},
+        lambda content: {name: ([type_, Type.BLOCK | Type.UNIT], 0)
+                         for name, type_ in (content.sensable | _amounts(content)).items()},
         -1, lambda params: params[-1][1:]
     ),
 
@@ -377,9 +442,9 @@ BUILTIN_FUNCTIONS = {
         }
     ),
     "spawnwave": native_function_value(InstructionSpawnWave, [Type.NUM, Type.NUM, Type.NUM]),
-    "setrule": native_multi_function_value(
+    "setrule": content_multi_function_value(
         InstructionSetRule,
-        {rule: [[Type.NUM, Type.TEAM] if param else [Type.NUM]] for rule, param in RULES.items()} |
+        lambda content: {rule: [[Type.NUM, Type.TEAM] if param else [Type.NUM]] for rule, param in content.rules.items()} |
         {
             "mapArea": ([Type.ANY] + [Type.NUM] * 4, 0, [], [0])
         }
@@ -457,9 +522,10 @@ BUILTIN_FUNCTIONS = {
     "sync": native_function_value(InstructionSync, [Type.ANY]),
     "getflag": native_function_value(InstructionGetFlag, [Type.NUM, Type.STR], 0),
     "setflag": native_function_value(InstructionSetFlag, [Type.STR, Type.NUM]),
-    "setprop": native_multi_function_value(
+    "setprop": content_multi_function_value(
         InstructionSetProp,
-        {prop: [type_, Type.BLOCK | Type.UNIT] for prop, type_ in SETPROP.items()}
+        lambda content: {prop: [type_, Type.BLOCK | Type.UNIT]
+                         for prop, type_ in (content.setprop | _amounts(content)).items()}
     )
 }
 PRIVATE_BUILTIN_FUNCTIONS = {
@@ -473,6 +539,8 @@ BaseInstruction.Param = Param
 BaseInstruction.NativeInsTypeImpl = NativeInsTypeImpl
 BaseInstruction.NativeMultiInsTypeImpl = NativeMultiInsTypeImpl
 BaseInstruction.Builtins = BUILTIN_FUNCTIONS | PRIVATE_BUILTIN_FUNCTIONS
+BaseInstruction.ContentDependent = frozenset(name for name, value in BaseInstruction.Builtins.items()
+                                             if isinstance(value.impl(), ContentMultiInsTypeImpl))
 BaseInstruction.Value = Value
 
 _OPERATIONS = {
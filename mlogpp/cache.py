@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from .tokens import TokenTable
+from . import __version__
+
+
+class ImportCache:
+    """
+    Keeps lexed imported files in memory, shared by all compilations in the process.
+    """
+
+    ENABLED: bool = True
+    # maximum number of cached files
+    MAX_SIZE: int = 128
+
+    # (lexer class, include search directory, absolute path) -> (tokens, dependencies)
+    _entries: OrderedDict[tuple, tuple[TokenTable, dict[str, tuple[int, str]]]] = OrderedDict()
+    # guards the entries and counters, compilations can run in multiple threads
+    _lock: threading.Lock = threading.Lock()
+
+    hits: int = 0
+    misses: int = 0
+
+    @staticmethod
+    def digest(code: str) -> str:
+        """
+        Hash the contents of a file.
+
+        Args:
+            code: The contents of the file.
+
+        Returns:
+            Hex digest of the contents.
+        """
+
+        # hashlib, pickle and tempfile are imported when used, they are slow to import
+        import hashlib
+
+        return hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+
+    @classmethod
+    def is_fresh(cls, path: str, mtime: int, digest: str) -> bool:
+        """
+        Check if a file is unchanged.
+
+        Args:
+            path: Path of the file.
+            mtime: Modification time of the file when it was cached, in nanoseconds.
+            digest: Digest of the file when it was cached.
+
+        Returns:
+            True if the file is unchanged, False otherwise.
+        """
+
+        try:
+            if os.stat(path).st_mtime_ns == mtime:
+                return True
+
+            # the file was touched, compare the contents
+            with open(path, "r") as f:
+                return cls.digest(f.read()) == digest
+
+        except OSError:
+            return False
+
+    @classmethod
+    def lex(cls, lexer, path: str, code: str) -> TokenTable:
+        """
+        Lex an imported file, reusing the cached tokens if the file and its imports are unchanged.
+
+        Args:
+            lexer: The lexer importing the file. `lexer.dependencies` must already contain `path`.
+            path: Path of the imported file.
+            code: Contents of the imported file.
+
+        Returns:
+            Tokens of the imported file.
+        """
+
+        mtime, digest = lexer.dependencies[path]
+
+        if not cls.ENABLED:
+            tokens, dependencies = cls._lex(lexer, path, code)
+            lexer.dependencies.update(dependencies)
+            return tokens
+
+        key = (type(lexer), lexer.include_search_dir, os.path.abspath(path))
+
+        if (entry := cls._entries.get(key)) is not None:
+            tokens, dependencies = entry
+
+            if dependencies[path][1] == digest and \
+                    all(cls.is_fresh(p, *d) for p, d in dependencies.items() if p != path):
+
+                with cls._lock:
+                    if key in cls._entries:
+                        cls._entries.move_to_end(key)
+                    cls.hits += 1
+
+                for p, d in dependencies.items():
+                    lexer.dependencies.setdefault(p, d)
+
+                return tokens
+
+            with cls._lock:
+                cls._entries.pop(key, None)
+
+        tokens, dependencies = cls._lex(lexer, path, code)
+        lexer.dependencies.update(dependencies)
+
+        with cls._lock:
+            cls.misses += 1
+            cls._entries[key] = (tokens, {path: (mtime, digest)} | dependencies)
+            while len(cls._entries) > cls.MAX_SIZE:
+                cls._entries.popitem(last=False)
+
+        return tokens
+
+    @staticmethod
+    def _lex(lexer, path: str, code: str) -> tuple[TokenTable, dict[str, tuple[int, str]]]:
+        """
+        Lex an imported file, reusing the tokens from the disk cache if possible.
+
+        Args:
+            lexer: The lexer importing the file.
+            path: Path of the imported file.
+            code: Contents of the imported file.
+
+        Returns:
+            Tokens of the imported file and the files it imports.
+        """
+
+        key = DiskCache.key("tokens", type(lexer).__name__, lexer.include_search_dir,
+                            os.path.abspath(path), lexer.dependencies[path][1])
+
+        if (cached := DiskCache.load(key)) is not None:
+            return cached
+
+        child = type(lexer)(lexer.include_search_dir)
+        tokens = child.lex_table(code, path)
+
+        DiskCache.store(key, tokens, child.dependencies)
+
+        return tokens, child.dependencies
+
+    @classmethod
+    def clear(cls):
+        """
+        Remove all cached files and reset the counters.
+        """
+
+        with cls._lock:
+            cls._entries.clear()
+            cls.hits = 0
+            cls.misses = 0
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Number of hits, misses and cached files.
+        """
+
+        return {"hits": cls.hits, "misses": cls.misses, "size": len(cls._entries)}
+
+
+class DiskCache:
+    """
+    Persistent cache of lexed imports, parsed files and compiled outputs, shared by all runs of the compiler.
+    """
+
+    # bump when the format of cached objects changes
+    FORMAT_VERSION: int = 1
+
+    # cache directory, None to disable the cache
+    DIRECTORY: str | None = None
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+
+    @classmethod
+    def key(cls, kind: str, *parts: str) -> str:
+        """
+        Create a cache key.
+
+        Args:
+            kind: Kind of the cached object.
+            parts: Everything the cached object depends on, apart from imported files.
+
+        Returns:
+            The cache key.
+        """
+
+        import hashlib
+
+        data = "\0".join((str(cls.FORMAT_VERSION), __version__, *parts))
+        return f"{kind}-{hashlib.blake2b(data.encode('utf-8'), digest_size=20).hexdigest()}"
+
+    @classmethod
+    def _path(cls, key: str) -> str:
+        return os.path.join(cls.DIRECTORY, key + ".pickle")
+
+    @classmethod
+    def load(cls, key: str) -> tuple[Any, dict[str, tuple[int, str]]] | None:
+        """
+        Load a cached object.
+
+        Args:
+            key: Key of the object.
+
+        Returns:
+            The object and the files it depends on, None if it is not cached or a dependency changed.
+        """
+
+        if cls.DIRECTORY is None:
+            return None
+
+        import pickle
+
+        try:
+            with open(cls._path(key), "rb") as f:
+                version, value, dependencies = pickle.load(f)
+
+        # a missing, corrupted or incompatible entry
+        except Exception:
+            cls.misses += 1
+            return None
+
+        if version != cls.FORMAT_VERSION or \
+                not all(ImportCache.is_fresh(path, *dependency) for path, dependency in dependencies.items()):
+
+            cls.misses += 1
+            return None
+
+        cls.hits += 1
+        return value, dependencies
+
+    @classmethod
+    def store(cls, key: str, value: Any, dependencies: dict[str, tuple[int, str]]):
+        """
+        Store an object.
+
+        Args:
+            key: Key of the object.
+            value: The object.
+            dependencies: Files the object depends on, invalidating it when changed.
+        """
+
+        if cls.DIRECTORY is None:
+            return
+
+        import pickle
+        import tempfile
+
+        try:
+            data = pickle.dumps((cls.FORMAT_VERSION, value, dependencies), pickle.HIGHEST_PROTOCOL)
+
+        # very deeply nested trees are not cached
+        except RecursionError:
+            return
+
+        # write atomically, so that concurrent compilers never read a partial entry
+        tmp = None
+        try:
+            os.makedirs(cls.DIRECTORY, exist_ok=True)
+
+            fd, tmp = tempfile.mkstemp(dir=cls.DIRECTORY, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+
+            os.replace(tmp, cls._path(key))
+
+        # the cache is best effort
+        except OSError:
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+
+            return
+
+        cls.writes += 1
+
+    @classmethod
+    def reset_stats(cls):
+        """
+        Reset the counters.
+        """
+
+        cls.hits = 0
+        cls.misses = 0
+        cls.writes = 0
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Number of hits, misses and written entries.
+        """
+
+        return {"hits": cls.hits, "misses": cls.misses, "writes": cls.writes}
@@ -1,14 +1,17 @@
 import argparse
+import glob
 import os
+import signal
 import sys
 import enum
-
-import pyperclip
+import time
 
 from .error import Error
-from .compile import compile_code, compile_asm
+from .client import compile_remote
 from . import __version__
 
+# the compiler is imported by the functions using it, so that it isn't loaded when a daemon compiles the code
+
 
 class IOMethod(enum.Enum):
     """
@@ -20,18 +23,196 @@ class IOMethod(enum.Enum):
     CLIP = enum.auto()
 
 
+def compile_batch(files: list[str], output_dir: str, jobs: int | None, assembly: bool, verbose: bool,
+                  inline_budget: int | None) -> bool:
+    """
+    Compile multiple files in parallel into an output directory.
+
+    Args:
+        files: Paths to the files.
+        output_dir: Directory for the outputs, which keep the directory structure of the inputs.
+        jobs: Number of worker processes.
+        assembly: Compile the files as mlog++ assembly.
+        verbose: Print the slowest files.
+        inline_budget: Maximum number of instructions before calls are made to subroutines, None to always inline.
+
+    Returns:
+        True if all files compiled successfully.
+    """
+
+    from .compile import compile_many
+
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(file)) for file in files])
+
+    start = time.perf_counter()
+    results = []
+    for result in compile_many(files, jobs, assembly, inline_budget):
+        results.append(result)
+
+        if result.error is not None:
+            if result.error.pos is None:
+                print(f"{result.path}:")
+            result.error.print()
+            continue
+
+        output_file = os.path.join(output_dir, os.path.splitext(os.path.relpath(os.path.abspath(result.path), base))[0] + ".mlog")
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        with open(output_file, "w+") as f:
+            f.write(result.output)
+
+    failed = sum(result.error is not None for result in results)
+    print(f"Compiled {len(results) - failed}/{len(results)} files in {time.perf_counter() - start:.2f} s" +
+          (f", {failed} failed" if failed else ""))
+
+    if verbose:
+        # the slowest files
+        for result in sorted(results, key=lambda r: r.elapsed, reverse=True)[:5]:
+            print(f"  {result.elapsed * 1000:8.2f} ms  {result.path}")
+
+    return failed == 0
+
+
+def watch(directory: str, output_dir: str | None, assembly: bool, inline_budget: int | None):
+    """
+    Recompile the entry points of a directory when they change, until interrupted.
+
+    Args:
+        directory: The watched directory.
+        output_dir: Directory for the outputs, the outputs are written next to the inputs if None.
+        assembly: Compile mlog++ assembly files.
+        inline_budget: Maximum number of instructions before calls are made to subroutines, None to always inline.
+    """
+
+    from .compile import CompileResult
+    from .watch import Watcher
+
+    if not os.path.isdir(directory):
+        print(f"Error: directory \"{directory}\" does not exist")
+        sys.exit(1)
+
+    def report(result: CompileResult, output_file: str | None):
+        if result.error is not None:
+            if result.error.pos is None:
+                print(f"{result.path}:")
+            result.error.print()
+
+        else:
+            print(f"Compiled {os.path.relpath(result.path, directory)} -> {output_file} in {result.elapsed * 1000:.1f} ms")
+
+    print(f"Watching {directory}, press Ctrl+C to stop")
+
+    try:
+        Watcher(directory, output_dir, assembly, report, inline_budget).run()
+
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(argv: list[str]):
+    """
+    Parse command line arguments of `mlogpp serve` and run the compile daemon until interrupted.
+
+    Args:
+        argv: The arguments after `serve`.
+    """
+
+    parser = argparse.ArgumentParser(description="Mindustry logic compile daemon", prog="mlog++ serve")
+
+    parser.add_argument("--socket", help="path of the socket [default: $MLOGPP_SOCKET or a per-user temporary file]")
+    parser.add_argument("--cache-dir", help="directory for the persistent cache [default: $MLOGPP_CACHE, disabled if unset]")
+    parser.add_argument("--game-version", help="targeted Mindustry version [default: the latest supported version]")
+
+    args = parser.parse_args(argv)
+
+    from .cache import DiskCache
+    from .server import Server
+
+    DiskCache.DIRECTORY = args.cache_dir or os.environ.get("MLOGPP_CACHE") or None
+    _set_game_version(args.game_version)
+
+    try:
+        server = Server(args.socket)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    # remove the socket when terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    print(f"Listening on {server.server_address}, press Ctrl+C to stop")
+
+    with server:
+        try:
+            server.serve_forever()
+
+        except KeyboardInterrupt:
+            pass
+
+
+def _set_game_version(version: str | None):
+    """
+    Set the targeted game version, exit if it is not supported.
+    """
+
+    from .content import Content
+
+    if version is not None and version not in Content.versions():
+        print(f"Error: unknown game version \"{version}\", available: {', '.join(Content.versions())}")
+        sys.exit(1)
+
+    Content.VERSION = version
+
+
+def _configure(args: argparse.Namespace):
+    """
+    Configure the compiler in this process from command line arguments.
+    """
+
+    from .lexer import Lexer
+    from .cache import DiskCache
+
+    if args.legacy_lexer:
+        Lexer.DEFAULT = Lexer
+
+    DiskCache.DIRECTORY = args.cache_dir or os.environ.get("MLOGPP_CACHE") or None
+    _set_game_version(args.game_version)
+
+
+def _inline_budget(args: argparse.Namespace) -> int | None:
+    """
+    Get the inlining budget from command line arguments, None to always inline.
+    """
+
+    from .context import CompilationContext
+
+    if args.inline_budget is None:
+        return CompilationContext.DEFAULT_INLINE_BUDGET
+
+    return args.inline_budget or None
+
+
 def main() -> None:
     """
     Parse command line arguments and compile code.
     """
 
-    parser = argparse.ArgumentParser(description="Mindustry logic compiler", prog="mlog++")
+    if sys.argv[1:2] == ["serve"]:
+        serve(sys.argv[2:])
+        return
 
-    parser.add_argument("file", type=str, help="input file [@clip for clipboard]")
+    parser = argparse.ArgumentParser(description="Mindustry logic compiler", prog="mlog++",
+                                     epilog="Run `mlog++ serve` to start a compile daemon, used when it is running.")
+
+    parser.add_argument("file", type=str, nargs="*", help="input file(s) or glob patterns [@clip for clipboard]")
 
     parser.add_argument("-o:f", "--output-file", help="write output to a file")
     parser.add_argument("-o:s", "--output-stdout", help="write output to stdout", action="store_true")
     parser.add_argument("-o:c", "--output-clip", help="write output to clipboard (default)", action="store_true")
+    parser.add_argument("-o:d", "--output-dir", help="compile multiple files into a directory")
+
+    parser.add_argument("-j", "--jobs", type=int, help="number of parallel compilations [default: number of CPUs]")
+
+    parser.add_argument("-w", "--watch", metavar="DIR", help="recompile the files in a directory when they or their imports change")
 
     parser.add_argument("-v", "--verbose", help="print additional information", action="store_true")
     parser.add_argument("-l", "--lines", help="print line numbers when output to stdout is selected", action="store_true")
@@ -40,10 +221,60 @@ def main() -> None:
 
     parser.add_argument("-a", "--assembly", help="compile assembly", action="store_true")
 
+    parser.add_argument("--game-version", help="targeted Mindustry version [default: the latest supported version]")
+
+    parser.add_argument("--inline-budget", type=int, metavar="N",
+                        help="maximum number of instructions before functions are called instead of inlined [default: 1000, 0 to always inline]")
+
+    parser.add_argument("--cache-dir", help="directory for the persistent cache [default: $MLOGPP_CACHE, disabled if unset]")
+    parser.add_argument("--cache-stats", help="print cache statistics", action="store_true")
+
+    parser.add_argument("--legacy-lexer", help="use the character by character lexer (development only)", action="store_true")
+
+    parser.add_argument("--no-daemon", help="don't use the compile daemon", action="store_true")
+
     parser.add_argument("-V", "--version", action="version", version=f"mlog++ {__version__}")
 
     args = parser.parse_args()
 
+    if args.watch is not None:
+        _configure(args)
+        watch(args.watch, args.output_dir, args.assembly, _inline_budget(args))
+        return
+
+    if not args.file:
+        parser.error("the following arguments are required: file")
+
+    # expand glob patterns, which aren't expanded by every shell
+    files = []
+    for pattern in args.file:
+        if any(ch in pattern for ch in "*?["):
+            files += sorted(glob.glob(pattern, recursive=True))
+        else:
+            files.append(pattern)
+
+    # batch mode
+    if args.output_dir is not None or len(files) != 1 or files != args.file:
+        if args.output_dir is None:
+            print("Error: multiple input files require an output directory")
+            sys.exit(1)
+
+        if not files:
+            print("Error: no input files")
+            sys.exit(1)
+
+        if missing := [file for file in files if not os.path.isfile(file)]:
+            print(f"Error: input file \"{missing[0]}\" does not exist")
+            sys.exit(1)
+
+        _configure(args)
+        if not compile_batch(files, args.output_dir, args.jobs, args.assembly, args.verbose, _inline_budget(args)):
+            sys.exit(1)
+
+        return
+
+    args.file = files[0]
+
     # default output method
     output_method = IOMethod.CLIP
     output_file = ""
@@ -53,7 +284,7 @@ def main() -> None:
     # parse arguments
     for k, v in vars(args).items():
         if v:
-            if k.startswith("output"):
+            if k.startswith("output") and k != "output_dir":
                 # output method
 
                 output_method = IOMethod.FILE if k.endswith("file") else IOMethod.STD if k.endswith("stdout") else IOMethod.CLIP
@@ -72,24 +303,44 @@ def main() -> None:
 
     # @clip is clipboard input
     if args.file == "@clip":
+        import pyperclip
         code = pyperclip.paste()
     else:
         with open(args.file, "r") as f:
             code = f.read()
 
-    try:
-        if args.assembly:
-            out = compile_asm(code, args.file)
-        else:
-            out = compile_code(code, args.file)
-    except Error as e:
-        e.print()
+    # options which change the state of the compiler or need it to be in this process
+    local = args.no_daemon or args.legacy_lexer or args.cache_dir or args.cache_stats or args.print_exceptions or verbose or \
+        args.inline_budget is not None
 
-        # print the traceback
-        if args.print_exceptions:
-            raise e
+    if not local and (response := compile_remote(code, args.file, args.assembly, args.game_version)) is not None:
+        if "error" in response:
+            Error.print_dict(response["error"])
+            sys.exit(1)
 
-        sys.exit(1)
+        out = response["output"]
+
+    else:
+        _configure(args)
+
+        from .compile import compile_code, compile_asm
+        from .context import CompilationContext
+
+        ctx = CompilationContext(_inline_budget(args), verbose)
+
+        try:
+            if args.assembly:
+                out = compile_asm(code, args.file, ctx)
+            else:
+                out = compile_code(code, args.file, ctx)
+        except Error as e:
+            e.print()
+
+            # print the traceback
+            if args.print_exceptions:
+                raise e
+
+            sys.exit(1)
 
     if output_method == IOMethod.FILE:
         # output to file
@@ -116,7 +367,44 @@ def main() -> None:
     elif output_method == IOMethod.CLIP:
         # output to clipboard
 
+        import pyperclip
         pyperclip.copy(out)
 
     if verbose:
         print(f"Output: {len(out.strip())} characters, {len(out.strip().split())} words, {len(out.strip().splitlines())} lines")
+
+        # verbose output is always compiled in this process
+        if ctx.timings:
+            total = sum(timing[2] for timing in ctx.timings)
+            print(f"Const expressions: {len(ctx.timings)} evaluated in {total * 1000:.1f} ms")
+
+            # the slowest expressions
+            for pos, expr, elapsed in sorted(ctx.timings, key=lambda timing: timing[2], reverse=True)[:5]:
+                expr = " ".join(expr.split())
+                if len(expr) > 60:
+                    expr = expr[:57] + "..."
+
+                print(f"  {elapsed * 1000:8.2f} ms  {pos.file}:{pos.line + 1}  [{expr}]")
+
+        if sites := list(ctx.call_sites.values()):
+            called = sum(not site.inline for site in sites)
+            print(f"Function calls: {len(sites) - called} inlined, {called} called, "
+                  f"budget {ctx.inline_budget if ctx.inline_budget is not None else 'unlimited'}")
+
+            # instructions executed per iteration saved by inlining, lost by calling
+            for site in sites:
+                saved = site.saved() if site.inline else -site.saved()
+                print(f"  {'inline' if site.inline else 'call  '}  {saved:+6}  {site.pos.file}:{site.pos.line + 1}  "
+                      f"{site.function}  [loop depth {site.depth}, {site.constants} constant arguments, {site.copies} copies]")
+
+    if args.cache_stats:
+        from .cache import ImportCache, DiskCache
+
+        stats = ImportCache.stats()
+        print(f"Import cache: {stats['hits']} hits, {stats['misses']} misses")
+
+        stats = DiskCache.stats()
+        if DiskCache.DIRECTORY is None:
+            print("Disk cache: disabled")
+        else:
+            print(f"Disk cache [{DiskCache.DIRECTORY}]: {stats['hits']} hits, {stats['misses']} misses, {stats['writes']} writes")
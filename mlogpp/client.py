@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import stat
+import tempfile
+
+from . import __version__
+
+# seconds to wait for connecting to the daemon and for its response, the code is compiled locally after that
+CONNECT_TIMEOUT = 1.0
+TIMEOUT = 30.0
+
+
+def socket_path(create: bool = False) -> str:
+    """
+    Get the default path of the compile daemon socket.
+
+    Args:
+        create: Create the per-user directory of the socket if it doesn't exist.
+
+    Returns:
+        $MLOGPP_SOCKET, or a path in $XDG_RUNTIME_DIR or in a per-user directory in the temporary directory.
+
+    Raises:
+        OSError: The directory of the socket belongs to another user or other users can access it.
+    """
+
+    if (path := os.environ.get("MLOGPP_SOCKET")) is not None:
+        return path
+
+    if directory := os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(directory, "mlogpp.sock")
+
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    directory = os.path.join(tempfile.gettempdir(), f"mlogpp-{user}")
+
+    if create:
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+
+    if os.path.exists(directory) and not owned(directory, True):
+        raise OSError(f"Directory {directory} belongs to another user or is accessible by other users")
+
+    return os.path.join(directory, "mlogpp.sock")
+
+
+def owned(path: str, private: bool = False) -> bool:
+    """
+    Check that a file belongs to the current user.
+
+    Args:
+        path: Path of the file.
+        private: Also check that it is not a symbolic link and other users can't access it.
+
+    Returns:
+        True if the file belongs to the current user, always True if the system has no users.
+    """
+
+    if not hasattr(os, "getuid"):
+        return True
+
+    try:
+        st = os.lstat(path) if private else os.stat(path)
+    except OSError:
+        return False
+
+    if private and (stat.S_ISLNK(st.st_mode) or st.st_mode & 0o077):
+        return False
+
+    return st.st_uid == os.getuid()
+
+
+def send(sock: socket.socket, message: dict):
+    """
+    Send a message of the daemon protocol, one JSON object per line.
+
+    Args:
+        sock: The connected socket.
+        message: The message.
+    """
+
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def request(message: dict, path: str | None = None) -> dict | None:
+    """
+    Send a request to the compile daemon.
+
+    Args:
+        message: The request.
+        path: Path of the daemon socket, the default path if None.
+
+    Returns:
+        The response, None if no daemon of this version is running, the socket belongs to another user
+        or the daemon doesn't respond in time.
+    """
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    try:
+        path = path or socket_path()
+        # anyone could create a socket at the path and read the code
+        if not owned(path):
+            return None
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(TIMEOUT)
+            send(sock, message)
+
+            with sock.makefile("rb") as f:
+                line = f.readline()
+
+    except OSError:
+        return None
+
+    try:
+        response = json.loads(line)
+    except ValueError:
+        return None
+
+    if response.get("version") != __version__:
+        return None
+
+    return response
+
+
+def compile_remote(code: str, filename: str, assembly: bool = False, game_version: str | None = None,
+                   path: str | None = None) -> dict | None:
+    """
+    Compile code with the compile daemon.
+
+    Args:
+        code: The code to be compiled.
+        filename: Name of the compiled file. Used for imports and errors, relative to the current directory.
+        assembly: Compile mlog++ assembly code.
+        game_version: The targeted game version, the latest version if None.
+        path: Path of the daemon socket, the default path if None.
+
+    Returns:
+        The response, with the compiled code in `output` or the error converted by `Error.to_dict` in `error`.
+        None if no daemon targeting the game version is running.
+    """
+
+    response = request({"code": code, "path": os.path.abspath(filename), "assembly": assembly,
+                        "game_version": game_version}, path)
+
+    if response is None or ("output" not in response and "error" not in response):
+        return None
+
+    return response
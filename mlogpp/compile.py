@@ -1,6 +1,11 @@
+from __future__ import annotations
+
 import os.path
+import time
+from typing import Iterable, NamedTuple
 
 from .generator import Gen
+from .context import CompilationContext
 from .preprocess import Preprocessor
 from .lexer import Lexer
 from .parser import Parser
@@ -10,58 +15,272 @@ from .scope import Scope
 from .value_types import Type
 from .builtins import BUILTINS
 from .asm.parser import AsmParser
+from .node import Node
+from .instruction import Instruction
+from .error import Error
 
 
-def compile_code(code: str, filename: str) -> str:
+def parse_code(code: str, filename: str, parser: type = Parser) -> Node:
     """
-    Compile mlog++ code
+    Lex and parse mlog++ code, reusing the tree from the disk cache if the code and its imports are unchanged.
+
+    Args:
+        code: The code to be parsed.
+        filename: Name of the parsed file. Used for imports and errors.
+        parser: The parser to be used.
+
+    Returns:
+        The parsed code.
+    """
+
+    return _parse_code(code, filename, parser)[0]
+
+
+def _parse_code(code: str, filename: str, parser: type) -> tuple[Node, dict[str, tuple[int, str]]]:
+    ctx = CompilationContext.current()
+    if ctx.timings is not None:
+        ctx.timings = []
+
+    # only imported when needed, it's slow to import
+    from .cache import ImportCache, DiskCache
+
+    lexer = Lexer.create(os.path.dirname(os.path.abspath(filename)))
+
+    key = None
+    if DiskCache.DIRECTORY is not None:
+        key = DiskCache.key("tree", parser.__name__, type(lexer).__name__, os.path.abspath(filename),
+                            ImportCache.digest(code))
+        if (cached := DiskCache.load(key)) is not None:
+            return cached
+
+    tokens = lexer.lex_table(code, filename)
+    tokens = Preprocessor.preprocess(tokens)
+    tree = parser().parse(tokens)
+
+    DiskCache.store(key, tree, lexer.dependencies)
+
+    return tree, lexer.dependencies
+
+
+def _options() -> tuple[tuple[type, str], ...]:
+    """
+    Options of the compiler which change the output, forwarded to the worker processes of `compile_many`.
+    """
+
+    # only imported when needed, it's slow to import
+    from .content import Content
+
+    return (Lexer, "DEFAULT"), (Linker, "EMIT_LABELS"), (Content, "VERSION")
+
+
+def _output_key(kind: str, code: str, filename: str, *parts: str) -> str | None:
+    """
+    Create the disk cache key of a compiled file.
+    Imported files are not part of the key, they are checked when the output is loaded.
+
+    Args:
+        parts: Options of the compilation which change the output.
+
+    Returns:
+        The cache key, None if the disk cache is disabled.
+    """
+
+    from .cache import ImportCache, DiskCache
+    from .content import Content
+
+    if DiskCache.DIRECTORY is None:
+        return None
+
+    return DiskCache.key(kind, *(str(getattr(cls, name)) for cls, name in _options()), Content.version(), *parts,
+                         os.path.abspath(filename), ImportCache.digest(code))
+
+
+def _generate(tree: Node) -> list[Instruction]:
+    """
+    Generate and optimize code in the active context, which is reset first.
+    """
+
+    Gen.reset()
+    Scope.reset(BUILTINS.copy())
+    Type.reset()
+
+    tree.gen()
+    return Optimizer.optimize(Gen.get(), Gen.subroutines())
+
+
+def compile_code(code: str, filename: str, ctx: CompilationContext | None = None) -> str:
+    """
+    Compile mlog++ code, reusing the output from the disk cache if the code and its imports are unchanged.
+    Every compilation has its own context, so it is safe to compile from multiple threads at the same time.
 
     Args:
         code: The code to be compiled.
         filename: Name of the compiled file. Used for imports and errors.
+        ctx: Context of the compilation with its options, a new one with the default options if None.
+            It keeps the call sites and const expression timings of the compiled code,
+            unless the output is loaded from the cache.
 
     Returns:
         The compiled code.
     """
 
-    Gen.reset()
-    Scope.reset(BUILTINS)
-    Type.reset()
+    from .cache import DiskCache
+    from .inliner import Inliner
+
+    if ctx is None:
+        ctx = CompilationContext()
+
+    key = _output_key("output", code, filename, str(ctx.inline_budget))
+    if (cached := DiskCache.load(key)) is not None:
+        return cached[0]
+
+    with ctx:
+        Gen.reset()
+        Scope.reset(BUILTINS.copy())
+        Type.reset()
+
+        tree, dependencies = _parse_code(code, filename, Parser)
+        code = Inliner.generate(lambda: _generate(tree))
+        code = Scope.get_config() + code
+        code = Linker.link(code)
 
-    code = Lexer(os.path.dirname(os.path.abspath(filename))).lex(code, filename)
-    code = Preprocessor.preprocess(code)
-    code = Parser().parse(code)
-    code.gen()
-    code = Gen.get()
-    code = Optimizer.optimize(code)
-    code = Scope.get_config() + code
-    code = Linker.link(code)
+    DiskCache.store(key, code, dependencies)
 
     return code
 
 
-def compile_asm(code: str, filename: str) -> str:
+def compile_asm(code: str, filename: str, ctx: CompilationContext | None = None) -> str:
     """
-    Compile mlog++ assembly code
+    Compile mlog++ assembly code, reusing the output from the disk cache if the code and its imports are unchanged.
 
     Args:
         code: The code to be compiled.
         filename: Name of the compiled file. Used for imports and errors.
+        ctx: Context of the compilation with its options, a new one with the default options if None.
+            It keeps the const expression timings of the compiled code, unless the output is loaded from the cache.
 
     Returns:
         The compiled code.
     """
 
-    # reset the state
-    Gen.reset()
-    Scope.reset(BUILTINS)
-    Type.reset()
+    from .cache import DiskCache
+
+    if ctx is None:
+        ctx = CompilationContext()
+
+    key = _output_key("asm-output", code, filename)
+    if (cached := DiskCache.load(key)) is not None:
+        return cached[0]
+
+    with ctx:
+        Gen.reset()
+        Scope.reset(BUILTINS.copy())
+        Type.reset()
+
+        tree, dependencies = _parse_code(code, filename, AsmParser)
+        tree.gen()
+        code = Gen.get()
+        code = str(Linker.link(code))
+
+    DiskCache.store(key, code, dependencies)
+
+    return code
+
+
+class CompileResult(NamedTuple):
+    """
+    Result of compiling one file with `compile_many`.
+    """
+
+    path: str
+    output: str | None
+    error: Error | None
+    elapsed: float
+
+
+def compile_file(path: str, assembly: bool = False,
+                 inline_budget: int | None = CompilationContext.DEFAULT_INLINE_BUDGET) -> CompileResult:
+    """
+    Compile a file, catching errors.
+
+    Args:
+        path: Path to the file.
+        assembly: Compile the file as mlog++ assembly.
+        inline_budget: Maximum number of instructions before calls are made to subroutines, None to always inline.
+
+    Returns:
+        The compiled code or the error.
+    """
+
+    start = time.perf_counter()
+
+    try:
+        with open(path, "r") as f:
+            code = f.read()
+
+        if assembly:
+            output = compile_asm(code, path)
+        else:
+            output = compile_code(code, path, CompilationContext(inline_budget))
+
+        return CompileResult(path, output, None, time.perf_counter() - start)
+
+    except Error as e:
+        return CompileResult(path, None, e, time.perf_counter() - start)
+
+    except (OSError, RecursionError) as e:
+        return CompileResult(path, None, Error(f"{type(e).__name__}: {e}"), time.perf_counter() - start)
+
+    # a bug in the compiler only fails this file
+    except Exception as e:
+        return CompileResult(path, None, Error(f"Internal error: {type(e).__name__}: {e}"), time.perf_counter() - start)
+
+
+def _init_worker(cache_dir: str | None, options: tuple):
+    """
+    Prepare a worker process for `compile_many`.
+    The compiler and builtins are imported with this module, once per worker.
+
+    Args:
+        cache_dir: Directory of the disk cache.
+        options: Values of `_options()` in the parent process.
+    """
+
+    from .cache import DiskCache
+
+    DiskCache.DIRECTORY = cache_dir
+    for (cls, name), value in zip(_options(), options):
+        setattr(cls, name, value)
+
+
+def compile_many(paths: Iterable[str], jobs: int | None = None, assembly: bool = False,
+                 inline_budget: int | None = CompilationContext.DEFAULT_INLINE_BUDGET) -> Iterable[CompileResult]:
+    """
+    Compile multiple files in parallel.
+
+    Args:
+        paths: Paths to the files.
+        jobs: Number of worker processes, defaults to the number of CPUs. Files are compiled in this process if 1.
+        assembly: Compile the files as mlog++ assembly.
+        inline_budget: Maximum number of instructions before calls are made to subroutines, None to always inline.
+
+    Returns:
+        Results in the same order as the paths, yielded as they complete.
+    """
+
+    paths = list(paths)
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+
+    if jobs <= 1:
+        for path in paths:
+            yield compile_file(path, assembly, inline_budget)
+
+        return
 
-    code = Lexer(os.path.dirname(os.path.abspath(filename))).lex(code, filename)
-    code = Preprocessor.preprocess(code)
-    code = AsmParser().parse(code)
-    code.gen()
-    code = Gen.get()
-    code = Linker.link(code)
+    # only imported when needed, it's slow to import
+    from concurrent.futures import ProcessPoolExecutor
+    from .cache import DiskCache
 
-    return str(code)
+    initargs = (DiskCache.DIRECTORY, tuple(getattr(cls, name) for cls, name in _options()))
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=initargs) as executor:
+        yield from executor.map(compile_file, paths, [assembly] * len(paths), [inline_budget] * len(paths))
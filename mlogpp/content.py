@@ -1,88 +1,187 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+
 from .value_types import Type
 
 
+class ContentDatabase:
+    """
+    Content of one game version, loaded from a file in `Content.DIRECTORY`.
+
+    Every content name has an id, and every category is a bitset of the ids of its names,
+    so membership checks don't need a set per category.
+    """
+
+    version: str
+
+    # id -> name
+    names: list[str]
+    # name -> id
+    ids: dict[str, int]
+    # category -> bitset of ids
+    categories: dict[str, int]
+
+    sensable: dict[str, Type]
+    controllable: dict[str, Type]
+    setprop: dict[str, Type]
+    # (num) if False, else (num, Team)
+    rules: dict[str, bool]
+
+    def __init__(self, data: dict):
+        """
+        Args:
+            data: Contents of the file.
+        """
+
+        self.version = data["version"]
+
+        self.names = []
+        self.categories = {}
+        for category, names in data["content"].items():
+            self.categories[category] = ((1 << len(names)) - 1) << len(self.names)
+            self.names += names
+
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        self.sensable = {name: self._type(type_) for name, type_ in data["sensable"].items()}
+        self.controllable = {name: self._type(type_) for name, type_ in data["controllable"].items()}
+        self.setprop = {name: self._type(type_) for name, type_ in data["setprop"].items()}
+        self.rules = data["rules"]
+
+    @staticmethod
+    def _type(name: str) -> Type:
+        """
+        Convert a type in a content file, a builtin type name or a union of them separated by `|`.
+        """
+
+        type_ = None
+        for part in name.split("|"):
+            t = getattr(Type, part.upper())
+            type_ = t if type_ is None else type_ | t
+
+        return type_
+
+    def contains(self, name: str, *categories: str) -> bool:
+        """
+        Check if a name is content of one of the categories.
+
+        Args:
+            name: The name, without `@`.
+            categories: Names of the categories.
+
+        Returns:
+            True if the name is in one of the categories.
+        """
+
+        if (id_ := self.ids.get(name)) is None:
+            return False
+
+        return any(self.categories[category] >> id_ & 1 for category in categories)
+
+    def category(self, category: str) -> list[str]:
+        """
+        Get the names in a category.
+
+        Args:
+            category: Name of the category.
+
+        Returns:
+            The names, without `@`.
+        """
+
+        mask = self.categories[category]
+        start = (mask & -mask).bit_length() - 1
+        return self.names[start:start + mask.bit_count()]
+
+    def sensor_type(self, name: str) -> Type | None:
+        """
+        Get the type of a sensable property.
+
+        Args:
+            name: The property, items and liquids are sensable as their amount.
+
+        Returns:
+            Type of the property, None if it isn't sensable.
+        """
+
+        if (type_ := self.sensable.get(name)) is not None:
+            return type_
+
+        if self.contains(name, "items", "liquids"):
+            return Type.NUM
+
+        return None
+
+
 class Content:
-    BLOCKS: set[str] = {
-        "graphite-press", "multi-press", "silicon-smelter", "silicon-crucible", "kiln", "plastanium-compressor",
-        "phase-weaver", "cryofluid-mixer", "pyratite-mixer", "blast-mixer", "melter", "separator", "disassembler",
-        "spore-press", "pulverizer", "coal-centrifuge", "incinerator", "copper-wall", "copper-wall-large",
-        "titanium-wall", "titanium-wall-large", "plastanium-wall", "plastanium-wall-large", "thorium-wall",
-        "thorium-wall-large", "phase-wall", "phase-wall-large", "surge-wall", "surge-wall-large", "door", "door-large",
-        "scrap-wall", "scrap-wall-large", "scrap-wall-huge", "scrap-wall-gigantic", "mender", "mend-projector",
-        "overdrive-projector", "overdrive-dome", "force-projector", "shock-mine", "conveyor", "titanium-conveyor",
-        "plastanium-conveyor", "armored-conveyor", "junction", "bridge-conveyor", "phase-conveyor", "sorter",
-        "inverted-sorter", "router", "distributor", "overflow-gate", "underflow-gate", "mass-driver", "duct",
-        "duct-router", "duct-bridge", "mechanical-pump", "rotary-pump", "conduit", "pulse-conduit", "plated-conduit",
-        "liquid-router", "liquid-tank", "liquid-junction", "bridge-conduit", "phase-conduit", "power-node",
-        "power-node-large", "surge-tower", "diode", "battery", "battery-large", "combustion-generator",
-        "thermal-generator", "steam-generator", "differential-generator", "rtg-generator", "solar-panel",
-        "solar-panel-large", "thorium-reactor", "impact-reactor", "mechanical-drill", "pneumatic-drill", "laser-drill",
-        "blast-drill", "water-extractor", "cultivator", "oil-extractor", "core-shard", "core-foundation",
-        "core-nucleus", "vault", "container", "unloader", "duo", "scatter", "scorch", "hail", "wave", "lancer", "arc",
-        "parallax", "swarmer", "salvo", "segment", "tsunami", "fuse", "ripple", "cyclone", "foreshadow", "spectre",
-        "meltdown", "command-center", "ground-factory", "air-factory", "naval-factory", "additive-reconstructor",
-        "multiplicative-reconstructor", "exponential-reconstructor", "tetrative-reconstructor", "repair-point",
-        "repair-turret", "payload-conveyor", "payload-router", "payload-propulsion-tower", "power-source", "power-void",
-        "item-source", "item-void", "liquid-source", "liquid-void", "payload-void", "payload-source", "illuminator",
-        "launch-pad", "interplanetary-accelerator", "message", "switch", "micro-processor", "logic-processor",
-        "hyper-processor", "memory-cell", "memory-bank", "logic-display", "large-logic-display", "liquid-container",
-        "deconstructor", "constructor", "thruster", "large-constructor", "payload-loader", "payload-unloader",
-        "silicon-arc-furnace", "cliff-crusher", "plasma-bore", "reinforced-liquid-junction", "breach", "core-bastion",
-        "turbine-condenser", "beam-node", "beam-tower", "build-tower", "impact-drill", "carbide-crucible",
-        "surge-conveyor", "duct-unloader", "surge-router", "reinforced-conduit", "reinforced-liquid-router",
-        "reinforced-liquid-container", "reinforced-liquid-tank", "reinforced-bridge-conduit", "core-citadel",
-        "core-acropolis", "heat-reactor", "impulse-pump", "reinforced-pump", "electrolyzer", "oxidation-chamber",
-        "surge-smelter", "surge-crucible", "overflow-duct", "large-plasma-bore", "cyanogen-synthesizer",
-        "slag-centrifuge", "electric-heater", "slag-incinerator", "phase-synthesizer", "sublimate",
-        "reinforced-container", "reinforced-vault", "atmospheric-concentrator", "unit-cargo-loader",
-        "unit-cargo-unload-point", "chemical-combustion-chamber", "pyrolysis-generator", "regen-projector", "titan",
-        "small-deconstructor", "vent-condenser", "phase-heater", "heat-redirector", "tungsten-wall",
-        "tungsten-wall-large", "tank-assembler", "beryllium-wall", "beryllium-wall-large", "eruption-drill",
-        "ship-assembler", "mech-assembler", "shield-projector", "beam-link", "world-processor",
-        "reinforced-payload-conveyor", "reinforced-payload-router", "disperse", "large-shield-projector",
-        "payload-mass-driver", "world-cell", "carbide-wall", "carbide-wall-large", "tank-fabricator", "mech-fabricator",
-        "ship-fabricator", "reinforced-surge-wall", "radar", "blast-door", "canvas", "armored-duct", "shield-breaker",
-        "unit-repair-tower", "diffuse", "prime-refabricator", "basic-assembler-module", "reinforced-surge-wall-large",
-        "tank-refabricator", "mech-refabricator", "ship-refabricator", "slag-heater", "afflict", "shielded-wall",
-        "lustre", "scathe", "smite", "underflow-duct", "malign", "shockwave-tower", "heat-source", "flux-reactor",
-        "neoplasia-reactor"
-    }
-
-    ITEMS: set[str] = {
-        "copper", "lead", "metaglass", "graphite", "sand", "coal", "titanium", "thorium", "scrap", "silicon",
-        "plastanium", "phase-fabric", "surge-alloy", "spore-pod", "blast-compound", "pyratite", "beryllium",
-        "tungsten", "oxide", "carbide"
-    }
-
-    LIQUIDS: set[str] = {
-        "water", "slag", "oil", "cryofluid", "neoplasm", "arkycite",
-        "ozone", "hydrogen", "nitrogen", "cyanogen"
-    }
-
-    UNITS: set[str] = {
-        "dagger", "mace", "fortress", "scepter", "reign",
-        "nova", "pulsar", "quasar", "vela", "corvus",
-        "crawler", "atrax", "spiroct", "arkyid", "toxopid",
-        "flare", "horizon", "zenith", "antumbra", "eclipse",
-        "mono", "poly", "mega", "quad", "oct",
-        "risso", "minke", "bryde", "sei", "omura",
-        "retusa", "oxynoe", "cyerce", "aegires", "navanax",
-        "alpha", "beta", "gamma",
-
-        "stell", "locus", "precept", "vanquish", "conquer",
-        "merui", "cleroi", "anthicus", "tecta", "collaris",
-        "elude", "avert", "obviate", "quell", "disrupt",
-        "evoke", "incite", "emanate"
-    }
-
-    EFFECTS: set[str] = {
-        "burning", "freezing", "unmoving", "slow", "wet", "melting", "sapped", "electrified", "overdrive", "overclock",
-        "shielded", "guardian", "shocked", "blasted", "corroded", "disarmed"
-    }
-
-    TEAMS: set[str] = {
-        "derelict", "sharded", "crux", "malis"
-    }
-
-    SENSABLE: dict[str, Type] = {}
-    CONTROLLABLE: dict[str, Type] = {}
+    """
+    Game content of the targeted version, loaded when first used.
+    """
+
+    # directory of the content files, one per game version
+    DIRECTORY: str = os.path.join(os.path.dirname(__file__), "data", "content")
+    # targeted game version, the latest version if None
+    VERSION: str | None = None
+
+    # path -> content
+    _databases: dict[str, ContentDatabase] = {}
+    # directory -> versions
+    _versions: dict[str, list[str]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def versions(cls) -> list[str]:
+        """
+        Get the available game versions.
+
+        Returns:
+            The versions, from the oldest to the latest.
+        """
+
+        if (versions := cls._versions.get(cls.DIRECTORY)) is None:
+            versions = [fn.removesuffix(".json") for fn in os.listdir(cls.DIRECTORY) if fn.endswith(".json")]
+            versions = cls._versions[cls.DIRECTORY] = sorted(versions, key=lambda v: tuple(map(int, v.split("."))))
+
+        return versions
+
+    @classmethod
+    def version(cls) -> str:
+        """
+        Get the targeted game version.
+
+        Returns:
+            `Content.VERSION`, or the latest version if it is None.
+        """
+
+        return cls.VERSION or cls.versions()[-1]
+
+    @classmethod
+    def get(cls, version: str | None = None) -> ContentDatabase:
+        """
+        Get the content of a game version, loading it if it wasn't used yet.
+
+        Args:
+            version: The game version, the targeted version if None.
+
+        Returns:
+            The content.
+        """
+
+        version = version or cls.version()
+        path = os.path.join(cls.DIRECTORY, f"{version}.json")
+
+        if (database := cls._databases.get(path)) is not None:
+            return database
+
+        with cls._lock:
+            if path not in cls._databases:
+                if not os.path.isfile(path):
+                    raise ValueError(f"Unknown game version \"{version}\", available: {', '.join(cls.versions())}")
+
+                with open(path, "r") as f:
+                    cls._databases[path] = ContentDatabase(json.load(f))
+
+            return cls._databases[path]
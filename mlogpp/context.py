@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from contextvars import ContextVar, Token
+from typing import Any
+
+
+class CompilationContext:
+    """
+    State of a single compilation.
+
+    The generated instructions, scopes, types and type implementations are kept in the active context instead of
+    class attributes, so compilations running at the same time in different threads don't interfere.
+    A context is activated with a `with` statement, which can be nested.
+    """
+
+    instructions: list
+    tmp_index: int
+    # bodies of functions called as subroutines, placed after the instructions
+    subroutines: list[list]
+
+    scopes: list[dict[str, Any]]
+    # scope index -> captured scope of the inlined function, shared with the function
+    captured: list[dict[str, Any] | None]
+    # name -> indices of the scopes above the base scopes which define it, the innermost is last
+    bindings: dict[str, list[int]]
+    scope_names: list[str]
+    functions: list[str]
+    loops: list[str]
+    configurations: dict[str, Any]
+
+    # maximum number of instructions before calls are made to subroutines instead of inlining, None to always inline
+    inline_budget: int | None
+    # call node -> call site, recorded while generating the code, kept after the compilation for reports
+    call_sites: dict[Any, Any]
+    # position, code and evaluation time in seconds of every const expression of the parsed code, None if not recorded
+    timings: list[tuple[Any, str, float]] | None
+    # call node -> whether the call is inlined, decided by the inliner for the next time the code is generated
+    inline: dict[Any, bool]
+
+    typenames: dict[str, Any]
+    implementations: dict[Any, Any]
+
+    # label jumped to when returning from the function being inlined
+    end_label: str
+    # last node which generated code, used for errors
+    node: Any
+    # traces of the bodies of inlined functions being recorded as templates, the innermost is last
+    traces: list
+
+    _tokens: list[Token]
+
+    DEFAULT_INLINE_BUDGET: int = 1000
+
+    def __init__(self, inline_budget: int | None = DEFAULT_INLINE_BUDGET, timings: bool = False):
+        """
+        Args:
+            inline_budget: Maximum number of instructions before calls are made to subroutines instead of inlining,
+                None to always inline.
+            timings: Record the evaluation time of every const expression.
+        """
+
+        self.instructions = []
+        self.tmp_index = 0
+        self.subroutines = []
+
+        self.scopes = [{}, {}, {}, {}]
+        self.captured = [None, None, None, None]
+        self.bindings = {}
+        self.scope_names = ["<enum>", "<builtins>", "<config>", "<main>"]
+        self.functions = []
+        self.loops = []
+        self.configurations = {}
+        self.inline_budget = inline_budget
+        self.call_sites = {}
+        self.timings = [] if timings else None
+        self.inline = {}
+
+        self.typenames = {}
+        self.implementations = {}
+
+        self.end_label = ""
+        self.node = None
+        self.traces = []
+
+        self._tokens = []
+
+    def __enter__(self) -> CompilationContext:
+        self._tokens.append(_CURRENT.set(self))
+        return self
+
+    def __exit__(self, *_):
+        _CURRENT.reset(self._tokens.pop())
+
+    @staticmethod
+    def current() -> CompilationContext:
+        """
+        Get the active context.
+
+        Returns:
+            The innermost active context in the current thread, or the default one if there is none.
+        """
+
+        return _CURRENT.get()
+
+
+_CURRENT: ContextVar[CompilationContext] = ContextVar("compilation_context", default=CompilationContext())
@@ -1,19 +1,29 @@
 from .values import Type, Value, TypeImpl
-from .content import Content
 
 
 class EnumTypeImpl(TypeImpl):
     name: str
     type: Type
-    values: dict[str, Value]
+
+    _names: set[str]
+    _content: bool
+    _values: dict[str, Value] | None
 
     def __init__(self, name: str, type_: Type, values: set[str], content: bool):
         self.name = name
         self.type = type_
 
-        self.values = {}
-        for value in values:
-            self.values[value] = Value(self.type, ("@" if content else "") + value)
+        # the values are created on first use
+        self._names = values
+        self._content = content
+        self._values = None
+
+    @property
+    def values(self) -> dict[str, Value]:
+        if self._values is None:
+            self._values = {value: Value(self.type, ("@" if self._content else "") + value) for value in self._names}
+
+        return self._values
 
     def get(self, value: Value) -> str:
         return self.name
@@ -22,105 +32,74 @@ class EnumTypeImpl(TypeImpl):
         return self.values.get(name)
 
 
-def make_enum(name: str, type_: Type, values: set[str], content: bool):
-    return Value(type_, name, type_impl=EnumTypeImpl(name, type_, values, content))
+class ContentEnumTypeImpl(EnumTypeImpl):
+    category: str
 
+    # game version -> values
+    _versions: dict[str, dict[str, Value]]
 
-SENSABLE: dict[str, Type] = {
-    "totalItems": Type.NUM,
-    "firstItem": Type.NUM,
-    "totalLiquids": Type.NUM,
-    "totalPower": Type.NUM,
-    "itemCapacity": Type.NUM,
-    "liquidCapacity": Type.NUM,
-    "powerCapacity": Type.NUM,
-    "powerNetStored": Type.NUM,
-    "powerNetCapacity": Type.NUM,
-    "powerNetIn": Type.NUM,
-    "powerNetOut": Type.NUM,
-    "ammo": Type.NUM,
-    "ammoCapacity": Type.NUM,
-    "health": Type.NUM,
-    "maxHealth": Type.NUM,
-    "heat": Type.NUM,
-    "efficiency": Type.NUM,
-    "progress": Type.NUM,
-    "timescale": Type.NUM,
-    "rotation": Type.NUM,
-    "x": Type.NUM,
-    "y": Type.NUM,
-    "shootX": Type.NUM,
-    "shootY": Type.NUM,
-    "size": Type.NUM,
-    "dead": Type.NUM,
-    "range": Type.NUM,
-    "shooting": Type.NUM,
-    "boosting": Type.NUM,
-    "mineX": Type.NUM,
-    "mineY": Type.NUM,
-    "mining": Type.NUM,
-    "speed": Type.NUM,
-    "team": Type.NUM,
-    "type": Type.NUM,
-    "flag": Type.NUM,
-    "controlled": Type.CONTROLLER,
-    "controller": Type.BLOCK | Type.UNIT,
-    "name": Type.NUM,
-    "payloadCount": Type.NUM,
-    "payloadType": Type.NUM,
-    "enabled": Type.NUM,
-    "config": Type.NUM,
-    "color": Type.NUM
-} | {
-    item: Type.NUM for item in Content.ITEMS
-} | {
-    liquid: Type.NUM for liquid in Content.LIQUIDS
-}
+    def __init__(self, name: str, type_: Type, category: str, content: bool):
+        super().__init__(name, type_, set(), content)
 
-SETPROP: dict[str, Type] = {
-    "x": Type.NUM,
-    "y": Type.NUM,
-    "rotation": Type.NUM,
-    "team": Type.TEAM,
-    "flag": Type.NUM,
-    "health": Type.NUM,
-    "totalPower": Type.NUM,
-    "payloadType": Type.NUM
-} | {
-    item: Type.NUM for item in Content.ITEMS
-} | {
-    liquid: Type.NUM for liquid in Content.LIQUIDS
-}
+        self.category = category
+        self._versions = {}
 
-CONTROLLABLE: dict[str, Type] = {
-    "enabled": Type.NUM,
-    "config": Type.CONTENT,
-    "color": Type.NUM
-}
+    @property
+    def values(self) -> dict[str, Value]:
+        # the content is loaded when first used
+        from .content import Content
 
-# (num) if False, else (num, Team)
-RULES: dict[str, bool] = {
-    rule: False for rule in [
-        "currentWaveTimer", "waveTimer", "waves", "wave", "waveSpacing", "waveSending", "attackMode",
-        "enemyCoreBuildRadius", "dropZoneRadius", "unitCap", "lighting", "ambientLight", "solarMultiplier"
-    ]
-} | {
-    rule: True for rule in [
-        "buildSpeed", "unitHealth", "unitBuildSpeed", "unitCost", "unitDamage", "blockHealth", "blockDamage",
-        "rtsMinWeight", "rtsMinSquad"
-    ]
-}
+        content = Content.get()
+        if (values := self._versions.get(content.version)) is None:
+            values = self._versions[content.version] = {
+                value: self._value(value) for value in content.category(self.category)
+            }
+
+        return values
+
+    def getattr(self, value: Value, name: str) -> Value | None:
+        from .content import Content
+
+        # don't create all values to find one
+        if (values := self._versions.get(Content.version())) is not None:
+            return values.get(name)
+
+        if Content.get().contains(name, self.category):
+            return self._value(name)
+
+        return None
 
-Content.SENSABLE = SENSABLE
-Content.CONTROLLABLE = CONTROLLABLE
+    def _value(self, name: str) -> Value:
+        return Value(self.type, ("@" if self._content else "") + name)
 
-EnumBlock = make_enum("BlockType", Type.BLOCK_TYPE, Content.BLOCKS, True)
-EnumItem = make_enum("ItemType", Type.ITEM_TYPE, Content.ITEMS, True)
-EnumLiquid = make_enum("LiquidType", Type.LIQUID_TYPE, Content.LIQUIDS, True)
-EnumUnit = make_enum("UnitType", Type.UNIT_TYPE, Content.UNITS, True)
-EnumTeam = make_enum("Team", Type.TEAM, Content.TEAMS, True)
 
-EnumEffect = make_enum("Effect", Type.private("Effect"), Content.EFFECTS, False)
+def make_enum(name: str, type_: Type, values: set[str] | str, content: bool):
+    """
+    Create an enum.
+
+    Args:
+        name: Name of the enum.
+        type_: Type of the enum values.
+        values: Names of the values, or a category of the game content.
+        content: Prefix the values with `@`.
+
+    Returns:
+        The enum.
+    """
+
+    if isinstance(values, str):
+        return Value(type_, name, type_impl=ContentEnumTypeImpl(name, type_, values, content))
+
+    return Value(type_, name, type_impl=EnumTypeImpl(name, type_, values, content))
+
+
+EnumBlock = make_enum("BlockType", Type.BLOCK_TYPE, "blocks", True)
+EnumItem = make_enum("ItemType", Type.ITEM_TYPE, "items", True)
+EnumLiquid = make_enum("LiquidType", Type.LIQUID_TYPE, "liquids", True)
+EnumUnit = make_enum("UnitType", Type.UNIT_TYPE, "units", True)
+EnumTeam = make_enum("Team", Type.TEAM, "teams", True)
+
+EnumEffect = make_enum("Effect", Type.private("Effect"), "effects", False)
 
 EnumRadarFilter = make_enum("RadarFilter", Type.private("RadarFilter"), {
     "any", "enemy", "ally", "player", "attacker", "flying", "boss", "ground"
@@ -142,11 +121,22 @@ ENUMS: list[Value] = [
 ]
 
 ENUM_TYPES: dict[Type, Value] = {
-    enum.type: enum for enum in ENUMS
+    enum.impl().type: enum for enum in ENUMS
 }
 
-ENUM_TYPES_VALUES: dict[Type, dict[str, Value]] = {}
-for enum in ENUMS:
-    impl = enum.impl()
-    if isinstance(impl, EnumTypeImpl):
-        ENUM_TYPES_VALUES[impl.type] = impl.values
+
+def enum_values(type_: Type) -> dict[str, Value] | None:
+    """
+    Get the values of an enum.
+
+    Args:
+        type_: Type of the enum values.
+
+    Returns:
+        Name -> value, None if the type is not an enum.
+    """
+
+    if (enum := ENUM_TYPES.get(type_)) is None:
+        return None
+
+    return enum.impl().values
@@ -21,22 +21,49 @@ class Error(Exception):
             pos: Position at which the error occurred.
         """
 
-        self.message = f"{msg}: {pos}"
-
         self.msg = msg
         self.pos = pos
 
+    @property
+    def message(self) -> str:
+        return f"{self.msg}: {self.pos}"
+
     def print(self):
         """
         Print the error message and position.
         """
 
-        if self.pos is not None:
+        Error.print_dict(self.to_dict())
+
+    def to_dict(self) -> dict:
+        """
+        Convert the error to a JSON serializable dictionary.
+
+        Returns:
+            The message, and the file, line, column, line of code and arrows of the position if it is known.
+        """
+
+        if self.pos is None:
+            return {"message": self.msg}
+
+        return {"message": self.msg, "file": self.pos.file, "line": self.pos.line, "column": self.pos.column,
+                "code": self.pos.code, "arrows": self.pos.arrows()}
+
+    @staticmethod
+    def print_dict(error: dict):
+        """
+        Print an error converted to a dictionary by `to_dict`.
+
+        Args:
+            error: The converted error.
+        """
+
+        if "file" in error:
             print(
-                f"{Format.ERROR}{Format.BOLD}Error{Format.RESET}{Format.ERROR} in file {self.pos.file} on line {self.pos.line + 1}, column {self.pos.start + 1}: {self.msg}{Format.RESET}")
-            print(f"Here:\n{self.pos.code}\n{self.pos.arrows()}")
+                f"{Format.ERROR}{Format.BOLD}Error{Format.RESET}{Format.ERROR} in file {error['file']} on line {error['line'] + 1}, column {error['column'] + 1}: {error['message']}{Format.RESET}")
+            print(f"Here:\n{error['code']}\n{error['arrows']}")
         else:
-            print(f"{Format.ERROR}{Format.BOLD}Error{Format.RESET}{Format.ERROR}: {self.msg}{Format.RESET}")
+            print(f"{Format.ERROR}{Format.BOLD}Error{Format.RESET}{Format.ERROR}: {error['message']}{Format.RESET}")
 
     @staticmethod
     def unexpected_character(pos: Position, ch: str):
@@ -126,3 +153,7 @@ class InternalError(Exception):
     @staticmethod
     def label_not_found(name: str):
         raise InternalError(f"Label not found [{name}]")
+
+    @staticmethod
+    def nothing_to_relex():
+        raise InternalError("Nothing to re-lex, no code was lexed yet")
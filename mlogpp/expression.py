@@ -1,15 +1,90 @@
 import ast
+import functools
+import itertools
 import operator
+import threading
+import time
+from collections import OrderedDict
+from types import CodeType, FunctionType
 from typing import Any, Callable
 
+from .context import CompilationContext
 from .util import Position
 from .tokens import TokenType
 from .error import Error
 
 
+class LimitExceeded(Exception):
+    """
+    Raised when a const expression exceeds one of its budgets.
+    """
+
+    def __init__(self, limit: str):
+        super().__init__(limit)
+
+        self.limit = limit
+
+
+def _list(iterable: Any = ()) -> list:
+    """
+    `list` with a bounded length, map iterators are consumed only up to the limit.
+    """
+
+    if not hasattr(iterable, "__len__"):
+        iterable = itertools.islice(iterable, Expression.MAX_SIZE + 1)
+
+    elif len(iterable) > Expression.MAX_SIZE:
+        raise LimitExceeded("size")
+
+    return Expression.check_size(list(iterable))
+
+
+class MemoTrace:
+    """
+    Records what a memoized const function call or block depends on.
+    """
+
+    __slots__ = ("depth", "reads", "writes", "storable")
+
+    # index of the first scope of the call, reads from scopes below it are recorded
+    depth: int
+    # name -> memo key of the first value read from outside the call
+    reads: dict[str, Any]
+    # name -> ("value", value) or ("function", definition) of top level variables written by a block
+    writes: dict[str, tuple[str, Any]]
+    storable: bool
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.reads = {}
+        self.writes = {}
+        self.storable = True
+
+    def read(self, name: str, value: Any):
+        if name in self.reads or name in self.writes:
+            return
+
+        try:
+            self.reads[name] = Expression.memo_key(value)
+        except TypeError:
+            self.storable = False
+
+    def write(self, name: str, value: Any):
+        if (definition := getattr(value, "definition", None)) is not None:
+            self.writes[name] = ("function", definition)
+            return
+
+        try:
+            Expression.memo_key(value, False)
+            self.writes[name] = ("value", value)
+        except TypeError:
+            self.storable = False
+
+
 class Expression:
     scopes: list[dict[str, Any]]
     return_stack: list[Any]
+    traces: list[MemoTrace]
 
     TOKENS: TokenType = TokenType.ID | TokenType.STRING | TokenType.SET | TokenType.OPERATOR | TokenType.NUMBER | \
                         TokenType.LPAREN | TokenType.RPAREN | TokenType.SEMICOLON | TokenType.KEYWORD | \
@@ -23,12 +98,55 @@ class Expression:
                              ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt, ast.LtE: operator.le,
                              ast.NotEq: operator.ne, ast.LShift: operator.lshift, ast.RShift: operator.rshift}
 
-    BUILTINS: dict[str, Any] = {"range": range, "map": map, "str": str, "list": list, "int": int, "float": float,
+    BUILTINS: dict[str, Any] = {"range": range, "map": map, "str": str, "list": _list, "int": int, "float": float,
                                 "print": lambda *x: print("EXPRESSION:", *x)}
 
+    # maximum number of steps (function calls and list elements) of a const expression
+    MAX_STEPS: int = 1_000_000
+    # maximum length of lists and strings and number of bits of integers
+    MAX_SIZE: int = 1_000_000
+    # maximum depth of const function calls and nested const expressions
+    MAX_DEPTH: int = 200
+    # maximum number of const expressions created by other const expressions in a file
+    MAX_EXPANSIONS: int = 10_000
+
+    # names of the helpers used by compiled expressions, locals of list comprehensions are prefixed with `_v_`
+    HELPERS: list[str] = ["_get", "_assign", "_define", "_return", "_list_comp", "_getitem", "_attribute", "_invalid"]
+
+    # memoization of const function calls and whole const expressions, shared by all expressions
+    MEMOIZE: bool = True
+    # maximum number of memoized calls and expressions
+    MEMO_SIZE: int = 4096
+    # maximum number of memoized results for the same call or expression, depending on different variables
+    MEMO_VARIANTS: int = 4
+    # maximum number of list elements in a memoized value
+    MEMO_VALUE_SIZE: int = 10_000
+
+    # call or expression -> [(reads, writes, result)]
+    _memo: OrderedDict[Any, list[tuple[dict[str, Any], dict[str, tuple[str, Any]], Any]]] = OrderedDict()
+    # guards the memo and counters, compilations can run in multiple threads
+    _memo_lock: threading.Lock = threading.Lock()
+
+    memo_hits: int = 0
+    memo_misses: int = 0
+
+    globals: dict[str, Any]
+    steps: int
+
     def __init__(self):
         self.scopes = [self.BUILTINS, {}]
         self.return_stack = []
+        self.traces = []
+        self.steps = 0
+
+        # only the helpers are available to compiled expressions
+        self.globals = {"__builtins__": {}, "_coerce": Expression.coerce, "_join": Expression._join, "_str": str,
+                        "_slice": slice}
+        self.globals |= {f"_op_{type_.__name__}": op for type_, op in Expression.OPERATORS.items()}
+        # operations which can create huge values
+        self.globals |= {"_op_Add": Expression._add, "_op_Mult": Expression._mul, "_op_Pow": Expression._pow,
+                         "_op_LShift": Expression._lshift}
+        self.globals |= {name: getattr(self, name) for name in Expression.HELPERS}
 
     def scope_push(self):
         self.scopes.append({})
@@ -49,8 +167,17 @@ class Expression:
     def execute(self, pos: Position, expr: str) -> list[str | int | float | list | None]:
         new_expr = expr.replace("\" \"", "\"\"").replace("\"\n\"", "\"\"").replace("f \"", "f\"")
         if new_expr.strip():
+            start = time.perf_counter()
             try:
-                return self.eval(ast.parse(new_expr, mode="exec").body)
+                result = self._execute(new_expr)
+                Expression.check_result(result)
+                if (timings := CompilationContext.current().timings) is not None:
+                    timings.append((pos, expr, time.perf_counter() - start))
+
+                return result
+
+            except LimitExceeded as e:
+                Error.custom(pos, f"Const expression exceeded the {e.limit} limit [{expr}]")
             except ArithmeticError:
                 Error.custom(pos, f"Arithmetic error in const expression [{expr}]")
             except IndexError:
@@ -62,6 +189,213 @@ class Expression:
 
         return []
 
+    def _execute(self, expr: str) -> list:
+        code = ExpressionCompiler.compile(expr)
+
+        # clean up after a failed expression
+        self.steps = 0
+        self.return_stack.clear()
+        del self.scopes[2:]
+
+        if not Expression.MEMOIZE:
+            return eval(code, self.globals)
+
+        if (entry := self._memo_lookup(expr)) is not None:
+            # repeat the assignments of the expression
+            for name, (kind, value) in entry[1].items():
+                if kind == "function":
+                    self._define(name, value[1], FunctionType(value[0], self.globals))
+                else:
+                    self.scopes[1][name] = value
+
+            return entry[2]
+
+        trace = MemoTrace(2)
+        self.traces = [trace]
+        try:
+            result = eval(code, self.globals)
+        finally:
+            self.traces = []
+
+        self._memo_store(expr, trace, result)
+
+        return result
+
+    def _step(self, steps: int = 1):
+        self.steps += steps
+        if self.steps > Expression.MAX_STEPS:
+            raise LimitExceeded("step")
+
+    @staticmethod
+    def check_size(value: Any) -> Any:
+        """
+        Check the size of a value created by a const expression.
+
+        Args:
+            value: The value.
+
+        Returns:
+            The value, raises LimitExceeded if it is too large.
+        """
+
+        if isinstance(value, int):
+            if value.bit_length() > Expression.MAX_SIZE:
+                raise LimitExceeded("size")
+
+        elif isinstance(value, str | list) and len(value) > Expression.MAX_SIZE:
+            raise LimitExceeded("size")
+
+        return value
+
+    @staticmethod
+    def check_result(value: list):
+        """
+        Check the total size of the result of a const expression, including nested lists.
+
+        Args:
+            value: The result.
+        """
+
+        size = 0
+        stack = [value]
+        while stack:
+            lst = stack.pop()
+            size += len(lst)
+            if size > Expression.MAX_SIZE:
+                raise LimitExceeded("size")
+
+            stack.extend(val for val in lst if isinstance(val, list))
+
+    @staticmethod
+    def _add(a: Any, b: Any) -> Any:
+        return Expression.check_size(a + b)
+
+    @staticmethod
+    def _mul(a: Any, b: Any) -> Any:
+        # check the size before creating the value
+        if isinstance(a, int) and isinstance(b, int):
+            if a.bit_length() + b.bit_length() > Expression.MAX_SIZE + 1:
+                raise LimitExceeded("size")
+
+        elif isinstance(a, str | list) and isinstance(b, int):
+            if len(a) * b > Expression.MAX_SIZE:
+                raise LimitExceeded("size")
+
+        elif isinstance(a, int) and isinstance(b, str | list):
+            if a * len(b) > Expression.MAX_SIZE:
+                raise LimitExceeded("size")
+
+        return a * b
+
+    @staticmethod
+    def _pow(a: Any, b: Any) -> Any:
+        if isinstance(a, int) and isinstance(b, int) and b > 0 and a not in (-1, 0, 1):
+            if (a.bit_length() - 1) * b > Expression.MAX_SIZE:
+                raise LimitExceeded("size")
+
+        return a ** b
+
+    @staticmethod
+    def _lshift(a: Any, b: Any) -> Any:
+        if isinstance(a, int) and isinstance(b, int) and a != 0 and a.bit_length() + b > Expression.MAX_SIZE:
+            raise LimitExceeded("size")
+
+        return a << b
+
+    @staticmethod
+    def _join(values: tuple[str, ...]) -> str:
+        return Expression.check_size("".join(values))
+
+    @staticmethod
+    def memo_key(value: Any, functions: bool = True, budget: list[int] | None = None) -> Any:
+        """
+        Create a hashable key of a value, equal only for values that behave the same.
+
+        Args:
+            value: The value.
+            functions: Whether const functions are allowed.
+            budget: Remaining number of list elements, shared by nested lists.
+
+        Returns:
+            The key, raises TypeError if the value can't be memoized.
+        """
+
+        if value is None or isinstance(value, bool | int | str | range):
+            return type(value), value
+
+        elif isinstance(value, float | complex):
+            # distinguishes -0.0 from 0.0
+            return type(value), repr(value)
+
+        elif isinstance(value, list):
+            if budget is None:
+                budget = [Expression.MEMO_VALUE_SIZE]
+
+            # lists can share elements, so their nested size can be much larger than the memory they use
+            budget[0] -= len(value)
+            if budget[0] < 0:
+                raise TypeError("Can't memoize a large list")
+
+            return list, tuple(Expression.memo_key(val, functions, budget) for val in value)
+
+        elif functions and (definition := getattr(value, "definition", None)) is not None:
+            return "function", definition
+
+        elif value is not Expression.BUILTINS["print"] and value in Expression.BUILTINS.values():
+            return "builtin", value
+
+        raise TypeError(f"Can't memoize {value}")
+
+    def _memo_lookup(self, key: Any) -> tuple[dict[str, Any], dict[str, tuple[str, Any]], Any] | None:
+        if (entries := Expression._memo.get(key)) is not None:
+            for entry in entries:
+                # check the variables the result depends on
+                for name, value in entry[0].items():
+                    try:
+                        if Expression.memo_key(self._get(name)) != value:
+                            break
+                    except (NameError, TypeError):
+                        break
+
+                else:
+                    with Expression._memo_lock:
+                        if key in Expression._memo:
+                            Expression._memo.move_to_end(key)
+                        Expression.memo_hits += 1
+                    return entry
+
+        with Expression._memo_lock:
+            Expression.memo_misses += 1
+        return None
+
+    @staticmethod
+    def _memo_store(key: Any, trace: MemoTrace, result: Any, budget: list[int] | None = None):
+        if not trace.storable:
+            return
+
+        try:
+            Expression.memo_key(result, False, budget)
+        except TypeError:
+            return
+
+        with Expression._memo_lock:
+            memo = Expression._memo
+            memo[key] = [(trace.reads, trace.writes, result)] + memo.get(key, [])[:Expression.MEMO_VARIANTS - 1]
+            memo.move_to_end(key)
+            while len(memo) > Expression.MEMO_SIZE:
+                memo.popitem(last=False)
+
+    @classmethod
+    def memo_clear(cls):
+        """
+        Remove all memoized results and reset the counters.
+        """
+
+        with cls._memo_lock:
+            cls._memo.clear()
+            cls.memo_hits = 0
+            cls.memo_misses = 0
+
     @staticmethod
     def coerce(op, a, b):
         try:
@@ -75,124 +409,290 @@ class Expression:
                 if isinstance(b, int):
                     return op(a, str(b))
 
-    def eval(self, node):
-        if node is None:
-            return None
+    def _get(self, name: str) -> Any:
+        scopes = self.scopes
+        for i in range(len(scopes) - 1, -1, -1):
+            if name in scopes[i]:
+                value = scopes[i][name]
+
+                # record the read in all memoized calls it is from outside of
+                traces = self.traces
+                j = len(traces) - 1
+                while j >= 0 and traces[j].depth > i:
+                    traces[j].read(name, value)
+                    j -= 1
+
+                return value
+
+        raise NameError(name)
+
+    def _assign(self, names: tuple[str | None, ...], value: Any):
+        for name in names:
+            if name is None:
+                raise RuntimeError("Eval error: invalid assignment target")
+
+            self.scope_set(name, value)
+            if self.traces and len(self.scopes) == 2:
+                self.traces[0].write(name, value)
+
+    def _define(self, name: str, params: tuple[str, ...], body: Callable[[], Any]):
+        definition = (body.__code__, params)
+
+        def func(*args):
+            if len(args) != len(params):
+                raise TypeError("Invalid argument count")
+
+            self._step()
+            if len(self.return_stack) >= Expression.MAX_DEPTH:
+                raise LimitExceeded("recursion")
+
+            key = None
+            if Expression.MEMOIZE:
+                # creating the keys of the arguments and the result is part of the call
+                budget = [Expression.MEMO_VALUE_SIZE]
+                try:
+                    key = (definition, tuple(Expression.memo_key(arg, True, budget) for arg in args))
+                except TypeError:
+                    self._step(Expression.MEMO_VALUE_SIZE - budget[0])
+                else:
+                    if (entry := self._memo_lookup(key)) is not None:
+                        self._step(Expression.MEMO_VALUE_SIZE - budget[0])
+                        return entry[2]
+
+            self.return_stack.append(None)
+
+            self.scope_push()
+            for param, arg in zip(params, args):
+                self.scope_set(param, arg)
+
+            if key is None:
+                body()
+            else:
+                trace = MemoTrace(len(self.scopes) - 1)
+                self.traces.append(trace)
+                try:
+                    body()
+                finally:
+                    self.traces.remove(trace)
+
+            self.scope_pop()
+
+            result = self.return_stack.pop(-1)
+            if key is not None:
+                self._memo_store(key, trace, result, budget)
+                self._step(Expression.MEMO_VALUE_SIZE - budget[0])
+
+            return result
+
+        # const functions with the same definition behave the same
+        func.definition = definition
+
+        self.scope_set(name, func)
+        if self.traces and len(self.scopes) == 2:
+            self.traces[0].write(name, func)
+
+    def _return(self, value: Any):
+        self.return_stack[-1] = value
+
+    def _list_comp(self, seq, name: str, elt: Callable[[Any], Any], ifs: tuple[Callable[[Any], Any], ...]) -> list:
+        self.scope_push()
+
+        lst = []
+        for elem in seq:
+            self._step()
+            self.scope_set(name, elem)
+
+            if not all(cond(elem) for cond in ifs):
+                continue
+
+            lst.append(elt(elem))
+
+        self.scope_pop()
+
+        return Expression.check_size(lst)
+
+    @staticmethod
+    def _getitem(val: Any) -> Callable:
+        # looked up before the index is evaluated
+        return val.__getitem__
+
+    @staticmethod
+    def _attribute(val: Any, attr: str) -> Callable:
+        if isinstance(val, str):
+            if attr == "join":
+                return lambda iterable: Expression.check_size(val.join(_list(iterable)))
+            elif attr == "replace":
+                return lambda *args: Expression.check_size(val.replace(*args))
+
+        raise RuntimeError(f"Eval error: attribute {attr}")
+
+    @staticmethod
+    def _invalid():
+        raise RuntimeError("Eval error: unsupported syntax")
+
+
+class ExpressionCompiler:
+    """
+    Compiles const expressions into Python code objects.
+
+    Only whitelisted syntax is compiled, names are resolved through the scopes of the executing `Expression`.
+    Anything else is compiled into a call raising an error when it is evaluated.
+    """
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def compile(expr: str) -> CodeType:
+        """
+        Compile a const expression.
+
+        Args:
+            expr: The const expression.
+
+        Returns:
+            Code evaluating to a list of values of all statements of the expression, cached by expression text.
+        """
+
+        body = [ExpressionCompiler._statement(stmt) for stmt in ast.parse(expr, mode="exec").body]
+        tree = ast.Expression(ast.List(body, ast.Load()))
+        return compile(ast.fix_missing_locations(tree), "<const expression>", "eval")
+
+    @staticmethod
+    def _call(name: str, *args: ast.expr) -> ast.Call:
+        return ast.Call(ast.Name(name, ast.Load()), list(args), [])
+
+    @staticmethod
+    def _lambda(params: list[str], body: ast.expr) -> ast.Lambda:
+        return ast.Lambda(ast.arguments([], [ast.arg(f"_v_{param}") for param in params], None, [], [], None, []), body)
+
+    @staticmethod
+    def _statement(node: ast.stmt) -> ast.expr:
+        """
+        Compile a statement into an expression evaluating to the value of the statement.
+        """
+
+        call = ExpressionCompiler._call
+        expr = ExpressionCompiler._expr
+
+        if isinstance(node, ast.Expr):
+            return expr(node.value)
+
+        elif isinstance(node, ast.Assign):
+            names = [ast.Constant(target.id if isinstance(target, ast.Name) else None) for target in node.targets]
+            return call("_assign", ast.Tuple(names, ast.Load()), expr(node.value))
+
+        elif isinstance(node, ast.FunctionDef):
+            args = node.args
+            if args.posonlyargs or args.kwonlyargs or args.kw_defaults or args.defaults:
+                return call("_invalid")
+
+            params = ast.Tuple([ast.Constant(arg.arg) for arg in args.args], ast.Load())
+            body = ast.List([ExpressionCompiler._statement(stmt) for stmt in node.body], ast.Load())
+            return call("_define", ast.Constant(node.name), params, ExpressionCompiler._lambda([], body))
+
+        elif isinstance(node, ast.Return):
+            return call("_return", ast.Constant(None) if node.value is None else expr(node.value))
+
+        return call("_invalid")
+
+    @staticmethod
+    def _expr(node: ast.expr, local_names: frozenset[str] = frozenset()) -> ast.expr:
+        """
+        Compile an expression.
+
+        Args:
+            node: The expression.
+            local_names: Variables of the enclosing list comprehensions.
+        """
+
+        call = ExpressionCompiler._call
 
-        if isinstance(node, list):
-            return list(map(self.eval, node))
+        def expr(n: ast.expr) -> ast.expr:
+            return ExpressionCompiler._expr(n, local_names)
+
+        if isinstance(node, ast.Constant):
+            return ast.Constant(node.value)
 
-        if isinstance(node, ast.Num):
-            return node.n
-        elif isinstance(node, ast.Str):
-            return node.s
         elif isinstance(node, ast.JoinedStr):
-            return "".join([str(self.eval(val)) for val in node.values])
-        elif isinstance(node, ast.FormattedValue):
-            assert node.format_spec is None
-            assert node.conversion == -1
-            return self.eval(node.value)
-        elif isinstance(node, ast.Constant):
-            return node.value
+            values = []
+            for val in node.values:
+                if isinstance(val, ast.FormattedValue):
+                    if val.format_spec is not None or val.conversion != -1:
+                        values.append(call("_invalid"))
+                    else:
+                        values.append(call("_str", expr(val.value)))
+
+                else:
+                    values.append(call("_str", expr(val)))
+
+            return call("_join", ast.Tuple(values, ast.Load()))
+
         elif isinstance(node, ast.Compare):
-            all_true = True
+            # every comparison is against the left operand, evaluated again each time
+            comparisons = []
             for op, cmp in zip(node.ops, node.comparators):
-                if (op_ := self.OPERATORS.get(type(op))) is None:
-                    raise RuntimeError(f"Eval error {node}")
-                all_true = all_true and self.coerce(op_, self.eval(node.left), self.eval(cmp))
-            return all_true
+                if type(op) not in Expression.OPERATORS:
+                    comparisons.append(call("_invalid"))
+                else:
+                    comparisons.append(call("_coerce", ast.Name(f"_op_{type(op).__name__}", ast.Load()),
+                                            expr(node.left), expr(cmp)))
+
+            return comparisons[0] if len(comparisons) == 1 else ast.BoolOp(ast.And(), comparisons)
+
         elif isinstance(node, ast.BinOp):
-            if (op := self.OPERATORS.get(type(node.op))) is None:
-                raise RuntimeError(f"Eval error {node}")
-            return self.coerce(op, self.eval(node.left), self.eval(node.right))
+            if type(node.op) not in Expression.OPERATORS:
+                return call("_invalid")
+
+            return call("_coerce", ast.Name(f"_op_{type(node.op).__name__}", ast.Load()),
+                        expr(node.left), expr(node.right))
+
         elif isinstance(node, ast.UnaryOp):
-            if (op := self.OPERATORS.get(type(node.op))) is None:
-                raise RuntimeError(f"Eval error {node}")
-            return op(self.eval(node.operand))
-        elif isinstance(node, ast.Assign):
-            value = self.eval(node.value)
-            for target in node.targets:
-                if isinstance(target, ast.Name):
-                    self.scope_set(target.id, value)
-                else:
-                    raise RuntimeError(f"Eval error {node}")
-            return None
+            if type(node.op) not in Expression.OPERATORS:
+                return call("_invalid")
+
+            return call(f"_op_{type(node.op).__name__}", expr(node.operand))
+
         elif isinstance(node, ast.Name):
-            return self.scope_get(node.id)
-        elif isinstance(node, ast.Expr):
-            return self.eval(node.value)
-        elif isinstance(node, ast.IfExp):
-            if self.eval(node.test):
-                return self.eval(node.body)
-            else:
-                return self.eval(node.orelse)
-        elif isinstance(node, ast.ListComp):
-            if len(node.generators) != 1:
-                raise RuntimeError(f"Eval error {node}")
+            if node.id in local_names:
+                return ast.Name(f"_v_{node.id}", ast.Load())
 
-            comp = node.generators[0]
-            assert isinstance(comp, ast.comprehension)
-            name = comp.target
-            assert isinstance(name, ast.Name)
-            name = name.id
-            seq = self.eval(comp.iter)
+            return call("_get", ast.Constant(node.id))
 
-            self.scope_push()
+        elif isinstance(node, ast.IfExp):
+            return ast.IfExp(expr(node.test), expr(node.body), expr(node.orelse))
 
-            lst = []
-            for elem in seq:
-                self.scope_set(name, elem)
+        elif isinstance(node, ast.ListComp):
+            if len(node.generators) != 1 or not isinstance(node.generators[0].target, ast.Name):
+                return call("_invalid")
 
-                if not all(self.eval(cond) for cond in comp.ifs):
-                    continue
+            comp = node.generators[0]
+            name = comp.target.id
+            inner_names = local_names | {name}
 
-                lst.append(self.eval(node.elt))
+            def inner(n: ast.expr) -> ast.Lambda:
+                return ExpressionCompiler._lambda([name], ExpressionCompiler._expr(n, inner_names))
 
-            self.scope_pop()
+            return call("_list_comp", expr(comp.iter), ast.Constant(name), inner(node.elt),
+                        ast.Tuple([inner(cond) for cond in comp.ifs], ast.Load()))
 
-            return lst
         elif isinstance(node, ast.Call):
-            assert len(node.keywords) == 0
-            func = self.eval(node.func)
-            return func(*[self.eval(val) for val in node.args])
-        elif isinstance(node, ast.List):
-            return [self.eval(val) for val in node.elts]
-        elif isinstance(node, ast.Subscript):
-            return self.eval(node.value).__getitem__(self.eval(node.slice))
-        elif isinstance(node, ast.Slice):
-            return slice(self.eval(node.lower), self.eval(node.upper), self.eval(node.step))
-        elif isinstance(node, ast.Attribute):
-            val = self.eval(node.value)
-            if isinstance(val, str):
-                if node.attr == "join":
-                    return val.join
-                elif node.attr == "replace":
-                    return val.replace
-            raise RuntimeError(f"Eval error {node}")
-        elif isinstance(node, ast.FunctionDef):
-            assert len(node.args.posonlyargs) == 0
-            assert len(node.args.kwonlyargs) == 0
-            assert len(node.args.kw_defaults) == 0
-            assert len(node.args.defaults) == 0
-
-            def func(*args):
-                if len(args) != len(node.args.args):
-                    raise TypeError("Invalid argument count")
+            if node.keywords:
+                return call("_invalid")
 
-                self.return_stack.append(None)
+            return ast.Call(expr(node.func), [expr(arg) for arg in node.args], [])
 
-                self.scope_push()
-                for i, arg in enumerate(node.args.args):
-                    self.scope_set(arg.arg, args[i])
+        elif isinstance(node, ast.List):
+            return ast.List([expr(val) for val in node.elts], ast.Load())
 
-                self.eval(node.body)
+        elif isinstance(node, ast.Subscript):
+            if isinstance(node.slice, ast.Slice):
+                slice_ = call("_slice", *(ast.Constant(None) if n is None else expr(n)
+                                          for n in (node.slice.lower, node.slice.upper, node.slice.step)))
+            else:
+                slice_ = expr(node.slice)
 
-                self.scope_pop()
+            return ast.Call(call("_getitem", expr(node.value)), [slice_], [])
 
-                return self.return_stack.pop(-1)
+        elif isinstance(node, ast.Attribute):
+            return call("_attribute", expr(node.value), ast.Constant(node.attr))
 
-            self.scope_set(node.name, func)
-        elif isinstance(node, ast.Return):
-            self.return_stack[-1] = self.eval(node.value)
-        else:
-            raise RuntimeError(f"Eval error {node}")
+        return call("_invalid")
@@ -1,29 +1,32 @@
 from .instruction import Instruction
+from .context import CompilationContext
 
 
 class Gen:
-    _instructions: list[Instruction] = []
-    _tmp_index = 0
-
     def __init__(self):
         raise TypeError(f"{self.__module__}.{self.__class__.__name__} cannot be constructed")
 
     @classmethod
     def reset(cls):
-        cls._instructions = []
+        ctx = CompilationContext.current()
+        ctx.instructions = []
+        ctx.tmp_index = 0
+        ctx.subroutines = []
 
     @classmethod
     def emit(cls, *ins: Instruction):
-        cls._instructions += ins
+        CompilationContext.current().instructions += ins
 
     @classmethod
     def get(cls) -> list[Instruction]:
-        return cls._instructions
+        return CompilationContext.current().instructions
 
     @classmethod
-    def tmp(cls) -> str:
-        cls._tmp_index += 1
-        return f"__tmp{cls._tmp_index}"
-
+    def subroutines(cls) -> list[list[Instruction]]:
+        return CompilationContext.current().subroutines
 
-Gen.reset()
+    @classmethod
+    def tmp(cls) -> str:
+        ctx = CompilationContext.current()
+        ctx.tmp_index += 1
+        return f"__tmp{ctx.tmp_index}"
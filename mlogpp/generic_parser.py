@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 
-from .tokens import Token, TokenType
+from .tokens import Token, TokenType, TokenTable
 from .error import Error
 from .expression import Expression
 from .util import Position
@@ -12,7 +12,7 @@ class GenericParser(ABC):
     Parses tokens into an AST.
     """
 
-    tokens: list[Token]
+    tokens: TokenTable
     pos: int
 
     function_stack: list[str]
@@ -25,7 +25,7 @@ class GenericParser(ABC):
 
     expression_executor: Expression
 
-    def parse(self, tokens: list[Token]):
+    def parse(self, tokens: TokenTable | list[Token]):
         """
         Parse tokens into an AST.
 
@@ -36,7 +36,7 @@ class GenericParser(ABC):
             The parsed AST.
         """
 
-        self.tokens = tokens
+        self.tokens = tokens if isinstance(tokens, TokenTable) else TokenTable.from_tokens(tokens)
         self.pos = -1
 
         self.function_stack = []
@@ -50,8 +50,7 @@ class GenericParser(ABC):
 
         self._init()
 
-        while self._preprocess_tokens():
-            pass
+        self._preprocess_tokens()
 
         return self.parse_CodeBlock(False)
 
@@ -63,97 +62,161 @@ class GenericParser(ABC):
         pass
 
     @staticmethod
-    def _val_into_tokens(pos: Position, val) -> tuple[list[Token], int]:
+    def _val_into_tokens(pos: Position, val) -> tuple[TokenTable, int]:
         if isinstance(val, str):
-            tokens = Lexer("").lex(val, pos.file, pos)
-            for tok in tokens:
-                tok.pos.code = pos.code
-            return tokens, 0
+            return Lexer.create("").lex_table(val, pos.file, pos), 0
+
+        tokens = TokenTable()
 
-        elif isinstance(val, int | float):
-            return [Token(TokenType.NUMBER, str(val), pos)], 0
+        if isinstance(val, int | float):
+            tokens.append(TokenType.NUMBER, str(val), pos)
+            return tokens, 0
 
         elif isinstance(val, bool):
-            return [Token(TokenType.NUMBER, str(int(val)), pos)], 0
+            tokens.append(TokenType.NUMBER, str(int(val)), pos)
+            return tokens, 0
 
         elif isinstance(val, list):
-            tokens = []
             for v in val:
                 t, r = GenericParser._val_into_tokens(pos, v)
                 if r != 0:
-                    return [], r
-                tokens += t
+                    return TokenTable(), r
+                tokens.extend(t)
             return tokens, 0
 
         elif val is None:
-            return [], 0
+            return tokens, 0
 
         else:
-            return [], -1
+            return tokens, -1
+
+    @staticmethod
+    def _take_token(stack: list[list]) -> tuple[TokenTable, int] | None:
+        """
+        Take the next token from a stack of scanned tables.
+
+        Args:
+            stack: The scanned tables and indices of their next tokens, the innermost is last.
+
+        Returns:
+            The table and index of the token, None if there are no tokens left.
+        """
+
+        while stack:
+            frame = stack[-1]
+            table, i = frame
+            if i < len(table.kinds):
+                frame[1] = i + 1
+                return table, i
+
+            stack.pop()
+
+        return None
 
     def _preprocess_tokens(self) -> bool:
+        """
+        Expand all const expressions in a single pass.
+
+        Results of const expressions are scanned for const expressions again, before the following tokens.
+
+        Returns:
+            True if any const expression was expanded.
+        """
+
         if not self.const_expressions:
             return False
 
-        for i, tok in enumerate(self.tokens):
-            if tok.type not in TokenType.DOLLAR:
+        tokens = self.tokens
+        dollar = TokenTable.kind(TokenType.DOLLAR)
+        if dollar not in tokens.kinds:
+            return False
+
+        # shares ids with `tokens`, so that tokens without const expressions can be copied directly
+        output = tokens.copy(0)
+        stack = [[tokens, 0]]
+        take = GenericParser._take_token
+
+        # number of const expressions created by other const expressions
+        nested = 0
+
+        while stack:
+            table, start = stack[-1]
+
+            # copy tokens up to the next const expression
+            try:
+                i = table.kinds.index(dollar, start)
+            except ValueError:
+                i = len(table.kinds)
+
+            if table is tokens:
+                output.extend_shared(tokens, start, i)
+            elif i > start:
+                output.extend(table.slice(start, i))
+
+            if i == len(table.kinds):
+                stack.pop()
                 continue
 
+            # skip the "$" and the "{"
+            stack[-1][1] = i + 1
+            take(stack)
+            end_table, end = table, i
+
             expr = []
 
-            end = tok
-            j = i + 2
             line = -1
             depth = 1
-            newlines = 0
-            while j < len(self.tokens):
-                t = self.tokens[j]
+            while (token := take(stack)) is not None:
+                tok_table, j = token
 
-                if t.pos.line != line:
-                    line = t.pos.line
+                if tok_table.lines[j] != line:
+                    line = tok_table.lines[j]
                     expr.append("\n")
-                    newlines += 1
 
-                if t.type == TokenType.RBRACE:
+                if tok_table.matches(j, TokenType.RBRACE):
                     depth -= 1
                     if depth == 0:
-                        end = t
+                        end_table, end = token
                         break
 
-                    expr.append(t.value)
-                elif t.type == TokenType.LBRACE:
+                    expr.append(tok_table.value(j))
+                elif tok_table.matches(j, TokenType.LBRACE):
                     depth += 1
-                    expr.append(t.value)
-                elif t.type in Expression.TOKENS:
-                    if t.type == TokenType.SET and t.value != "=":
-                        Error.unexpected_token(t)
+                    expr.append(tok_table.value(j))
+                elif tok_table.matches(j, Expression.TOKENS):
+                    if tok_table.matches(j, TokenType.SET) and tok_table.value(j) != "=":
+                        Error.unexpected_token(tok_table[j])
 
-                    expr.append(t.value)
+                    expr.append(tok_table.value(j))
                 else:
-                    Error.unexpected_token(tok)
-                j += 1
-
-            tok.pos += end.pos
+                    Error.unexpected_token(table[i])
 
-            for _ in range(len(expr) - newlines + 3):
-                self.tokens.pop(i)
+            pos = table.pos(i) + end_table.pos(end)
 
             expr = "\n".join(ln.strip() for ln in " ".join(expr).splitlines())
 
-            val = self.expression_executor.execute(tok.pos, expr)
+            if table is not tokens:
+                nested += 1
+                if len(stack) > Expression.MAX_DEPTH:
+                    Error.custom(pos, f"Const expression exceeded the recursion limit [{expr}]")
+                elif nested > Expression.MAX_EXPANSIONS:
+                    Error.custom(pos, f"Const expression exceeded the expansion limit [{expr}]")
 
-            tokens, err = GenericParser._val_into_tokens(tok.pos, val)
+            val = self.expression_executor.execute(pos, expr)
 
-            if err == -1 or err == 1:
-                Error.custom(tok.pos, f"Invalid const expression [{expr}]")
+            result, err = GenericParser._val_into_tokens(pos, val)
 
-            self.tokens[i:i] = tokens
+            if err == -1 or err == 1:
+                Error.custom(pos, f"Invalid const expression [{expr}]")
 
-            self._init()
+            # the result may contain const expressions too
+            if len(result.kinds) > 0:
+                stack.append([result, 0])
 
-            return True
+        self.tokens = output
+        self._init()
 
-        return False
+        return True
 
     def loop_name(self) -> str:
         """
@@ -177,7 +240,7 @@ class GenericParser(ABC):
             True if `n` tokens are available, otherwise False.
         """
 
-        return self.pos < len(self.tokens) - n
+        return self.pos < len(self.tokens.kinds) - n
 
     def current_token(self) -> Token:
         """
@@ -215,22 +278,11 @@ class GenericParser(ABC):
         if self.has_token():
             self.pos += 1
 
-            tok = self.current_token()
-
-            # check if the token is of the correct type
-            if type_ is not None and tok.type not in type_:
-                Error.unexpected_token(tok)
+            # check if the token has the correct type and value
+            if not self.tokens.matches(self.pos, type_, value):
+                Error.unexpected_token(self.current_token())
 
-            # check if the token has the correct value
-            if value is not None:
-                if isinstance(value, str):
-                    if tok.value != value:
-                        Error.unexpected_token(tok)
-                else:
-                    if tok.value not in value:
-                        Error.unexpected_token(tok)
-
-            return tok
+            return self.current_token()
 
         Error.unexpected_token(self.tokens[self.pos - 1])
 
@@ -247,23 +299,25 @@ class GenericParser(ABC):
             True if the token matches, False otherwise.
         """
 
+        i = self.pos + n
+        tokens = self.tokens
+
         # check if there is `n` tokens available
-        if self.has_token(n):
-            tok = self.tokens[self.pos + n]
+        if i >= len(tokens.kinds):
+            return False
 
-            # check if the token has the correct value
-            if value is not None:
-                if isinstance(value, str):
-                    if tok.value != value:
-                        return False
-                else:
-                    if tok.value not in value:
-                        return False
+        # check if the token has the correct type
+        if not (1 << tokens.kinds[i]) & type_._value_:
+            return False
+
+        # check if the token has the correct value
+        if value is not None:
+            if isinstance(value, str):
+                return tokens.strings[tokens.values[i]] == value
 
-            # check if the token has the correct type
-            return tok.type in type_
+            return tokens.strings[tokens.values[i]] in value
 
-        return False
+        return True
 
     def lookahead_line(self, n: int = 1) -> int:
         """
@@ -277,6 +331,6 @@ class GenericParser(ABC):
         """
 
         if self.has_token(n):
-            return self.tokens[self.pos + n].pos.line
+            return self.tokens.line(self.pos + n)
 
         return -1
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .context import CompilationContext
+from .generator import Gen
+from .instruction import Instruction, Label
+from .scope import Scope
+from .util import Position
+
+
+@dataclass
+class CallSite:
+    """
+    Call of a function recorded while generating code.
+    """
+
+    node: Any
+    pos: Position
+    function: str
+    # body of the function, its size is known after its first call
+    body: Any
+    # number of loops around the call
+    depth: int
+    # number of constant arguments, which can be folded into an inlined body
+    constants: int
+    # number of times the call was generated, calls in inlined functions are generated by every call of the function
+    copies: int
+    inline: bool
+
+    def executions(self) -> int:
+        """
+        Estimate how many times the call is executed in one iteration of the code.
+        """
+
+        return self.copies * Inliner.LOOP_ITERATIONS ** self.depth
+
+    def saved(self) -> int:
+        """
+        Estimate how many instructions executed in one iteration of the code are saved by inlining the call.
+        """
+
+        return self.executions() * (Inliner.CALL_COST + self.constants)
+
+    def size_saved(self) -> int:
+        """
+        Estimate how many instructions are saved by calling the function instead of inlining it,
+        without the body of the subroutine.
+        """
+
+        return self.copies * (self.body.size - Inliner.CALL_SIZE)
+
+
+class Inliner:
+    """
+    Decides which calls of functions are inlined and which call the function as a subroutine.
+
+    Functions are inlined, unless the code doesn't fit the budget. Then the code is generated again with the calls
+    which slow it down the least for the instructions they save called as subroutines,
+    estimated from the size of the bodies, the number of calls, the loops around them and their constant arguments.
+    """
+
+    # assumed number of iterations of a loop
+    LOOP_ITERATIONS: int = 10
+    # instructions executed by a call of a subroutine: storing the return address, the jump and the return
+    CALL_COST: int = 3
+    # instructions of a call of a subroutine
+    CALL_SIZE: int = 2
+    # maximum number of times the code is generated
+    PASSES: int = 3
+
+    @classmethod
+    def generate(cls, generate: Callable[[], list[Instruction]]) -> list[Instruction]:
+        """
+        Generate code which fits the budget of the active context.
+        The call sites of the generated code are kept in the context.
+
+        Args:
+            generate: Generates and optimizes the code in the active context.
+
+        Returns:
+            The generated code.
+        """
+
+        ctx = CompilationContext.current()
+        ctx.inline = {}
+
+        for i in range(cls.PASSES):
+            ctx.call_sites = {}
+            code = generate()
+
+            if i == cls.PASSES - 1 or not cls._plan(code):
+                break
+
+        return code
+
+    @staticmethod
+    def call(node, body, params: list) -> CallSite:
+        """
+        Record a call of a function and decide whether it is inlined.
+
+        Args:
+            node: The call.
+            body: Body of the function.
+            params: Values of the arguments.
+
+        Returns:
+            The call site, `inline` is the decision, which the function can change when it can't be called.
+        """
+
+        ctx = CompilationContext.current()
+        if (site := ctx.call_sites.get(node)) is None:
+            site = ctx.call_sites[node] = CallSite(node, node.get_pos(), body.name, body, len(ctx.loops),
+                                                   sum(param.const() for param in params), 0,
+                                                   ctx.inline.get(node, True))
+
+        site.copies += 1
+        return site
+
+    @classmethod
+    def _plan(cls, code: list[Instruction]) -> bool:
+        """
+        Choose call sites to be called as subroutines if the code doesn't fit the budget.
+
+        Returns:
+            True if the code has to be generated again.
+        """
+
+        ctx = CompilationContext.current()
+
+        budget = ctx.inline_budget
+        size = len(Scope.get_config()) + sum(not isinstance(ins, Label) for ins in code)
+        if budget is None or size <= budget:
+            return False
+
+        # the sizes of bodies are counted before optimizing the code
+        generated = len(Gen.get()) + sum(map(len, Gen.subroutines()))
+        excess = (size - budget) * generated / size
+
+        functions: dict[int, list[CallSite]] = {}
+        for site in ctx.call_sites.values():
+            functions.setdefault(id(site.body), []).append(site)
+
+        for sites in functions.values():
+            sites.sort(key=lambda site_: site_.saved() / max(site_.size_saved(), 1))
+
+        changed = False
+        while excess > 0:
+            best = None
+            for sites in functions.values():
+                called = any(not site.inline for site in sites)
+                # a subroutine costs its body and the return, the sites which can't be called are forced inline
+                saved, cost, chosen = 0 if called else -sites[0].body.size - 1, 0, []
+                for site in sites:
+                    if site.inline and site.node not in ctx.inline:
+                        chosen.append(site)
+                        saved += site.size_saved()
+                        cost += site.saved()
+                        if saved > 0:
+                            break
+
+                if saved > 0 and (best is None or cost / saved < best[0]):
+                    best = cost / saved, saved, chosen
+
+            if best is None:
+                break
+
+            _, saved, chosen = best
+            for site in chosen:
+                site.inline = False
+                ctx.inline[site.node] = False
+
+            excess -= saved
+            changed = True
+
+        return changed
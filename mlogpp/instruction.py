@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import typing
+
 from .error import InternalError
 
 
 class BaseInstruction:
+    __slots__ = ("name", "params", "inputs", "outputs", "side_effects")
+
     name: str
     params: list[str]
-    inputs: list[int]
-    outputs: list[int]
+    # indices of the input and output parameters, shared by all instructions of the same kind
+    inputs: tuple[int, ...]
+    outputs: tuple[int, ...]
     side_effects: bool
 
     Param: type = None
@@ -15,34 +20,81 @@ class BaseInstruction:
     NativeMultiInsTypeImpl: type = None
     Builtins: dict[str, NativeInsTypeImpl | NativeMultiInsTypeImpl] = None
     Value: type = None
+    # names of the instructions with subcommands depending on the targeted game version
+    ContentDependent: frozenset[str] = frozenset()
+
+    # name, or name and content for `ContentDependent` instructions
+    # -> function returning the subcommand of the parameters or None, subcommand or None -> (inputs, outputs)
+    _operands: dict[str | tuple, tuple[typing.Callable[[list[str]], str] | None,
+                               dict[str | None, tuple[tuple[int, ...], tuple[int, ...]]]]] = {}
 
     def __init__(self, name: str, params: tuple, side_effects: bool):
         self.name = name
         self.params = [param.get() if isinstance(param, BaseInstruction.Value) else str(param) for param in params]
 
-        val = BaseInstruction.Builtins[name]
+        key = name
+        if name in BaseInstruction.ContentDependent:
+            from .content import Content
 
-        impl = val.impl()
-        if isinstance(impl, BaseInstruction.NativeMultiInsTypeImpl):
-            val = impl.instructions[impl.subname_function(self.params)]
+            key = (name, Content.get())
 
-        impl = val.impl()
-        if isinstance(impl, BaseInstruction.NativeInsTypeImpl):
-            self.inputs = [i for i, [param, _] in enumerate(impl.params) if param == BaseInstruction.Param.INPUT]
-            self.outputs = [i for i, [param, _] in enumerate(impl.params)
-                            if param in (BaseInstruction.Param.OUTPUT, BaseInstruction.Param.OUTPUT_P)]
+        if (operands := BaseInstruction._operands.get(key)) is None:
+            operands = BaseInstruction._operands[key] = BaseInstruction._create_operands(name)
 
-        else:
-            raise TypeError("Invalid function type")
+        subname_function, roles = operands
+        self.inputs, self.outputs = roles[None if subname_function is None else subname_function(self.params)]
 
         self.side_effects = side_effects
 
         for i in self.outputs:
             assert self.params[i] != "@counter", "@counter should not be written"
 
+    @staticmethod
+    def _create_operands(name: str) -> tuple[typing.Callable[[list[str]], str] | None,
+                                             dict[str | None, tuple[tuple[int, ...], tuple[int, ...]]]]:
+        """
+        Find the input and output parameters of an instruction and all its subcommands.
+        """
+
+        def roles(val) -> tuple[tuple[int, ...], tuple[int, ...]]:
+            impl = val.impl()
+            if not isinstance(impl, BaseInstruction.NativeInsTypeImpl):
+                raise TypeError("Invalid function type")
+
+            return (tuple(i for i, [param, _] in enumerate(impl.params) if param == BaseInstruction.Param.INPUT),
+                    tuple(i for i, [param, _] in enumerate(impl.params)
+                          if param in (BaseInstruction.Param.OUTPUT, BaseInstruction.Param.OUTPUT_P)))
+
+        val = BaseInstruction.Builtins[name]
+
+        impl = val.impl()
+        if isinstance(impl, BaseInstruction.NativeMultiInsTypeImpl):
+            return impl.subname_function, {subname: roles(v) for subname, v in impl.instructions.items()}
+
+        return None, {None: roles(val)}
+
     def __str__(self):
         return f"{self.name} {' '.join(map(str, self.params))}"
 
+    def copy(self, params: list[str]) -> BaseInstruction:
+        """
+        Copy the instruction with different parameters of the same kind, without looking up its operands.
+
+        Args:
+            params: Parameters of the copy.
+
+        Returns:
+            The copy.
+        """
+
+        ins = object.__new__(type(self))
+        ins.name = self.name
+        ins.params = params
+        ins.inputs = self.inputs
+        ins.outputs = self.outputs
+        ins.side_effects = self.side_effects
+        return ins
+
     def __eq__(self, other):
         if isinstance(other, BaseInstruction):
             return self.name == other.name and self.params == other.params
@@ -64,12 +116,15 @@ class BaseInstruction:
             return n_params
 
         return type[Instruction](f"Instruction{name[0].upper()}{name[1:]}", (BaseInstruction,), {
+            "__slots__": (),
             "__init__": __init__,
             "num_params": num_params,
         })
 
 
 class Instruction(BaseInstruction):
+    __slots__ = ()
+
     name: str
     params: list[str]
     inputs: list[int]
@@ -118,6 +173,8 @@ InstructionSetBlock = Instruction.create("setblock", 6, True)
 InstructionSpawn = Instruction.create("spawn", 6, True)
 
 class InstructionStatus(Instruction, BaseInstruction):
+    __slots__ = ()
+
     name: str
     params: list[str]
     inputs: list[int]
@@ -158,6 +215,8 @@ InstructionNoop = Instruction.create("noop", 0, False)
 
 
 class Label(Instruction):
+    __slots__ = ()
+
     name: str
 
     def __init__(self, name: str):
@@ -168,6 +227,56 @@ class Label(Instruction):
     def __str__(self):
         return f"{self.name}:"
 
+    def copy(self, params: list[str]) -> Label:
+        ins = super().copy(params)
+        ins.name = params[0]
+        return ins
+
+
+class InstructionSetAddress(Instruction):
+    """
+    Store the address of a label in a variable, the label is resolved by the linker.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, variable: str, label: str):
+        self.name = "set"
+        self.params = [variable, label]
+        self.inputs = ()
+        self.outputs = (0,)
+        self.side_effects = True
+
+
+class InstructionCall(Instruction):
+    """
+    Jump to the entry label of a subroutine.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, label: str):
+        self.name = "jump"
+        self.params = [label, "always", "0", "0"]
+        self.inputs = ()
+        self.outputs = ()
+        self.side_effects = True
+
+
+class InstructionReturn(Instruction):
+    """
+    Return from a subroutine to the address stored in a variable.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, variable: str):
+        self.name = "set"
+        self.params = ["@counter", variable]
+        self.inputs = (1,)
+        self.outputs = ()
+        self.side_effects = True
+
 
 INSTRUCTIONS: dict[str, type[Instruction]] = {
     "read": InstructionRead,
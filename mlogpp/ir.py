@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import typing
+
+from .instruction import Instruction, InstructionSet, InstructionNoop, InstructionJump, InstructionOp, \
+    InstructionPrint, Label
+from .operations import Operations
+
+
+# opcodes of the instructions the optimizer distinguishes, all other instructions are OTHER
+OTHER, LABEL, JUMP, SET, OP, PRINT, NOOP, PHI = range(8)
+
+OPCODES: dict[type[Instruction], int] = {
+    Label: LABEL,
+    InstructionJump: JUMP,
+    InstructionSet: SET,
+    InstructionOp: OP,
+    InstructionPrint: PRINT,
+    InstructionNoop: NOOP
+}
+
+# symbols with the same id in every table
+_WELL_KNOWN: list[str] = ["0", "1", "true", "false", "always", "equal", "notEqual", "sub", "mul", "div", "idiv",
+                          "and", "add", "or", "xor", "shr", "shl"]
+ZERO, ONE, TRUE, FALSE, ALWAYS, EQUAL, NOT_EQUAL, SUB, MUL, DIV, IDIV, AND, ADD, OR, XOR, SHR, SHL = \
+    range(len(_WELL_KNOWN))
+
+_WELL_KNOWN += [name for name in Operations.PRECALC if name not in _WELL_KNOWN]
+_WELL_KNOWN += [name for name in ("greaterThan", "lessThan", "greaterThanEq", "lessThanEq")
+                if name not in _WELL_KNOWN]
+
+
+def parse_num(value: str) -> int | float | None:
+    """
+    Parse a numeric literal.
+
+    Args:
+        value: The literal.
+
+    Returns:
+        The number, an int if it is integer, None if the value is not a number.
+    """
+
+    try:
+        val = float(value)
+        if val.is_integer():
+            val = int(val)
+        return val
+
+    except ValueError:
+        return None
+
+
+class Symbols:
+    """
+    Operands of the instructions of one compilation.
+
+    Every distinct operand has an id, numeric literals are parsed once.
+    """
+
+    BASE_IDS: dict[str, int] = {name: i for i, name in enumerate(_WELL_KNOWN)}
+    BASE_NUMBERS: list[int | float | None] = [parse_num(name) for name in _WELL_KNOWN]
+
+    # id -> name
+    names: list[str]
+    # name -> id
+    ids: dict[str, int]
+    # id -> parsed number, None if the operand isn't a number
+    numbers: list[int | float | None]
+    # (id, version) -> id of the SSA version of a variable
+    _versions: dict[tuple[int, int], int]
+
+    def __init__(self):
+        self.names = _WELL_KNOWN.copy()
+        self.ids = Symbols.BASE_IDS.copy()
+        self.numbers = Symbols.BASE_NUMBERS.copy()
+        self._versions = {}
+
+    def intern(self, name: str) -> int:
+        """
+        Get the id of an operand.
+
+        Args:
+            name: The operand.
+
+        Returns:
+            The id, the same for equal operands.
+        """
+
+        if (id_ := self.ids.get(name)) is None:
+            id_ = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.numbers.append(parse_num(name))
+
+        return id_
+
+    def version(self, id_: int, version: int) -> int:
+        """
+        Get the id of an SSA version of a variable, `name:version`.
+
+        Args:
+            id_: Id of the variable.
+            version: The version.
+
+        Returns:
+            The id of the version.
+        """
+
+        if (versioned := self._versions.get((id_, version))) is None:
+            versioned = self._versions[(id_, version)] = self.intern(f"{self.names[id_]}:{version}")
+
+        return versioned
+
+
+class IRInstruction:
+    """
+    Instruction of the optimizer, with an opcode and operand ids instead of strings.
+    """
+
+    __slots__ = ("op", "args", "inputs", "outputs", "side_effects", "source")
+
+    op: int
+    args: list[int]
+    inputs: tuple[int, ...]
+    outputs: tuple[int, ...]
+    side_effects: bool
+    # converted instruction, None for instructions created by the optimizer
+    source: Instruction | None
+
+    def __init__(self, op: int, args: list[int], inputs: tuple[int, ...], outputs: tuple[int, ...],
+                 side_effects: bool, source: Instruction | None = None):
+        self.op = op
+        self.args = args
+        self.inputs = inputs
+        self.outputs = outputs
+        self.side_effects = side_effects
+        self.source = source
+
+    _SET_ROLES: typing.ClassVar[tuple[tuple[int, ...], tuple[int, ...]] | None] = None
+
+    @classmethod
+    def set(cls, dst: int, src: int) -> IRInstruction:
+        """
+        Create a `set` instruction.
+        """
+
+        if (roles := cls._SET_ROLES) is None:
+            ins = InstructionSet("", "")
+            roles = IRInstruction._SET_ROLES = ins.inputs, ins.outputs
+
+        return cls(SET, [dst, src], *roles, False)
+
+
+# instructions are replaced by this one and removed later
+IR_NOOP = IRInstruction(NOOP, [], (), (), False)
+
+
+def to_ir(code: list[Instruction], symbols: Symbols) -> list[IRInstruction]:
+    """
+    Convert instructions to the optimizer representation.
+
+    Args:
+        code: The instructions.
+        symbols: Table of the operands.
+
+    Returns:
+        The converted instructions.
+    """
+
+    intern = symbols.intern
+    return [IRInstruction(OPCODES.get(type(ins), OTHER), [intern(param) for param in ins.params], ins.inputs,
+                          ins.outputs, ins.side_effects, ins) for ins in code]
+
+
+def from_ir(code: list[IRInstruction], symbols: Symbols) -> list[Instruction]:
+    """
+    Convert instructions from the optimizer representation.
+    Converted instructions are updated, instructions created by the optimizer are constructed.
+
+    Args:
+        code: The instructions, without noops.
+        symbols: Table of the operands.
+
+    Returns:
+        The instructions.
+    """
+
+    names = symbols.names
+
+    result = []
+    for ins in code:
+        params = [names[arg] for arg in ins.args]
+
+        if ins.source is None:
+            assert ins.op == SET, "Only set instructions are created by the optimizer"
+            result.append(InstructionSet(*params))
+
+        else:
+            ins.source.params = params
+            result.append(ins.source)
+
+    return result
@@ -1,8 +1,15 @@
+from __future__ import annotations
+
 import os
+import re
 import string
+from array import array
+from bisect import bisect_left
+from typing import Callable
 
-from .error import Error
+from .error import Error, InternalError
 from .tokens import *
+from .util import Position, Source
 
 
 class Lexer:
@@ -23,11 +30,18 @@ class Lexer:
 
     SET_CHARS_START = "=+-*/%&|^<>"
 
+    # lexer used by `Lexer.create`
+    DEFAULT: type[Lexer] = None
+
     include_search_dir: str
     imported_files: set
+    # path -> (mtime, digest) of every transitively imported file
+    dependencies: dict[str, tuple[int, str]]
 
     current_input_file: str
     current_code: str
+    source: Source | None
+    start_pos: Position | None
     current_code_lines: list[str]
     i: int
     i_line: int
@@ -37,15 +51,32 @@ class Lexer:
     def __init__(self, include_search_dir: str):
         self.include_search_dir = include_search_dir
         self.imported_files = set()
+        self.dependencies = {}
 
         self.current_input_file = ""
         self.current_code = ""
+        self.source = None
+        self.start_pos = None
         self.current_code_lines = []
         self.i = -1
         self.i_line = 0
         self.line = 0
         self.char = 0
 
+    @classmethod
+    def create(cls, include_search_dir: str) -> Lexer:
+        """
+        Create an instance of the default lexer.
+
+        Args:
+            include_search_dir: Directory used to resolve imports.
+
+        Returns:
+            The created lexer.
+        """
+
+        return cls.DEFAULT(include_search_dir)
+
     def next_char(self, char: str | None = None) -> str:
         """
         Read the next character.
@@ -134,9 +165,30 @@ class Lexer:
                 self.i_line -= 1
                 self.line -= 1
 
+    def position(self, start: int, end: int, line: int | None = None) -> Position:
+        """
+        Create a position in the current source.
+
+        Args:
+            start: Offset of the first character.
+            end: Offset after the last character.
+            line: Line of the position, the current line if None.
+
+        Returns:
+            The created position, or the starting position if the code is generated.
+        """
+
+        if line is None:
+            line = self.line
+
+        if self.start_pos is not None:
+            return Position(line, self.start_pos.start, self.start_pos.end, self.start_pos.source)
+
+        return Position(line, start, end, self.source)
+
     def make_position(self, length: int) -> Position:
         """
-        Create a position from the current line and column counters.
+        Create a position ending at the current character.
 
         Args:
             length: Length of the position.
@@ -145,8 +197,7 @@ class Lexer:
             The created position.
         """
 
-        return Position(self.line, self.char - length, self.char, self.current_code_lines[self.i_line],
-                        self.current_input_file)
+        return self.position(self.i + 1 - length, self.i + 1)
 
     def make_token(self, type_: TokenType, value: str) -> Token:
         """
@@ -180,6 +231,7 @@ class Lexer:
         self.current_code = code
         self.current_code_lines = code.splitlines()
         self.current_input_file = input_file
+        self.start_pos = start_pos
         self.i = -1
         self.i_line = 0
         self.line = 0
@@ -187,11 +239,14 @@ class Lexer:
 
         if start_pos is not None:
             self.current_input_file = start_pos.file
+            self.source = start_pos.source
             self.line = start_pos.line
-            self.char = start_pos.start
+            self.char = start_pos.column
+            line_offset = start_pos.line
 
         else:
-            start_pos = Position(self.line, 0, 0, "", input_file)
+            self.source = Source.intern(code[:-1], input_file)
+            line_offset = 0
 
         # list of lexed tokens
         tokens = []
@@ -199,7 +254,7 @@ class Lexer:
             if ch == "%":
                 if self.lookahead_str("%%LINE"):
                     length = int(self.next_char())
-                    self.line = int("".join(self.next_char() for _ in range(length))) + start_pos.line
+                    self.line = int("".join(self.next_char() for _ in range(length))) + line_offset
                     continue
 
             # break at the end of code
@@ -218,29 +273,15 @@ class Lexer:
 
             # imports
             if ch == "%" and self.char == 0:
+                start, line = self.i + 1, self.line
+
                 # read until the end of line
                 token = self.lex_until_eol()
 
                 # if token is not only "%"
                 if len(token) > 1:
-                    path = os.path.join(self.include_search_dir, token[1:])
-                    # check if imported file exists
-                    if os.path.isfile(path):
-                        # check if file is already imported
-                        if path in self.imported_files:
-                            Error.already_imported(self.make_position(len(token)), path)
-
-                        # add the file to list of imported files
-                        self.imported_files.add(path)
-
-                        with open(path, "r") as f:
-                            imported_code = f.read()
-
-                        # add tokens of the imported file to the currently parsed ones
-                        tokens += Lexer(self.include_search_dir).lex(imported_code, path)
-
-                    else:
-                        Error.cannot_find_file(self.make_position(len(token)), path)
+                    # add tokens of the imported file to the currently parsed ones
+                    tokens += self.lex_import(token, self.position(start, start + len(token), line))
 
             # lex an identifier
             elif ch in self.ID_CHARS_START and (token := self.lex_id()) is not None:
@@ -309,10 +350,77 @@ class Lexer:
                 tokens.append(self.make_token(TokenType.OPERATOR, token))
 
             else:
+                self.next_char()
                 Error.unexpected_character(self.make_position(1), ch)
 
         return tokens
 
+    def lex_table(self, code: str, input_file: str, start_pos: Position = None) -> TokenTable:
+        """
+        Split code into tokens stored in a table.
+
+        Args:
+            code: Input code.
+            input_file: File of the input code, used for imports and errors.
+            start_pos: Position to be used at the start of lexing.
+
+        Returns:
+            A table of tokens from the code.
+        """
+
+        return TokenTable.from_tokens(self.lex(code, input_file, start_pos))
+
+    def lex_import(self, token: str, pos: Position) -> list[Token]:
+        """
+        Lex an imported file.
+
+        Args:
+            token: The import line, including the leading "%".
+            pos: Position of the import line.
+
+        Returns:
+            Tokens of the imported file.
+        """
+
+        path, imported_code = self.read_import(token, pos)
+        from .cache import ImportCache
+
+        return ImportCache.lex(self, path, imported_code).tokens()
+
+    def read_import(self, token: str, pos: Position) -> tuple[str, str]:
+        """
+        Read an imported file.
+
+        Args:
+            token: The import line, including the leading "%".
+            pos: Position of the import line.
+
+        Returns:
+            Path and code of the imported file.
+        """
+
+        path = os.path.join(self.include_search_dir, token[1:])
+        # check if imported file exists
+        if not os.path.isfile(path):
+            Error.cannot_find_file(pos, path)
+
+        # check if file is already imported
+        if path in self.imported_files:
+            Error.already_imported(pos, path)
+
+        # add the file to list of imported files
+        self.imported_files.add(path)
+
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, "r") as f:
+            code = f.read()
+
+        from .cache import ImportCache
+
+        self.dependencies[path] = (mtime, ImportCache.digest(code))
+
+        return path, code
+
     def lex_until_eol(self) -> str:
         """
         Lex until the end of line.
@@ -476,3 +584,374 @@ class Lexer:
 
         # step back if nothing matched
         self.prev_char()
+
+
+class RegexLexer(Lexer):
+    """
+    Splits code into tokens in a single scan driven by one precompiled regular expression.
+
+    Produces exactly the same tokens and positions as `Lexer`.
+    """
+
+    # characters that terminate a string
+    _NON_STRING_CHARS = "[^" + re.escape(string.printable) + "]"
+
+    TOKEN_REGEX = re.compile("|".join((
+        r"(?P<WS>\s+)",
+        r"(?P<COMMENT>#[^\n]*\n?)",
+        r"(?P<ID>@[A-Za-z0-9_@\-]*|[A-Za-z_][A-Za-z0-9_@]*)",
+        rf"(?P<STRING>\"(?:(?!{_NON_STRING_CHARS})[^\"]|(?<=\\)\")*(?:\"|{_NON_STRING_CHARS}|$))",
+        r"(?P<NUMBER>[0-9]+(?:\.(?!\.)[0-9]*)?)",
+        r"(?P<SINGLE>[(){}\[\],;:$])",
+        r"(?P<ARROW>->)",
+        r"(?P<SET>=(?!=)|[+\-%&|^]=|\*\*=|//=|[*/]=|<<=|>>=)",
+        r"(?P<OPERATOR>===|==|&&|\|\||\*\*|//|\.\.|<=|<<|>=|>>|!=|[+\-~^%&|*/.<>!])"
+    )))
+
+    # token kinds as stored in `TokenTable`
+    SINGLE_CHAR_TOKENS: dict[str, int] = {ch: TokenTable.kind(type_) for ch, type_ in {
+        "(": TokenType.LPAREN, ")": TokenType.RPAREN,
+        "{": TokenType.LBRACE, "}": TokenType.RBRACE,
+        "[": TokenType.LBRACK, "]": TokenType.RBRACK,
+        ",": TokenType.COMMA, ";": TokenType.SEMICOLON, ":": TokenType.COLON,
+        "$": TokenType.DOLLAR
+    }.items()}
+
+    TOKEN_TYPES: dict[str, int] = {name: TokenTable.kind(type_) for name, type_ in {
+        "ID": TokenType.ID, "KEYWORD": TokenType.KEYWORD, "STRING": TokenType.STRING,
+        "NUMBER": TokenType.NUMBER, "ARROW": TokenType.ARROW, "SET": TokenType.SET, "OPERATOR": TokenType.OPERATOR
+    }.items()}
+
+    # tokens the original lexer reads partially without advancing the column counter
+    SKIPPED_CHARS: dict[str, int] = {
+        "->": 2, "**=": 2, "//=": 2, "<<=": 2, ">>=": 2
+    }
+
+    # (offset of the import line, path, index of the first token, index after the last token)
+    imports: list[tuple[int, str, int, int]]
+
+    def __init__(self, include_search_dir: str):
+        super().__init__(include_search_dir)
+
+        self.imports = []
+
+    def lex(self, code: str, input_file: str, start_pos: Position = None) -> list[Token]:
+        return self.lex_table(code, input_file, start_pos).tokens()
+
+    def lex_table(self, code: str, input_file: str, start_pos: Position = None) -> TokenTable:
+        code += " "
+
+        self.current_code = code
+        self.current_input_file = input_file
+        self.start_pos = start_pos
+        self.imports = []
+        self.line = 0
+
+        bias = 0
+        if start_pos is not None:
+            self.current_input_file = start_pos.file
+            self.source = start_pos.source
+            self.line = start_pos.line
+            bias = start_pos.column
+            line_offset = start_pos.line
+
+        else:
+            self.source = Source.intern(code[:-1], input_file)
+            line_offset = 0
+
+        tokens = TokenTable()
+        self._scan(tokens, code, 0, bias, line_offset)
+
+        return tokens
+
+    def _scan(self, tokens: TokenTable, code: str, i: int, bias: int, line_offset: int,
+              stop: Callable[[int], bool] = None) -> int:
+        """
+        Lex code into a table, starting at the beginning of a line.
+
+        Args:
+            tokens: The table the tokens are added to.
+            code: The code, with a trailing space.
+            i: Offset of the first lexed character.
+            bias: Initial column of the first lexed character.
+            line_offset: Added to line numbers from line markers.
+            stop: Called with the offset of every line start that is not inside a token, stops the scan if it returns True.
+
+        Returns:
+            Offset where the scan stopped.
+        """
+
+        start_pos = self.start_pos
+
+        # the original lexer's column counter is `i - line_start + bias`, it decides where imports are allowed
+        line_start = i
+
+        match_token = RegexLexer.TOKEN_REGEX.match
+        single_char_tokens = RegexLexer.SINGLE_CHAR_TOKENS
+        token_types = RegexLexer.TOKEN_TYPES
+        skipped_chars = RegexLexer.SKIPPED_CHARS
+        keywords = Token.KEYWORDS
+        position = self.position
+        ID, KEYWORD, STRING = token_types["ID"], token_types["KEYWORD"], token_types["STRING"]
+
+        append = tokens.append_raw
+        source = tokens.source_id(self.source)
+        length = len(code)
+        while i < length:
+            ch = code[i]
+
+            if ch == "%":
+                # line markers
+                if code.startswith("%%LINE", i):
+                    n = int(code[i + 6])
+                    self.line = int(code[i + 7:i + 7 + n]) + line_offset
+                    i += 7 + n
+                    bias -= 6
+                    continue
+
+                # imports
+                if i - line_start + bias == 0:
+                    end = code.find("\n", i)
+                    token = code[i:] if end == -1 else code[i:end]
+                    pos = position(i, i + len(token))
+
+                    i = length if end == -1 else end + 1
+                    if end != -1:
+                        self.line += 1
+                        line_start = i
+                        bias = 0
+
+                    # if token is not only "%"
+                    if len(token) > 1:
+                        from .cache import ImportCache
+
+                        path, imported_code = self.read_import(token, pos)
+                        first = len(tokens)
+                        tokens.extend(ImportCache.lex(self, path, imported_code))
+                        self.imports.append((pos.start, path, first, len(tokens)))
+
+                    if stop is not None and end != -1 and stop(i):
+                        return i
+
+                    continue
+
+            if (match := match_token(code, i)) is None:
+                Error.unexpected_character(position(i, i + 1), ch)
+
+            end = match.end()
+            kind = match.lastgroup
+            value = match.group()
+
+            if kind in ("WS", "COMMENT"):
+                if (newlines := value.count("\n")) > 0:
+                    self.line += newlines
+                    line_start = i + value.rindex("\n") + 1
+                    bias = 0
+
+                    if stop is not None and stop(line_start):
+                        return line_start
+
+                i = end
+                continue
+
+            if kind == "ID":
+                type_ = KEYWORD if value in keywords else ID
+
+            elif kind == "STRING":
+                type_ = STRING
+
+                if (newlines := value.count("\n")) > 0:
+                    self.line += newlines
+                    line_start = i + value.rindex("\n") + 1
+                    bias = 0
+
+                if len(value) < 2 or value[-1] != "\"":
+                    # the string was terminated by an unprintable character or by the end of code
+                    value = f"\"{value[1:] if end >= length and value[-1] in string.printable else value[1:-1]}\""
+
+            elif kind == "SINGLE":
+                type_ = single_char_tokens[value]
+
+            else:
+                type_ = token_types[kind]
+
+                if value in skipped_chars:
+                    bias -= skipped_chars[value]
+
+            if start_pos is None:
+                append(type_, value, self.line, i, end, source)
+            else:
+                append(type_, value, self.line, start_pos.start, start_pos.end, source)
+            i = end
+
+        return i
+
+
+class IncrementalLexer(RegexLexer):
+    """
+    Lexes a file once and then only re-lexes the edited lines on every change.
+
+    Every token is anchored to an offset in the lexed file, tokens of imported files to their import line.
+    An edit is re-lexed from the nearest line start before it that is not inside a token, until the new tokens
+    line up with the old ones again. The remaining old tokens are only moved.
+    """
+
+    tokens: TokenTable | None
+    anchors: array
+
+    def __init__(self, include_search_dir: str):
+        super().__init__(include_search_dir)
+
+        self.tokens = None
+        self.anchors = array("i")
+
+    def lex_table(self, code: str, input_file: str, start_pos: Position = None) -> TokenTable:
+        self.imported_files = set()
+        self.tokens = super().lex_table(code, input_file, start_pos)
+        self.anchors = self._anchors(self.tokens, 0, self.imports)
+
+        return self.tokens.copy()
+
+    def _anchors(self, tokens: TokenTable, start: int, imports: list[tuple[int, str, int, int]]) -> array:
+        """
+        Anchor tokens to offsets in the lexed file.
+
+        Args:
+            tokens: The lexed tokens.
+            start: Index of the first anchored token.
+            imports: Imports lexed into the tokens.
+
+        Returns:
+            Anchors of the tokens from `start`.
+        """
+
+        anchors = tokens.starts[start:]
+        for offset, _, first, last in imports:
+            anchors[first - start:last - start] = array("i", [offset]) * (last - first)
+
+        return anchors
+
+    @staticmethod
+    def _inside_token(tokens: TokenTable, source: Source, index: int, offset: int) -> bool:
+        """
+        Check if a token contains an offset.
+
+        Args:
+            tokens: The tokens.
+            source: Source of the offset.
+            index: Index of the token.
+            offset: The offset.
+
+        Returns:
+            True if the token is from the source, starts before and ends after the offset.
+        """
+
+        return index >= 0 and tokens.sources[tokens.source_ids[index]] is source and \
+            tokens.starts[index] < offset < tokens.ends[index]
+
+    def relex(self, start_line: int, end_line: int, text: str) -> TokenTable:
+        """
+        Re-lex the file after an edit.
+
+        Args:
+            start_line: Index of the first replaced line.
+            end_line: Index after the last replaced line.
+            text: The new text of the lines, including the last newline.
+
+        Returns:
+            Tokens of the edited file.
+        """
+
+        if self.tokens is None:
+            InternalError.nothing_to_relex()
+
+        old_source = self.source
+        old_code = old_source.code
+        start = old_source.line_offset(start_line)
+        end = max(old_source.line_offset(end_line), start)
+        source = old_source.edit(start, end, text)
+        code = source.code
+
+        # line markers move the lines of all following tokens
+        if self.start_pos is not None or "%%LINE" in old_code or "%%LINE" in code:
+            return self.lex_table(code, self.current_input_file, self.start_pos)
+
+        offset_delta = len(text) - (end - start)
+        line_delta = text.count("\n") - old_code.count("\n", start, end)
+        tokens, anchors = self.tokens, self.anchors
+
+        # restart at a line start that is not inside a multi-line string
+        restart = old_source.line_start(start)
+        first = bisect_left(anchors, restart)
+        while self._inside_token(tokens, old_source, first - 1, restart):
+            restart = old_source.line_start(tokens.starts[first - 1])
+            first = bisect_left(anchors, restart)
+
+        old_imports = self.imports
+        self.imported_files = {path for offset, path, _, _ in old_imports if offset < restart}
+
+        new_tokens = tokens.copy(first)
+        new_tokens.sources[new_tokens.source_id(old_source)] = source
+
+        edit_end = start + len(text)
+        # index and old offset of the first kept old token
+        resync = len(tokens)
+        resync_offset = len(old_code) + 1
+
+        def stop(offset: int) -> bool:
+            nonlocal resync, resync_offset
+
+            old_offset = offset - offset_delta
+            if offset < edit_end or old_offset > len(old_code) or \
+                    (old_offset > 0 and old_code[old_offset - 1] != "\n"):
+                return False
+
+            index = bisect_left(anchors, old_offset)
+            if self._inside_token(tokens, old_source, index - 1, old_offset):
+                return False
+
+            resync, resync_offset = index, old_offset
+            return True
+
+        old_state = self.source, self.current_code, self.imports
+        self.source, self.current_code, self.imports = source, code + " ", []
+        self.line = source.line_number(restart)
+        try:
+            self._scan(new_tokens, self.current_code, restart, 0, 0, stop)
+
+            # a file imported by the edited lines may also be imported after them
+            for offset, path, _, _ in old_imports:
+                if offset >= resync_offset and path in self.imported_files:
+                    offset += offset_delta
+                    Error.already_imported(Position(source.line_number(offset), offset, source.line_end(offset), source), path)
+
+        except Error:
+            # keep the previous state valid
+            self.source, self.current_code, self.imports = old_state
+            self.imported_files = {path for _, path, _, _ in self.imports}
+            raise
+
+        scanned = len(new_tokens)
+        new_anchors = anchors[:first] + self._anchors(new_tokens, first, self.imports)
+
+        # move the old tokens after the edit
+        suffix = tokens.slice(resync, len(tokens))
+        suffix.sources = [source if src is old_source else src for src in suffix.sources]
+        new_tokens.extend(suffix)
+        new_tokens.shift(scanned, source, offset_delta, line_delta)
+        new_anchors.extend(array("i", [anchor + offset_delta for anchor in anchors[resync:]]))
+
+        moved = scanned - resync
+        self.imports = [imp for imp in old_imports if imp[0] < restart] + self.imports + [
+            (offset + offset_delta, path, first_token + moved, last_token + moved)
+            for offset, path, first_token, last_token in old_imports if offset >= resync_offset
+        ]
+        self.imported_files = {path for _, path, _, _ in self.imports}
+
+        self.tokens = new_tokens
+        self.anchors = new_anchors
+
+        return new_tokens.copy()
+
+
+Lexer.DEFAULT = RegexLexer
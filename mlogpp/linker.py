@@ -1,10 +1,10 @@
-from .instruction import Instruction
+from .instruction import Instruction, InstructionSetAddress
 from .error import InternalError
 
 
 class Linker:
     """
-    Resolves labels.
+    Resolves labels, of jumps and of return addresses stored by subroutine calls.
     """
 
     EMIT_LABELS: bool = False
@@ -37,21 +37,31 @@ class Linker:
                 else:
                     line += 1
 
+        def address(label: str) -> int:
+            address_ = labels.get(label)
+            if address_ is None:
+                InternalError.label_not_found(label)
+
+            # wrap around to 0 if address is larger than end of code or smaller than zero
+            if address_ >= line or address_ < 0:
+                return 0
+
+            return address_
+
         # generate instructions and skip labels
-        code = [ins for ins in (str(ins) for ins in code) if not ins.endswith(":") or cls.EMIT_LABELS]
+        code = [(ins, generated) for ins, generated in ((ins, str(ins)) for ins in code)
+                if not generated.endswith(":") or cls.EMIT_LABELS]
 
         output_code = ""
-        for i, generated in enumerate(code):
+        for i, (ins, generated) in enumerate(code):
+            # resolve return addresses
+            if isinstance(ins, InstructionSetAddress) and not cls.EMIT_LABELS:
+                output_code += f"set {ins.params[0]} {address(ins.params[1])}\n"
+
             # resolve jump addressed
-            if generated.startswith("jump "):
+            elif generated.startswith("jump "):
                 spl = generated.split(" ", 2)
-                jump_to = labels.get(spl[1])
-                if jump_to is None:
-                    InternalError.label_not_found(spl[1])
-
-                # wrap around to 0 if address is larger than end of code or smaller than zero
-                if jump_to >= line or jump_to < 0:
-                    jump_to = 0
+                jump_to = address(spl[1])
 
                 # skip if jump is at the end of code and points to the start
                 if i == len(code) - 1 and jump_to == 0:
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-from typing import Callable
+from typing import Callable, Generator
 
-from .util import Position
+from .util import Position, trampoline
 from .values import *
 from .generator import Gen
+from .context import CompilationContext
 from .instruction import *
 from .scope import Scope
 from .abi import ABI
 from .operations import Operations
-from .enums import ENUM_TYPES_VALUES
+from .enums import enum_values
 
 
 class Node:
@@ -19,8 +20,6 @@ class Node:
 
     pos: Position
 
-    current: Node = None
-
     def __init__(self, pos: Position):
         self.pos = pos
 
@@ -47,10 +46,21 @@ class Node:
         return self.pos
 
     def gen(self) -> Value:
-        Node.current = self
+        CompilationContext.current().node = self
         
         return Value.null()
 
+    def gen_iter(self) -> Generator[Generator, Value, Value]:
+        """
+        Generate code, with nested statements yielded to be generated by a `trampoline` instead of recursively.
+
+        Returns:
+            The same value as `gen`.
+        """
+
+        yield from ()
+        return self.gen()
+
     def check_types(self, a: Type, b: Type):
         if a in b:
             return
@@ -61,8 +71,8 @@ class Node:
         return Type.parse(type_, self)
 
     @staticmethod
-    def scope_push(name: str):
-        Scope.push(name)
+    def scope_push(name: str, captured: dict[str, Value] | None = None):
+        Scope.push(name, captured)
 
     @staticmethod
     def scope_pop():
@@ -135,16 +145,19 @@ class BlockNode(Node):
         return "{}"
 
     def gen(self) -> Value:
+        return trampoline(self.gen_iter())
+
+    def gen_iter(self) -> Generator[Generator, Value, Value]:
         Node.gen(self)
 
         if self.scope:
             self.scope_push(Gen.tmp())
         
         for node in self.code[:-1]:
-            node.gen()
+            yield node.gen_iter()
 
         if len(self.code) > 0:
-            return self.code[-1].gen()
+            return (yield self.code[-1].gen_iter())
 
         if self.scope:
             self.scope_pop()
@@ -314,10 +327,10 @@ class ConfigNode(Node):
 
         if val.type() not in type_:
             Error.incompatible_types(self, val.type(), type_)
-        Scope.configurations[self.name] = val
+        Scope.configurations()[self.name] = val
 
         val = Value.variable(self.name, type_)
-        Scope.scopes[2][self.name] = val
+        Scope.scopes()[2][self.name] = val
 
         return Value.null()
 
@@ -442,8 +455,6 @@ class CallNode(Node):
     value: Node
     params: list[Node]
 
-    END_LABEL: str = ""
-
     def __init__(self, pos: Position, value: Node, params: list[Node]):
         super().__init__(pos)
 
@@ -466,7 +477,7 @@ class CallNode(Node):
             for param, type_ in zip(self.params, func.impl().get_params(func)):
                 enum = {}
                 for t in type_.list_types():
-                    e = ENUM_TYPES_VALUES.get(t)
+                    e = enum_values(t)
                     if e is not None:
                         enum |= e
                 Scope.enum(enum)
@@ -479,24 +490,28 @@ class CallNode(Node):
                 impl = func.impl()
                 assert isinstance(impl, BaseFunctionTypeImpl)
 
-                if func.value in Scope.functions:
+                if func.value in Scope.functions():
                     Error.custom(self.get_pos(), "Recursion is forbidden")
 
-                self.scope_push(func.value)
-                end_label = CallNode.END_LABEL
-                CallNode.END_LABEL = Gen.tmp()
-                for key, value in impl.scope.items():
-                    Scope.scopes[-1][key] = value
+                # only imported when needed, it's slow to import
+                from .template import Template
+
+                Template.trace_call(func.value)
+
+                self.scope_push(func.value, impl.scope)
+                ctx = CompilationContext.current()
+                end_label = ctx.end_label
+                ctx.end_label = Gen.tmp()
                 result = func.call(self, params)
                 Gen.emit(
-                    Label(CallNode.END_LABEL)
+                    Label(ctx.end_label)
                 )
                 ret = Value.variable(Gen.tmp(), impl.ret)
                 ret.set(result)
                 result = ret
                 for dst, src in impl.get_copies_after_call(func):
                     dst.set(src)
-                CallNode.END_LABEL = end_label
+                ctx.end_label = end_label
                 self.scope_pop()
                 return result
 
@@ -530,7 +545,7 @@ class ReturnNode(Node):
             Value.variable(ABI.function_return(func), Type.NULL).set(Value.null())
 
         Gen.emit(
-            InstructionJump(CallNode.END_LABEL, "always", 0, 0)
+            InstructionJump(CompilationContext.current().end_label, "always", 0, 0)
         )
 
         return Value.null()
@@ -592,6 +607,9 @@ class IfNode(Node):
         return f"if ({self.condition}) {self.code}" + (f"else {self.else_code}" if self.else_code is not None else "")
 
     def gen(self) -> Value:
+        return trampoline(self.gen_iter())
+
+    def gen_iter(self) -> Generator[Generator, Value, Value]:
         Node.gen(self)
         
         # self.scope_push(Gen.tmp())
@@ -604,7 +622,7 @@ class IfNode(Node):
         Gen.emit(
             InstructionJump(lab1, "equal", condition, 0)
         )
-        self.code.gen()
+        yield self.code.gen_iter()
         if self.else_code is not None:
             lab2 = Gen.tmp()
             Gen.emit(
@@ -615,7 +633,7 @@ class IfNode(Node):
         )
 
         if self.else_code is not None:
-            self.else_code.gen()
+            yield self.else_code.gen_iter()
             Gen.emit(
                 Label(lab2)
             )
@@ -639,6 +657,9 @@ class WhileNode(Node):
         return f"while ({self.condition}) {self.code}"
 
     def gen(self) -> Value:
+        return trampoline(self.gen_iter())
+
+    def gen_iter(self) -> Generator[Generator, Value, Value]:
         Node.gen(self)
         
         name = ABI.loop_name(Gen.tmp())
@@ -655,7 +676,7 @@ class WhileNode(Node):
         Gen.emit(
             InstructionJump(break_, "equal", condition, 0)
         )
-        result = self.code.gen()
+        result = yield self.code.gen_iter()
         Gen.emit(
             InstructionJump(continue_, "always", 0, 0),
             Label(break_)
@@ -684,6 +705,9 @@ class ForNode(Node):
         return f"for ({self.init}; {self.condition}; {self.action}) {self.code}"
 
     def gen(self) -> Value:
+        return trampoline(self.gen_iter())
+
+    def gen_iter(self) -> Generator[Generator, Value, Value]:
         Node.gen(self)
         
         name = ABI.loop_name(Gen.tmp())
@@ -694,7 +718,7 @@ class ForNode(Node):
 
         self.scope_push(name)
 
-        self.init.gen()
+        yield self.init.gen_iter()
         Gen.emit(
             Label(start)
         )
@@ -702,7 +726,7 @@ class ForNode(Node):
         Gen.emit(
             InstructionJump(break_, "equal", condition.get(), 0)
         )
-        result = self.code.gen()
+        result = yield self.code.gen_iter()
         Gen.emit(
             Label(continue_)
         )
@@ -735,6 +759,9 @@ class RangeNode(Node):
         return f"for ({self.name} : {self.a}{'..' if self.b is not None else ''}{self.b if self.b is not None else ''}) {self.code}"
 
     def gen(self) -> Value:
+        return trampoline(self.gen_iter())
+
+    def gen_iter(self) -> Generator[Generator, Value, Value]:
         Node.gen(self)
         
         name = ABI.loop_name(Gen.tmp())
@@ -756,7 +783,7 @@ class RangeNode(Node):
         Gen.emit(
             InstructionJump(break_, "greaterThanEq", counter, until)
         )
-        result = self.code.gen()
+        result = yield self.code.gen_iter()
         Gen.emit(
             Label(continue_),
             InstructionOp("add", counter, counter, 1),
@@ -788,7 +815,10 @@ class FunctionNode(Node):
 
     def gen(self) -> Value:
         Node.gen(self)
-        
+
+        # only imported when needed, it's slow to import
+        from .subroutine import FunctionBody
+
         name = ABI.function_name(self.name)
 
         self.scope_push(name)
@@ -800,14 +830,14 @@ class FunctionNode(Node):
             value.value = self.scope_declare(n, value)
             params.append((type_, value.value))
 
-        func_scope = Scope.scopes[-1]
+        func_scope = Scope.scopes()[-1]
 
         self.scope_pop()
 
         return_type = self.parse_type(self.return_type)
 
         function = Value(Type.function([param[0] for param in params], return_type), name, type_impl=FunctionTypeImpl(
-            params, return_type, self.code, func_scope))
+            params, return_type, FunctionBody(self.code, name, return_type), func_scope))
 
         self.scope_declare(self.name, function)
 
@@ -836,6 +866,9 @@ class MemberFunctionNode(Node):
     def gen(self) -> Value:
         Node.gen(self)
 
+        # only imported when needed, it's slow to import
+        from .subroutine import FunctionBody
+
         name = ABI.struct_method(self.struct, self.name)
 
         self.scope_push(name)
@@ -847,14 +880,14 @@ class MemberFunctionNode(Node):
             value.value = self.scope_declare(n, value)
             params.append((type_, value.value))
 
-        func_scope = Scope.scopes[-1]
+        func_scope = Scope.scopes()[-1]
 
         self.scope_pop()
 
         return_type = self.parse_type(self.return_type)
 
         function = Value(Type.function([param[0] for param in params], return_type), name, type_impl=MemberFunctionTypeImpl(
-            params, return_type, self.code, func_scope))
+            params, return_type, FunctionBody(self.code, name, return_type), func_scope))
 
         return function
 
@@ -906,7 +939,7 @@ class StructNode(Node):
     def gen(self) -> Value:
         Node.gen(self)
 
-        if self.name in Type.typenames:
+        if self.name in CompilationContext.current().typenames:
             Error.already_defined_type(self, self.name)
 
         fields = self.fields.copy()
@@ -967,8 +1000,7 @@ class StructNode(Node):
 
         static_values = parent_static_values | static_values
 
-        type_ = Type.simple(self.name)
-        type_.convertible_to.update(parents)
+        type_ = Type.simple(self.name).with_parents(parents)
         Type.register(self.name, type_)
         types = {v: self.parse_type(k) for k, v in fields}
         TypeImpl.add_impl(type_, StructTypeImpl(types, parent_methods, fields, static_values))
@@ -38,6 +38,38 @@ class Operations:
         "^": "xor"
     }
 
+    # binding power of binary operators, higher binds tighter, operators with the same power are left associative
+    PRECEDENCE: dict[str, int] = {
+        "||": 1,
+        "&&": 2,
+        "<": 4,
+        "<=": 4,
+        ">": 4,
+        ">=": 4,
+        "==": 4,
+        "!=": 4,
+        "===": 4,
+        "|": 5,
+        "^": 6,
+        "&": 7,
+        "<<": 8,
+        ">>": 8,
+        "+": 9,
+        "-": 9,
+        "*": 10,
+        "/": 10,
+        "//": 10,
+        "%": 10,
+        "**": 12
+    }
+
+    # binding power of unary operators, their operand can only contain operators binding at least as tight
+    UNARY_PRECEDENCE: dict[str, int] = {
+        "!": 3,
+        "-": 11,
+        "~": 11
+    }
+
     EQUALITY: set[str] = {
         "==",
         "!=",
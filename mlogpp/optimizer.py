@@ -1,41 +1,40 @@
 from __future__ import annotations
 
 from collections import defaultdict
+import bisect
 import typing
 import itertools
 
 from .instruction import *
 from .operations import Operations
-from . import builtins
+from .ir import Symbols, IRInstruction, IR_NOOP, to_ir, from_ir, LABEL, JUMP, SET, OP, PRINT, NOOP, PHI, \
+    ZERO, ONE, TRUE, FALSE, ALWAYS, EQUAL, NOT_EQUAL, SUB, MUL, DIV, IDIV, AND, ADD, OR, XOR, SHR, SHL
 
 
-class Phi(Instruction):
-    variable: str
-    output: str
+class Phi(IRInstruction):
+    __slots__ = ("variable", "output", "inputs_")
+
+    variable: int
+    output: int
     inputs_: set[Block]
 
-    def __init__(self, variable: str, output: str, inputs: set[Block]):
-        BaseInstruction.__init__(self, "phi", (), True)
+    def __init__(self, variable: int, output: int, inputs: set[Block]):
+        super().__init__(PHI, [], (), (), True)
 
         self.variable = variable
         self.output = output
         self.inputs_ = inputs
 
-    def __str__(self):
-        raise RuntimeError("Phi instruction must be converted")
-
-BaseInstruction.Builtins["phi"] = builtins.native_function_value(Phi, [])
-
 
-class Block(list[Instruction]):
+class Block(list[IRInstruction]):
     predecessors: set[Block]
     successors: set[Block]
-    variables: dict[str, int]
-    assignments: set[str]
+    variables: dict[int, int]
+    assignments: set[int]
     is_ssa: bool
-    add_phi: list[Instruction]
+    add_phi: list[IRInstruction]
 
-    def __init__(self, code: typing.Iterable[Instruction]):
+    def __init__(self, code: typing.Iterable[IRInstruction]):
         super().__init__(code)
 
         self.predecessors = set()
@@ -50,7 +49,13 @@ class Block(list[Instruction]):
 
 
 class Optimizer:
-    Instructions = list[Instruction]
+    """
+    Optimizes generated instructions.
+
+    The passes work on `IRInstruction`s, operands are compared as ids of a `Symbols` table.
+    """
+
+    Instructions = list[IRInstruction]
     Blocks = list[Block]
 
     JUMP_TRANSLATION: dict[str, str] = {
@@ -61,86 +66,147 @@ class Optimizer:
         "greaterThanEq": "lessThan",
         "lessThanEq": "greaterThan"
     }
+    # JUMP_TRANSLATION with symbol ids, the symbols have the same ids in every table
+    _JUMP_TRANSLATION_IDS: dict[int, int] = {Symbols.BASE_IDS[a]: Symbols.BASE_IDS[b]
+                                             for a, b in JUMP_TRANSLATION.items()}
+    _PRECALC_IDS: dict[int, typing.Callable] = {Symbols.BASE_IDS[name]: func
+                                                for name, func in Operations.PRECALC.items()}
+
+    @classmethod
+    def optimize(cls, code: list[Instruction], subroutines: list[list[Instruction]] = ()) -> list[Instruction]:
+        """
+        Optimize the code and the bodies of subroutines called by it.
+
+        Every region is optimized separately, variables used by multiple regions are not renamed or
+        replaced by their values, because a call may change them.
+
+        Args:
+            code: The main code.
+            subroutines: Bodies of subroutines, starting with their entry label.
+
+        Returns:
+            The optimized code, followed by an `end` and the optimized bodies if there are any.
+        """
+
+        symbols = Symbols()
+        if len(subroutines) == 0:
+            return from_ir(cls._optimize_region(to_ir(code, symbols), symbols, set(), set()), symbols)
+
+        regions = [to_ir(region, symbols) for region in [code, *subroutines]]
+        shared, labels = cls._find_shared(regions)
+
+        result = cls._optimize_region(regions[0], symbols, shared, labels) + to_ir([InstructionEnd()], symbols)
+        for region in regions[1:]:
+            result += cls._optimize_region(region, symbols, shared, labels)
+
+        return from_ir(result, symbols)
 
     @classmethod
-    def optimize(cls, code: Instructions) -> Instructions:
+    def _find_shared(cls, regions: list[Instructions]) -> tuple[set[int], set[int]]:
+        """
+        Find variables which are written in some region and used in another one, and labels of subroutine calls.
+        """
+
+        regions_used = defaultdict(int)
+        written = set()
+        labels = set()
+        for region in regions:
+            used = set()
+            for ins in region:
+                used.update(ins.args[i] for i in ins.inputs)
+                used.update(ins.args[i] for i in ins.outputs)
+                written.update(ins.args[i] for i in ins.outputs)
+
+                if isinstance(ins.source, InstructionCall):
+                    labels.add(ins.args[0])
+                elif isinstance(ins.source, InstructionSetAddress):
+                    labels.add(ins.args[1])
+
+            for variable in used:
+                regions_used[variable] += 1
+
+        return {variable for variable, count in regions_used.items() if count > 1 and variable in written}, labels
+
+    @classmethod
+    def _optimize_region(cls, code: Instructions, symbols: Symbols, shared: set[int], labels: set[int]) \
+            -> Instructions:
+
         cls._remove_noops(code)
-        cls._optimize_jumps(code)
+        cls._optimize_jumps(code, labels)
 
         cls._remove_noops(code)
-        while cls._optimize_immediate_move(code):
+        while cls._optimize_immediate_move(code, shared):
             pass
 
         cls._remove_noops(code)
 
         blocks = cls._make_blocks(code)
         cls._eval_block_jumps(blocks)
-        cls._find_assignments(blocks)
+        cls._find_assignments(blocks, shared)
         cls._optimize_block_jumps(blocks)
-        cls._make_ssa(blocks)
-        while cls._propagate_constants(blocks) | cls._precalculate_values(blocks) | \
-                cls._eliminate_common_subexpressions(blocks):
+        cls._make_ssa(blocks, symbols, shared)
+        while cls._propagate_constants(blocks, shared) | cls._precalculate_values(blocks, symbols) | \
+                cls._eliminate_common_subexpressions(blocks, shared):
 
             pass
         # TODO: execute code as far as possible
-        cls._resolve_ssa(blocks)
+        cls._resolve_ssa(blocks, symbols)
         code = cls._make_instructions(blocks)
 
         cls._remove_noops(code)
-        cls._optimize_jumps(code)
+        cls._optimize_jumps(code, labels)
 
         cls._remove_noops(code)
-        while cls._optimize_immediate_move(code):
+        while cls._optimize_immediate_move(code, shared):
             pass
 
         cls._remove_noops(code)
         # cls._ExecutionOptimizer(code).optimize(1)
 
         cls._remove_noops(code)
-        cls._remove_unused_variables(code)
+        cls._remove_unused_variables(code, shared)
 
         cls._remove_noops(code)
-        cls._join_instructions(code)
+        cls._join_instructions(code, symbols)
 
         cls._remove_noops(code)
         return code
 
     @classmethod
-    def _optimize_jumps_check_ins(cls, ins: Instruction) -> bool:
-        if ins.params[1] == "equal":
-            if (ins.params[2] in ("true", "1") and ins.params[3] in ("false", "0")) \
-                        or (ins.params[3] in ("true", "1") and ins.params[2] in ("false", "0")):
+    def _optimize_jumps_check_ins(cls, ins: IRInstruction) -> bool:
+        args = ins.args
+        if args[1] == EQUAL:
+            if (args[2] in (TRUE, ONE) and args[3] in (FALSE, ZERO)) \
+                        or (args[3] in (TRUE, ONE) and args[2] in (FALSE, ZERO)):
 
                 return False
 
-        if ins.params[1] == "notEqual":
-            if (ins.params[2] in ("true", "1") and ins.params[3] in ("true", "1")) \
-                        or (ins.params[3] in ("false", "0") and ins.params[2] in ("false", "0")):
+        if args[1] == NOT_EQUAL:
+            if (args[2] in (TRUE, ONE) and args[3] in (TRUE, ONE)) \
+                        or (args[3] in (FALSE, ZERO) and args[2] in (FALSE, ZERO)):
 
                 return False
 
         return True
 
     @classmethod
-    def _optimize_jumps(cls, code: Instructions):
-        jumps = {ins.params[0] for ins in code if isinstance(ins, InstructionJump)}
-        code[:] = [ins for i, ins in enumerate(code) if not isinstance(ins, Label) or (ins.params[0] in jumps)]
+    def _optimize_jumps(cls, code: Instructions, labels: set[int]):
+        jumps = {ins.args[0] for ins in code if ins.op == JUMP} | labels
+        code[:] = [ins for ins in code if ins.op != LABEL or (ins.args[0] in jumps)]
 
-        labels = {ins.params[0]: i for i, ins in enumerate(code) if isinstance(ins, Label)}
-        code[:] = [ins if not isinstance(ins, InstructionJump) or
-                          labels[ins.params[0]] != i else InstructionNoop() for i, ins in enumerate(code)]
+        labels = {ins.args[0]: i for i, ins in enumerate(code) if ins.op == LABEL}
+        code[:] = [ins if ins.op != JUMP or labels[ins.args[0]] != i else IR_NOOP for i, ins in enumerate(code)]
 
-        code[:] = [ins if not isinstance(
-            ins, InstructionJump) or cls._optimize_jumps_check_ins(ins) else InstructionNoop() for ins in code]
+        code[:] = [ins if ins.op != JUMP or cls._optimize_jumps_check_ins(ins) else IR_NOOP for ins in code]
 
     @classmethod
     def _make_blocks(cls, code: Instructions) -> Blocks:
         blocks: list[Optimizer.Instructions] = [[]]
         for ins in code:
-            if isinstance(ins, Label):
+            if ins.op == LABEL:
                 blocks.append([ins])
 
-            elif isinstance(ins, InstructionJump):
+            elif ins.op == JUMP:
                 blocks[-1].append(ins)
                 blocks.append([])
 
@@ -150,11 +216,13 @@ class Optimizer:
         return [Block(block) for block in blocks if len(block) > 0]
 
     @classmethod
-    def _find_assignments(cls, code: Blocks):
+    def _find_assignments(cls, code: Blocks, shared: set[int]):
         for block in code:
             for ins in block:
                 for o in ins.outputs:
-                    block.assignments.add(ins.params[o])
+                    block.assignments.add(ins.args[o])
+
+            block.assignments -= shared
 
     @classmethod
     def _make_instructions(cls, code: Blocks) -> Instructions:
@@ -169,62 +237,75 @@ class Optimizer:
         if len(code) == 0:
             return
 
-        labels = {lab.params[0]: i for i, block in enumerate(code) for lab in block if isinstance(lab, Label)}
+        labels = {lab.args[0]: i for i, block in enumerate(code) for lab in block if lab.op == LABEL}
 
         used = set()
         cls._eval_block_jumps_internal(code, labels, 0, used)
 
         code[:] = [block for i, block in enumerate(code) if i in used]
+        # blocks are compared by identity, comparing them as lists is slow
+        kept = {id(block) for block in code}
         for block in code:
-            block.predecessors = {pre for pre in block.predecessors if pre in code}
+            block.predecessors = {pre for pre in block.predecessors if id(pre) in kept}
             for pre in block.predecessors:
                 pre.successors.add(block)
 
     @classmethod
-    def _eval_block_jumps_internal(cls, code: Blocks, labels: dict[str, int], i: int, used: set[int], from_: int = None):
-        if i >= len(code):
-            return
+    def _eval_block_jumps_internal(cls, code: Blocks, labels: dict[int, int], i: int, used: set[int]):
+        # blocks to visit and the blocks they are reached from, an explicit stack avoids deep recursion
+        stack: list[tuple[int, int | None]] = [(i, None)]
+        while stack:
+            i, from_ = stack.pop()
 
-        if from_ is not None:
-            code[i].predecessors.add(code[from_])
+            if i >= len(code):
+                continue
 
-        if i in used:
-            return
-        used.add(i)
+            if from_ is not None:
+                code[i].predecessors.add(code[from_])
 
-        for ins in code[i]:
-            if isinstance(ins, InstructionJump):
-                if ins.params[1] == "always":
-                    cls._eval_block_jumps_internal(code, labels, labels[ins.params[0]], used, i)
-                    return
+            if i in used:
+                continue
+            used.add(i)
 
-                else:
-                    cls._eval_block_jumps_internal(code, labels, labels[ins.params[0]], used, i)
-                    cls._eval_block_jumps_internal(code, labels, i + 1, used, i)
-                    return
+            for ins in code[i]:
+                if ins.op == JUMP:
+                    if ins.args[1] != ALWAYS:
+                        stack.append((i + 1, i))
 
-        cls._eval_block_jumps_internal(code, labels, i + 1, used, i)
+                    stack.append((labels[ins.args[0]], i))
+                    break
+
+            else:
+                stack.append((i + 1, i))
 
     @classmethod
     def _optimize_block_jumps(cls, code: Blocks):
-        labels = {lab.params[0]: i for i, block in enumerate(code) for lab in block if isinstance(lab, Label)}
+        labels = {lab.args[0]: i for i, block in enumerate(code) for lab in block if lab.op == LABEL}
         for i, block in enumerate(code):
-            if isinstance(block[-1], InstructionJump) and labels[block[-1].params[0]] == i + 1:
+            if block[-1].op == JUMP and labels[block[-1].args[0]] == i + 1:
                 block.pop(-1)
 
     @classmethod
-    def _make_ssa(cls, code: Blocks):
+    def _make_ssa(cls, code: Blocks, symbols: Symbols, shared: set[int]):
         if len(code) > 0:
-            cls._make_ssa_internal(code[0], {})
+            cls._make_ssa_internal(code[0], {}, symbols, shared)
 
     @classmethod
-    def _make_ssa_internal(cls, block: Block, variables: dict[str, int]):
-        if block.is_ssa:
-            return
+    def _make_ssa_internal(cls, block: Block, variables: dict[int, int], symbols: Symbols, shared: set[int]):
+        # depth first, in the same order as recursive calls would visit the blocks
+        stack = [(block, variables)]
+        while stack:
+            block, variables = stack.pop()
+            if not block.is_ssa:
+                cls._make_ssa_block(block, variables, symbols, shared)
+
+                stack.extend((suc, block.variables) for suc in reversed(list(block.successors)))
 
+    @classmethod
+    def _make_ssa_block(cls, block: Block, variables: dict[int, int], symbols: Symbols, shared: set[int]):
         block.variables = variables.copy()
 
-        phi_required: dict[str, set[Block]] = {}
+        phi_required: dict[int, set[Block]] = {}
         for a, b in itertools.combinations(block.predecessors, 2):
             for common in a.assignments & b.assignments:
                 if common in phi_required:
@@ -234,90 +315,91 @@ class Optimizer:
 
         for name, blocks in phi_required.items():
             block.variables[name] = block.variables.get(name, 0) + 1
-            block.insert(0, Phi(name, f"{name}:{block.variables[name]}", blocks))
+            block.insert(0, Phi(name, symbols.version(name, block.variables[name]), blocks))
 
         for ins in block:
+            args = ins.args
             for i in ins.inputs:
-                inp = ins.params[i]
+                inp = args[i]
                 if inp in block.variables:
-                    ins.params[i] += ":" + str(block.variables[inp])
+                    args[i] = symbols.version(inp, block.variables[inp])
             for o in ins.outputs:
-                out = ins.params[o]
+                out = args[o]
+                # variables shared with other regions keep their names
+                if out in shared:
+                    continue
                 block.variables[out] = block.variables.get(out, 0) + 1
-                ins.params[o] += ":" + str(block.variables[out])
+                args[o] = symbols.version(out, block.variables[out])
 
         block.is_ssa = True
 
-        for suc in block.successors:
-            cls._make_ssa_internal(suc, block.variables)
-
     @classmethod
-    def _propagate_constants(cls, code: Blocks) -> bool:
-        constants: dict[str, str] = {}
+    def _propagate_constants(cls, code: Blocks, shared: set[int]) -> bool:
+        constants: dict[int, int] = {}
 
         for block in code:
             for ins in block:
-                if isinstance(ins, InstructionSet):
-                    constants[ins.params[0]] = ins.params[1]
+                if ins.op == SET and ins.args[0] not in shared and ins.args[1] not in shared:
+                    constants[ins.args[0]] = ins.args[1]
 
         found = False
         for block in code:
             for ins in block:
+                args = ins.args
                 for i in ins.inputs:
-                    if ins.params[i] in constants:
-                        ins.params[i] = constants[ins.params[i]]
+                    if args[i] in constants:
+                        args[i] = constants[args[i]]
                         found = True
 
         return found
 
     @classmethod
-    def _precalculate_values(cls, code: Blocks) -> bool:
+    def _precalculate_values(cls, code: Blocks, symbols: Symbols) -> bool:
+        numbers = symbols.numbers
+        set_ = IRInstruction.set
+
         found = False
         for block in code:
             for i, ins in enumerate(block):
-                if isinstance(ins, InstructionOp):
-                    if (ins.params[0] == "sub" and ins.params[2] == ins.params[3]) or \
-                            (ins.params[0] == "mul" and (ins.params[2] == "0" or ins.params[3] == "0")) or \
-                            (ins.params[0] in ("div", "idiv") and ins.params[2] == "0") or \
-                            (ins.params[0] == "and" and (ins.params[2] == "0" or ins.params[3] == "0")):
-
-                        block[i] = InstructionSet(ins.params[1], 0)
+                if ins.op == OP:
+                    operator, result, a, b = ins.args
+                    if (operator == SUB and a == b) or \
+                            (operator == MUL and (a == ZERO or b == ZERO)) or \
+                            (operator in (DIV, IDIV) and a == ZERO) or \
+                            (operator == AND and (a == ZERO or b == ZERO)):
+
+                        block[i] = set_(result, ZERO)
                         found = True
 
-                    elif ins.params[0] in ("add", "or", "xor") and ins.params[2] == "0":
-                        block[i] = InstructionSet(ins.params[1], ins.params[3])
+                    elif operator in (ADD, OR, XOR) and a == ZERO:
+                        block[i] = set_(result, b)
                         found = True
 
-                    elif ins.params[0] in ("add", "or", "xor") and ins.params[3] == "0":
-                        block[i] = InstructionSet(ins.params[1], ins.params[2])
+                    elif operator in (ADD, OR, XOR) and b == ZERO:
+                        block[i] = set_(result, a)
                         found = True
 
-                    elif ins.params[0] == "mul" and ins.params[2] == "1":
-                        block[i] = InstructionSet(ins.params[1], ins.params[3])
+                    elif operator == MUL and a == ONE:
+                        block[i] = set_(result, b)
                         found = True
 
-                    elif ins.params[0] == "mul" and ins.params[3] == "1":
-                        block[i] = InstructionSet(ins.params[1], ins.params[2])
+                    elif operator == MUL and b == ONE:
+                        block[i] = set_(result, a)
                         found = True
 
-                    elif ins.params[0] in ("shr", "shl") and ins.params[3] == "0":
-                        block[i] = InstructionSet(ins.params[1], ins.params[2])
+                    elif operator in (SHR, SHL) and b == ZERO:
+                        block[i] = set_(result, a)
                         found = True
 
-                    if ins.params[0] in Operations.PRECALC:
+                    if (func := cls._PRECALC_IDS.get(operator)) is not None and \
+                            (a := numbers[a]) is not None and (b := numbers[b]) is not None:
+
                         try:
-                            a = float(ins.params[2])
-                            if a.is_integer():
-                                a = int(a)
-                            b = float(ins.params[3])
-                            if b.is_integer():
-                                b = int(b)
-
-                            result = float(Operations.PRECALC[ins.params[0]](a, b))
-                            if result.is_integer():
-                                result = int(result)
+                            value = float(func(a, b))
+                            if value.is_integer():
+                                value = int(value)
 
-                            block[i] = InstructionSet(ins.params[1], result)
+                            block[i] = set_(result, symbols.intern(str(value)))
                             found = True
 
                         except (ArithmeticError, ValueError, TypeError):
@@ -326,39 +408,44 @@ class Optimizer:
         return found
 
     @classmethod
-    def _eliminate_common_subexpressions(cls, code: Blocks) -> bool:
+    def _eliminate_common_subexpressions(cls, code: Blocks, shared: set[int]) -> bool:
         found = False
         for block in code:
-            operations: dict[tuple[str, str, str], str] = {}
+            operations: dict[tuple[int, int, int], int] = {}
             for i, ins in enumerate(block):
-                if isinstance(ins, InstructionOp):
-                    operands = (ins.params[0], ins.params[2], ins.params[3])
+                if ins.op == OP:
+                    args = ins.args
+                    if shared and not shared.isdisjoint(args):
+                        continue
+
+                    operands = (args[0], args[2], args[3])
                     if operands in operations:
-                        block[i] = InstructionSet(ins.params[1], operations[operands])
+                        block[i] = IRInstruction.set(args[1], operations[operands])
                         found = True
                     else:
-                        operations[operands] = ins.params[1]
+                        operations[operands] = args[1]
 
         return found
 
     @classmethod
-    def _resolve_ssa(cls, code: Blocks):
+    def _resolve_ssa(cls, code: Blocks, symbols: Symbols):
         for block in code:
             for i, ins in enumerate(block):
-                if isinstance(ins, Phi):
+                if ins.op == PHI:
                     for b in ins.inputs_:
-                        b.add_phi.append(InstructionSet(ins.output, f"{ins.variable}:{b.variables[ins.variable]}"))
-                    block[i] = InstructionNoop()
+                        b.add_phi.append(IRInstruction.set(
+                            ins.output, symbols.version(ins.variable, b.variables[ins.variable])))
+                    block[i] = IR_NOOP
 
         for block in code:
-            if isinstance(block[-1], InstructionJump):
+            if block[-1].op == JUMP:
                 block[-1:] = block.add_phi + block[-1:]
 
             else:
                 block += block.add_phi
 
     @classmethod
-    def _optimize_immediate_move(cls, code: Instructions) -> bool:
+    def _optimize_immediate_move(cls, code: Instructions, shared: set[int]) -> bool:
         """
         Remove single use temporary variables that are immediately moved into a named one.
 
@@ -373,110 +460,167 @@ class Optimizer:
         jump label equal __tmp0 0
 
         jump label greaterThanEq x y
+
+        Variables shared with other regions are not removed, and are not moved over subroutine calls.
         """
 
-        uses = defaultdict(int)
+        # All changes are made in one call, in the same order as when the code is scanned from the start after each
+        # change. The uses of variables are updated incrementally and the scan only goes back to the first instruction
+        # which could be affected by a change.
+
+        # variable -> uses as (instruction index, order in the instruction, parameter index, is output)
+        uses: dict[int, list[tuple[int, int, int, bool]]] = defaultdict(list)
         inputs = defaultdict(int)
         outputs = defaultdict(int)
-        first_uses = {}
+        # variable -> indices of sets and jumps which could remove it
+        candidates: dict[int, list[int]] = defaultdict(list)
 
-        for i, ins in enumerate(code):
-            for j in ins.inputs:
-                param = ins.params[j]
-                inputs[param] += 1
-                uses[param] += 1
-                if uses[param] == 1:
-                    first_uses[param] = (i, j)
+        def candidate(ins_: IRInstruction) -> int | None:
+            if ins_.op == SET:
+                return ins_.args[1] if ins_.args[1] not in shared else None
 
-            for j in ins.outputs:
-                param = ins.params[j]
-                outputs[param] += 1
-                uses[param] += 1
-                if uses[param] == 1:
-                    first_uses[param] = (i, j)
+            elif ins_.op == JUMP and ins_.args[1] == EQUAL and ins_.args[3] == ZERO:
+                return ins_.args[2] if ins_.args[2] not in shared else None
+
+            return None
+
+        # number of subroutine calls before every instruction
+        calls = list(itertools.accumulate((isinstance(ins_.source, InstructionCall) for ins_ in code), initial=0))
+
+        def variables(i_: int) -> list[int]:
+            return [code[i_].args[j_] for j_ in itertools.chain(code[i_].inputs, code[i_].outputs)]
+
+        def update(i_: int, add: bool):
+            ins_ = code[i_]
+            for k, j_ in enumerate(itertools.chain(ins_.inputs, ins_.outputs)):
+                param_ = ins_.args[j_]
+                output = k >= len(ins_.inputs)
+                if add:
+                    bisect.insort(uses[param_], (i_, k, j_, output))
+                else:
+                    del uses[param_][bisect.bisect_left(uses[param_], (i_, k, j_, output))]
+
+                (outputs if output else inputs)[param_] += 1 if add else -1
+
+            if (name := candidate(ins_)) is not None:
+                if add:
+                    bisect.insort(candidates[name], i_)
+                else:
+                    del candidates[name][bisect.bisect_left(candidates[name], i_)]
 
         for i, ins in enumerate(code):
-            if isinstance(ins, InstructionSet):
-                tmp = ins.params[1]
-                first = first_uses[tmp]
-                if inputs[tmp] == 1 and outputs[tmp] == 1 and i != first[0]:
-                    code[first[0]].params[first[1]] = ins.params[0]
-                    code[i] = InstructionNoop()
-                    return True
-
-            elif isinstance(ins, InstructionJump) and ins.params[1] == "equal" and ins.params[3] == "0":
-                tmp = ins.params[2]
-                first = first_uses[tmp]
-                if inputs[tmp] == 1 and outputs[tmp] == 1 and i != first[0] and code[first[0]].params[0] in Optimizer.JUMP_TRANSLATION:
-                    ins.params[2:] = code[first[0]].params[2:]
-                    ins.params[1] = Optimizer.JUMP_TRANSLATION[code[first[0]].params[0]]
-                    code[first[0]] = InstructionNoop()
-
-        return False
+            for k, j in enumerate(itertools.chain(ins.inputs, ins.outputs)):
+                param = ins.args[j]
+                output = k >= len(ins.inputs)
+                uses[param].append((i, k, j, output))
+                (outputs if output else inputs)[param] += 1
+
+            if (tmp := candidate(ins)) is not None:
+                candidates[tmp].append(i)
+
+        changed = False
+        i = 0
+        while i < len(code):
+            ins = code[i]
+            changes = None
+
+            if ins.op == SET:
+                tmp = ins.args[1]
+                first = uses[tmp][0][0], uses[tmp][0][2]
+                if inputs[tmp] == 1 and outputs[tmp] == 1 and i != first[0] and tmp not in shared and \
+                        (ins.args[0] not in shared or calls[first[0]] == calls[i]):
+
+                    changes = [first[0], i]
+                    affected = variables(first[0]) + variables(i)
+                    update(first[0], False)
+                    update(i, False)
+
+                    code[first[0]].args[first[1]] = ins.args[0]
+                    code[i] = IR_NOOP
+
+            elif ins.op == JUMP and ins.args[1] == EQUAL and ins.args[3] == ZERO:
+                tmp = ins.args[2]
+                first = uses[tmp][0][0], uses[tmp][0][2]
+                if inputs[tmp] == 1 and outputs[tmp] == 1 and i != first[0] and tmp not in shared and \
+                        code[first[0]].args[0] in Optimizer._JUMP_TRANSLATION_IDS:
+
+                    changes = [first[0], i]
+                    affected = variables(first[0]) + variables(i)
+                    update(first[0], False)
+                    update(i, False)
+
+                    ins.args[2:] = code[first[0]].args[2:]
+                    ins.args[1] = Optimizer._JUMP_TRANSLATION_IDS[code[first[0]].args[0]]
+                    code[first[0]] = IR_NOOP
+
+            if changes is None:
+                i += 1
+                continue
+
+            changed = True
+            for index in changes:
+                update(index, True)
+                affected += variables(index)
+
+            # instructions which can remove the changed variables have to be checked again
+            i = min([i] + [candidates[name][0] for name in set(affected)
+                           if candidates[name] and inputs[name] == 1 and outputs[name] == 1])
+
+        return changed
 
     @classmethod
-    def _remove_unused_variables(cls, code: Instructions):
+    def _remove_unused_variables(cls, code: Instructions, shared: set[int]):
         uses = defaultdict(int)
         first_uses = {}
 
         for i, ins in enumerate(code):
             for j in ins.inputs + ins.inputs:
-                param = ins.params[j]
+                param = ins.args[j]
                 uses[param] += 1
                 if uses[param] == 1:
                     first_uses[param] = i, j
 
         for i, ins in enumerate(code):
             if not ins.side_effects and len(ins.outputs) > 0:
-                if not any(uses.get(ins.params[j], 0) > 1 for j in ins.outputs):
-                    code[i] = InstructionNoop()
+                if not any(uses.get(ins.args[j], 0) > 1 or ins.args[j] in shared for j in ins.outputs):
+                    code[i] = IR_NOOP
 
     @classmethod
-    def _join_instructions(cls, code: Instructions):
+    def _join_instructions(cls, code: Instructions, symbols: Symbols):
         prints: list[tuple[int, str]] = []
         for i, ins in enumerate(code):
-            if isinstance(ins, InstructionPrint):
+            if ins.op == PRINT:
                 val = None
-                if (num := cls._parse_num(ins.params[0])) is not None:
+                param = symbols.names[ins.args[0]]
+                if (num := symbols.numbers[ins.args[0]]) is not None:
                     val = num
-                elif ins.params[0].startswith("\"") and ins.params[0].endswith("\""):
-                    val = ins.params[0][1:-1]
+                elif param.startswith("\"") and param.endswith("\""):
+                    val = param[1:-1]
 
                 if val is None:
-                    cls._join_instructions_flush(code, prints)
+                    cls._join_instructions_flush(code, prints, symbols)
                 else:
                     prints.append((i, str(val)))
 
             else:
-                cls._join_instructions_flush(code, prints)
+                cls._join_instructions_flush(code, prints, symbols)
 
     @classmethod
-    def _join_instructions_flush(cls, code: Instructions, prints: list[tuple[int, str]]):
+    def _join_instructions_flush(cls, code: Instructions, prints: list[tuple[int, str]], symbols: Symbols):
         if len(prints) > 1:
             buffer = ""
             for _, p in prints:
                 buffer += p
 
-            code[prints[0][0]].params[0] = f"\"{buffer}\""
+            code[prints[0][0]].args[0] = symbols.intern(f"\"{buffer}\"")
             for i, _ in prints[1:]:
-                code[i] = InstructionNoop()
+                code[i] = IR_NOOP
 
         prints.clear()
 
     @classmethod
     def _remove_noops(cls, code: Instructions):
-        code[:] = [ins for ins in code if ins != InstructionNoop()]
-
-    @classmethod
-    def _parse_num(cls, value: str) -> int | float | None:
-        try:
-            val = float(value)
-            if val.is_integer():
-                val = int(val)
-            return val
-
-        except ValueError:
-            return None
+        code[:] = [ins for ins in code if ins.op != NOOP]
 
     class _ExecutionOptimizer:
         """
@@ -1,9 +1,10 @@
-from .tokens import TokenType, Token
+from .tokens import TokenType, Token, TokenTable
 from .node import *
 from .generic_parser import GenericParser
+from .util import trampoline
 from .asm.parser import AsmParser
 
-from typing import Callable
+from typing import Callable, Generator
 
 
 class Parser(GenericParser):
@@ -11,10 +12,19 @@ class Parser(GenericParser):
     Parses mlog++ code.
     """
 
+    _operator_kind: int = TokenTable.kind(TokenType.OPERATOR)
+
     def _init(self):
         self.const_expressions = True
 
     def parse_CodeBlock(self, end_at_rbrace: bool, create_scope: bool = False) -> Node:
+        return trampoline(self.iter_CodeBlock(end_at_rbrace, create_scope))
+
+    def iter_CodeBlock(self, end_at_rbrace: bool, create_scope: bool = False) -> Generator[Generator, Node, Node]:
+        """
+        Parse a block of code, nested blocks are yielded to be parsed by a `trampoline`.
+        """
+
         pos = None
         code = []
         end_by_rbrace = False
@@ -29,7 +39,7 @@ class Parser(GenericParser):
                 end_by_rbrace = True
                 break
 
-            code.append(self.parse_Statement())
+            code.append((yield self.iter_Statement()))
 
         if end_at_rbrace and not end_by_rbrace:
             Error.unexpected_eof(pos)
@@ -39,7 +49,7 @@ class Parser(GenericParser):
     def parse_AsmCodeBlock(self) -> Node:
         self.next_token(TokenType.LBRACE)
 
-        tokens = []
+        start = self.pos + 1
 
         depth = 1
         while self.has_token():
@@ -49,13 +59,16 @@ class Parser(GenericParser):
                 depth -= 1
                 if depth == 0:
                     self.next_token()
-                    break
+                    return AsmParser().parse(self.tokens.slice(start, self.pos))
 
-            tokens.append(self.next_token())
+            self.pos += 1
 
-        return AsmParser().parse(tokens)
+        return AsmParser().parse(self.tokens.slice(start, self.pos + 1))
 
     def parse_Statement(self) -> Node:
+        return trampoline(self.iter_Statement())
+
+    def iter_Statement(self) -> Generator[Generator, Node, Node]:
         if self.lookahead_token(TokenType.KEYWORD, "asm"):
             self.next_token()
 
@@ -86,7 +99,7 @@ class Parser(GenericParser):
 
             if tok.value in Token.BLOCK_STATEMENTS:
                 self.prev_token()
-                return self.parse_BlockStatement()
+                return (yield self.iter_BlockStatement())
 
             match tok.value:
                 case "return":
@@ -150,7 +163,7 @@ class Parser(GenericParser):
 
         elif self.lookahead_token(TokenType.LBRACE):
             self.next_token()
-            return self.parse_CodeBlock(True, create_scope=True)
+            return (yield self.iter_CodeBlock(True, create_scope=True))
 
         return self.parse_Value()
 
@@ -219,30 +232,33 @@ class Parser(GenericParser):
         block = self.parse_AsmCodeBlock()
         return AsmBlockNode(block.get_pos(), block, inputs, outputs)
 
-    def parse_if(self) -> tuple[Node, Node, Position]:
+    def iter_if(self) -> Generator[Generator, Node, tuple[Node, Node, Position]]:
         self.next_token(TokenType.LPAREN)
         condition = self.parse_Value()
         self.next_token(TokenType.RPAREN)
 
         self.next_token(TokenType.LBRACE)
-        code = self.parse_CodeBlock(True)
+        code = yield self.iter_CodeBlock(True)
         end = self.next_token(TokenType.RBRACE)
 
         return condition, code, end.pos
 
     def parse_BlockStatement(self) -> Node:
+        return trampoline(self.iter_BlockStatement())
+
+    def iter_BlockStatement(self) -> Generator[Generator, Node, Node]:
         tok = self.next_token(TokenType.KEYWORD)
 
         match tok.value:
             case "if":
-                condition, code, end_pos = self.parse_if()
+                condition, code, end_pos = yield self.iter_if()
 
                 node = IfNode(tok.pos + end_pos, condition, code, None)
                 inner_node = node
 
                 while self.lookahead_token(TokenType.KEYWORD, "elif"):
                     tok = self.next_token()
-                    condition, code, end_pos = self.parse_if()
+                    condition, code, end_pos = yield self.iter_if()
 
                     inner_node.else_code = IfNode(tok.pos + end_pos, condition, code, None)
                     inner_node = inner_node.else_code
@@ -251,7 +267,7 @@ class Parser(GenericParser):
                     self.next_token()
 
                     self.next_token(TokenType.LBRACE)
-                    code = self.parse_CodeBlock(True)
+                    code = yield self.iter_CodeBlock(True)
                     self.next_token(TokenType.RBRACE)
 
                     inner_node.else_code = code
@@ -267,7 +283,7 @@ class Parser(GenericParser):
                 self.next_token(TokenType.RPAREN)
 
                 self.next_token(TokenType.LBRACE)
-                code = self.parse_CodeBlock(True)
+                code = yield self.iter_CodeBlock(True)
                 end = self.next_token(TokenType.RBRACE)
 
                 return WhileNode(tok.pos + end.pos, condition, code)
@@ -286,12 +302,12 @@ class Parser(GenericParser):
                     self.next_token(TokenType.RPAREN)
 
                     self.next_token(TokenType.LBRACE)
-                    code = self.parse_CodeBlock(True)
+                    code = yield self.iter_CodeBlock(True)
                     end = self.next_token(TokenType.RBRACE)
 
                     return RangeNode(tok.pos + end.pos, name.value, a, b, code)
 
-                init = self.parse_Statement()
+                init = yield self.iter_Statement()
                 self.next_token(TokenType.SEMICOLON)
                 condition = self.parse_Value()
                 self.next_token(TokenType.SEMICOLON)
@@ -299,7 +315,7 @@ class Parser(GenericParser):
                 self.next_token(TokenType.RPAREN)
 
                 self.next_token(TokenType.LBRACE)
-                code = self.parse_CodeBlock(True)
+                code = yield self.iter_CodeBlock(True)
                 end = self.next_token(TokenType.RBRACE)
 
                 return ForNode(tok.pos + end.pos, init, condition, action, code)
@@ -446,25 +462,6 @@ class Parser(GenericParser):
 
             return node
 
-    def parse_unaryOp(self, operators: tuple[str, ...], lower_func: Callable[[], Node],
-                      token_type: TokenType = TokenType.OPERATOR) -> Node:
-
-        operations = []
-        while self.has_token():
-            if self.lookahead_token(token_type, operators):
-                op = self.next_token()
-                operations.append(op)
-
-            else:
-                break
-
-        node = lower_func()
-
-        for op in reversed(operations):
-            node = UnaryOpNode(op.pos + node.get_pos(), op.value, node)
-
-        return node
-
     def parse_Value(self) -> Node:
         if self.lookahead_token(TokenType.KEYWORD):
             tok = self.next_token()
@@ -480,82 +477,51 @@ class Parser(GenericParser):
     def parse_Assignment(self) -> Node:
         return self.parse_binaryOp(
             ("=", "+=", "-=", "%=", "&=", "|=", "^=", "*=", "/=", "**=", "//=", "<<=", ">>="),
-            self.parse_OrTest,
+            self.parse_OperatorExpr,
             TokenType.SET,
             True
         )
 
-    def parse_OrTest(self) -> Node:
-        return self.parse_binaryOp(
-            ("||",),
-            self.parse_AndTest
-        )
+    def parse_OperatorExpr(self, min_precedence: int = 1) -> Node:
+        """
+        Parse unary and binary operations by precedence climbing.
 
-    def parse_AndTest(self) -> Node:
-        return self.parse_binaryOp(
-            ("&&",),
-            self.parse_NotTest
-        )
+        Args:
+            min_precedence: Minimal binding power of the parsed operators.
 
-    def parse_NotTest(self) -> Node:
-        return self.parse_unaryOp(
-            ("!",),
-            self.parse_Comparison
-        )
+        Returns:
+            The parsed operation.
+        """
 
-    def parse_Comparison(self) -> Node:
-        return self.parse_binaryOp(
-            ("<", ">", "==", "===", ">=", "!="),
-            self.parse_OrExpr
-        )
-
-    def parse_OrExpr(self) -> Node:
-        return self.parse_binaryOp(
-            ("|",),
-            self.parse_XorExpr
-        )
+        tokens = self.tokens
+        kinds = tokens.kinds
+        operator = self._operator_kind
 
-    def parse_XorExpr(self) -> Node:
-        return self.parse_binaryOp(
-            ("^",),
-            self.parse_AndExpr
-        )
+        i = self.pos + 1
+        if i < len(kinds) and kinds[i] == operator and \
+                (precedence := Operations.UNARY_PRECEDENCE.get(tokens.strings[tokens.values[i]], 0)) >= min_precedence:
 
-    def parse_AndExpr(self) -> Node:
-        return self.parse_binaryOp(
-            ("&",),
-            self.parse_ShiftExpr
-        )
+            op = self.next_token()
+            node = self.parse_OperatorExpr(precedence)
+            node = UnaryOpNode(op.pos + node.get_pos(), op.value, node)
 
-    def parse_ShiftExpr(self) -> Node:
-        return self.parse_binaryOp(
-            ("<<", ">>"),
-            self.parse_ArithExpr
-        )
+        else:
+            node = self.parse_Call()
 
-    def parse_ArithExpr(self) -> Node:
-        return self.parse_binaryOp(
-            ("+", "-"),
-            self.parse_Term
-        )
+        while True:
+            i = self.pos + 1
+            if i >= len(kinds) or kinds[i] != operator:
+                break
 
-    def parse_Term(self) -> Node:
-        return self.parse_binaryOp(
-            ("*", "/", "//", "%"),
-            self.parse_Factor
-        )
+            precedence = Operations.PRECEDENCE.get(tokens.strings[tokens.values[i]], 0)
+            if precedence < min_precedence:
+                break
 
-    def parse_Factor(self) -> Node:
-        return self.parse_unaryOp(
-            ("-", "~"),
-            self.parse_Power
-        )
+            op = self.next_token()
+            right = self.parse_OperatorExpr(precedence + 1)
+            node = BinaryOpNode(node.get_pos() + right.get_pos(), node, op.value, right)
 
-    def parse_Power(self) -> Node:
-        return self.parse_binaryOp(
-            ("**",),
-            self.parse_Call
-        )
+        return node
 
     def parse_Call(self) -> Node:
         node = self.parse_Index()
@@ -1,4 +1,4 @@
-from .tokens import Token
+from .tokens import TokenTable
 
 
 class Preprocessor:
@@ -7,5 +7,5 @@ class Preprocessor:
     """
 
     @staticmethod
-    def preprocess(code: list[Token]) -> list[Token]:
+    def preprocess(code: TokenTable) -> TokenTable:
         return code
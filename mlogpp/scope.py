@@ -2,106 +2,230 @@ from .error import Error
 from .values import Value
 from .abi import ABI
 from .instruction import Instruction, InstructionSet
+from .context import CompilationContext
 
 
 class Scope:
-    scopes: list[dict[str, Value]] = []
-    names: list[str] = []
-    functions: list[str] = []
-    loops: list[str] = []
-    configurations: dict[str, Value] = []
+    """
+    Variables of the scopes of the compiled code.
+
+    The enum, builtin and configuration scopes are searched after all other scopes.
+    Every other name has a stack of the indices of the scopes which define it,
+    so a name is found without searching all scopes.
+    """
+
+    # number of scopes searched after all other scopes
+    BASE_SCOPES = 3
 
     @classmethod
-    def push(cls, name: str):
-        cls.scopes.append({})
-        cls.names.append(name)
+    def push(cls, name: str, captured: dict[str, Value] | None = None):
+        """
+        Push a scope.
+
+        Args:
+            name: Name of the scope.
+            captured: Scope captured by the inlined function, which is shared by every call and not modified.
+        """
+
+        ctx = CompilationContext.current()
+        ctx.scopes.append({})
+        ctx.captured.append(captured)
+        ctx.scope_names.append(name)
+
+        if captured is not None:
+            index = len(ctx.scopes) - 1
+            for key in captured:
+                ctx.bindings.setdefault(key, []).append(index)
 
         if ABI.is_function(name):
-            cls.functions.append(name)
+            ctx.functions.append(name)
 
         if ABI.is_loop(name):
-            cls.loops.append(name)
+            ctx.loops.append(name)
 
     @classmethod
     def pop(cls):
-        cls.scopes.pop(-1)
-        name = cls.names.pop(-1)
+        ctx = CompilationContext.current()
+        scope = ctx.scopes.pop(-1)
+        captured = ctx.captured.pop(-1)
+        name = ctx.scope_names.pop(-1)
+
+        for key in scope.keys() | captured.keys() if captured is not None else scope:
+            bindings = ctx.bindings[key]
+            bindings.pop(-1)
+            if len(bindings) == 0:
+                del ctx.bindings[key]
 
         if ABI.is_function(name):
-            cls.functions.pop(-1)
+            ctx.functions.pop(-1)
 
         if ABI.is_loop(name):
-            cls.loops.pop(-1)
+            ctx.loops.pop(-1)
 
     @classmethod
     def enum(cls, data: dict[str, Value] | None = None):
-        cls.scopes[0] = data if data is not None else {}
+        CompilationContext.current().scopes[0] = data if data is not None else {}
 
     @classmethod
     def reset(cls, builtins: dict[str, Value]):
-        cls.scopes = [{}, builtins, {}, {}]
-        cls.names = ["<enum>", "<builtins>", "<config>", "<main>"]
-        cls.functions = []
-        cls.loops = []
-        cls.configurations = {}
+        ctx = CompilationContext.current()
+        ctx.scopes = [{}, builtins, {}, {}]
+        ctx.captured = [None, None, None, None]
+        ctx.bindings = {}
+        ctx.scope_names = ["<enum>", "<builtins>", "<config>", "<main>"]
+        ctx.functions = []
+        ctx.loops = []
+        ctx.configurations = {}
+
+    @classmethod
+    def scopes(cls) -> list[dict[str, Value]]:
+        return CompilationContext.current().scopes
+
+    @classmethod
+    def functions(cls) -> list[str]:
+        return CompilationContext.current().functions
+
+    @classmethod
+    def configurations(cls) -> dict[str, Value]:
+        return CompilationContext.current().configurations
 
     @classmethod
     def get_config(cls) -> list[Instruction]:
-        return [InstructionSet(name, value.get()) for name, value in cls.configurations.items()]
+        return [InstructionSet(name, value.get()) for name, value in CompilationContext.current().configurations.items()]
 
     @classmethod
     def name(cls) -> str:
-        return cls.names[-1]
+        return CompilationContext.current().scope_names[-1]
 
     @classmethod
     def function(cls) -> str | None:
-        return cls.functions[-1] if len(cls.functions) > 0 else None
+        functions = CompilationContext.current().functions
+        return functions[-1] if len(functions) > 0 else None
 
     @classmethod
     def loop(cls) -> str | None:
-        return cls.loops[-1] if len(cls.loops) > 0 else None
+        ctx = CompilationContext.current()
+        loops = ctx.loops
+
+        # labels of loops outside the function differ between calls
+        for trace in ctx.traces:
+            if len(loops) <= trace.loops:
+                trace.storable = False
+
+        return loops[-1] if len(loops) > 0 else None
 
     @classmethod
     def get(cls, node, name: str) -> Value:
-        scope = cls._find(node, name, True)
+        scope, _ = cls._find(node, name, True)
 
         return scope[name]
 
+    @classmethod
+    def lookup(cls, name: str) -> Value | None:
+        """
+        Get a variable without raising an error if it doesn't exist.
+        """
+
+        found = cls._find(None, name, False)
+        return found[0][name] if found is not None else None
+
     @classmethod
     def set(cls, node, name: str, value: Value):
-        scope = cls._find(node, name, False)
+        found = cls._find(node, name, False, True)
 
-        if scope is None:
-            cls.scopes[-1][name] = value
+        if found is None:
+            cls._bind(CompilationContext.current(), name, value)
 
         else:
+            scope, writable = found
             if scope[name].type() != value.type():
                 Error.undefined_variable(node, name)
 
-            scope[name] = value
+            # a captured variable is replaced in the scope of the call
+            writable[name] = value
 
     @classmethod
     def delete(cls, node, name: str):
-        scope = cls._find(node, name, True)
+        """
+        Delete a variable. Variables captured by an inlined function are not deleted.
+        """
+
+        ctx = CompilationContext.current()
+        _, writable = cls._find(node, name, True, True)
+
+        if name in writable:
+            del writable[name]
 
-        del scope[name]
+            if (bindings := ctx.bindings.get(name)) is not None and ctx.scopes[bindings[-1]] is writable:
+                captured = ctx.captured[bindings[-1]]
+                if captured is None or name not in captured:
+                    bindings.pop(-1)
+                    if len(bindings) == 0:
+                        del ctx.bindings[name]
 
     @classmethod
     def declare(cls, node, name: str, value: Value) -> str:
-        if name in cls.scopes[-1]:
+        ctx = CompilationContext.current()
+        captured = ctx.captured[-1]
+        if name in ctx.scopes[-1] or (captured is not None and name in captured):
             Error.already_defined_var(node, name)
 
         else:
-            cls.scopes[-1][name] = value
-            return f"{name}@{cls.names[-1]}"
+            cls._bind(ctx, name, value)
+            return f"{name}@{ctx.scope_names[-1]}"
+
+    @classmethod
+    def _bind(cls, ctx: CompilationContext, name: str, value: Value):
+        """
+        Add a variable to the innermost scope.
+        """
+
+        ctx.scopes[-1][name] = value
+        if len(ctx.scopes) > cls.BASE_SCOPES:
+            ctx.bindings.setdefault(name, []).append(len(ctx.scopes) - 1)
 
     @classmethod
-    def _find(cls, node, name: str, error: bool) -> dict[str, Value] | None:
-        for scope in reversed(cls.scopes):
-            if name in scope:
-                return scope
+    def _find(cls, node, name: str, error: bool, write: bool = False) \
+            -> tuple[dict[str, Value], dict[str, Value]] | None:
+        """
+        Find the innermost scope defining a name.
+
+        Returns:
+            The scope containing the variable and the scope new values are written to,
+            which is the scope of the call for variables captured by an inlined function.
+        """
+
+        ctx = CompilationContext.current()
+
+        if (bindings := ctx.bindings.get(name)) is not None:
+            index = bindings[-1]
+            scope = ctx.scopes[index]
+            found = (scope, scope) if name in scope else (ctx.captured[index], scope)
+
+            if ctx.traces:
+                cls._trace(ctx, name, index, found[0], write)
+            return found
+
+        for i in range(cls.BASE_SCOPES - 1, -1, -1):
+            if name in (scope := ctx.scopes[i]):
+                if ctx.traces:
+                    cls._trace(ctx, name, i, scope, write)
+                return scope, scope
 
         if error:
             Error.undefined_variable(node, name)
 
         return None
+
+    @classmethod
+    def _trace(cls, ctx: CompilationContext, name: str, index: int, scope: dict[str, Value], write: bool):
+        """
+        Record a variable of a caller used by the bodies of inlined functions being recorded as templates.
+        """
+
+        for trace in ctx.traces:
+            if index < trace.depth:
+                if write:
+                    trace.storable = False
+                else:
+                    trace.read(name, scope[name])
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+
+from .compile import compile_code, compile_asm
+from .content import Content
+from .client import socket_path, owned, send
+from .error import Error
+from . import __version__
+
+
+def handle_request(message: dict) -> dict:
+    """
+    Handle a request of the compile daemon.
+
+    Args:
+        message: The request, with the code in `code` or a file to read in `path`, the `assembly` flag
+            and the targeted `game_version`. Imports are resolved relative to `path`, which should be absolute.
+
+    Returns:
+        The response, with the compiled code in `output` or the error converted by `Error.to_dict` in `error`.
+        Requests for another game version than the one of the daemon are not compiled,
+        the response only contains the `game_version` of the daemon.
+    """
+
+    if message.get("game_version") != Content.VERSION:
+        return {"version": __version__, "game_version": Content.VERSION}
+
+    path = message.get("path") or "<daemon>"
+
+    try:
+        if (code := message.get("code")) is None:
+            with open(path, "r") as f:
+                code = f.read()
+
+        output = (compile_asm if message.get("assembly") else compile_code)(code, path)
+
+    except Error as e:
+        return {"version": __version__, "error": e.to_dict()}
+
+    except (OSError, RecursionError) as e:
+        return {"version": __version__, "error": {"message": f"{type(e).__name__}: {e}"}}
+
+    # the client would compile the code again if the connection was closed, hiding the failure
+    except Exception as e:
+        return {"version": __version__, "error": {"message": f"Internal error: {type(e).__name__}: {e}"}}
+
+    return {"version": __version__, "output": output}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # a connection can send multiple requests
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError
+
+            except ValueError:
+                response = {"version": __version__, "error": {"message": "Invalid request"}}
+
+            else:
+                response = {"version": __version__} if message.get("ping") else handle_request(message)
+
+            send(self.request, response)
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Compile daemon, compiling requests sent to a Unix socket.
+
+    Every connection is handled by a thread. Compilations don't share state, so they run concurrently.
+    """
+
+    daemon_threads = True
+    # connecting with a timeout fails instead of waiting when the queue is full
+    request_queue_size = 128
+
+    def __init__(self, path: str | None = None):
+        """
+        Args:
+            path: Path of the socket, the default path if None.
+                A stale socket of the current user is replaced, but only one daemon can run on a socket.
+        """
+
+        path = path or socket_path(True)
+
+        if os.path.lexists(path):
+            if not owned(path):
+                raise OSError(f"{path} belongs to another user")
+
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                try:
+                    sock.connect(path)
+
+                # nothing is listening on the socket
+                except OSError:
+                    os.remove(path)
+
+                else:
+                    raise OSError(f"A daemon is already running on {path}")
+
+        super().__init__(path, _Handler)
+
+    def server_close(self):
+        super().server_close()
+
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
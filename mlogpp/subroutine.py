@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from typing import Any
+
+from .abi import ABI
+from .context import CompilationContext
+from .generator import Gen
+from .inliner import Inliner
+from .instruction import Label, InstructionSetAddress, InstructionCall, InstructionReturn
+from .template import Template, TemplateTrace
+from .value_types import Type
+from .values import Value
+
+
+class Subroutine:
+    """
+    Body of a function generated once and called by jumping to it, at the call sites chosen by the `Inliner`.
+
+    The caller stores the address to return to in `ABI.function_return_pos` of the function,
+    the body returns by setting `@counter` to it.
+    Calling a subroutine executes 3 more instructions than inlining its body.
+    """
+
+    __slots__ = ("entry", "trace", "size")
+
+    # label of the first instruction of the body
+    entry: str
+    trace: TemplateTrace
+    # number of instructions generated by the body
+    size: int
+
+    def __init__(self, entry: str, trace: TemplateTrace, size: int):
+        self.entry = entry
+        self.trace = trace
+        self.size = size
+
+    @staticmethod
+    def generate(name: str, code, ret: Type) -> tuple[Subroutine | None, TemplateTrace | None]:
+        """
+        Generate the body of a function as a subroutine and call it, or inline it if it can't be repeated.
+
+        Args:
+            name: Name of the function.
+            code: The body, generated in the scope of the call.
+            ret: Return type of the function.
+
+        Returns:
+            The subroutine, None if the body was inlined, and the trace of the body.
+        """
+
+        ctx = CompilationContext.current()
+        entry = ABI.function_entry(name, len(ctx.subroutines))
+
+        instructions = ctx.instructions
+        ctx.instructions = [Label(entry)]
+        try:
+            trace = TemplateTrace.generate(code)
+
+            body = ctx.instructions
+            if trace is None:
+                instructions += body[1:]
+                return None, trace
+
+            size = len(body) - 1
+
+            Value.variable(ABI.function_return(name), ret).set(Value.null())
+            Gen.emit(
+                Label(ctx.end_label),
+                InstructionReturn(ABI.function_return_pos(name))
+            )
+
+        finally:
+            ctx.instructions = instructions
+
+        ctx.subroutines.append(body)
+
+        subroutine = Subroutine(entry, trace, size)
+        subroutine._emit_call(name)
+        return subroutine, trace
+
+    def call(self, name: str) -> bool:
+        """
+        Call the subroutine from the current call site.
+
+        Args:
+            name: Name of the function.
+
+        Returns:
+            True if it was called, False if the call site reads different variables
+            or the body would call a function recursively.
+        """
+
+        if not self.trace.matches():
+            return False
+
+        self._emit_call(name)
+        self.trace.repeat()
+        return True
+
+    def _emit_call(self, name: str):
+        ctx = CompilationContext.current()
+
+        # the call returns to the label emitted after the body of an inlined function
+        ctx.end_label = Gen.tmp()
+        Gen.emit(
+            InstructionSetAddress(ABI.function_return_pos(name), ctx.end_label),
+            InstructionCall(self.entry)
+        )
+
+
+class FunctionBody:
+    """
+    Body of a function, generated once and copied to the following call sites or called as a subroutine.
+    """
+
+    code: Any
+    name: str
+    ret: Type
+    templates: list[Template]
+    subroutine: Subroutine | None
+    # the body can't be called as a subroutine
+    inline: bool
+    # number of instructions generated by the first call
+    size: int | None
+
+    def __init__(self, code: Any, name: str, ret: Type):
+        self.code = code
+        self.name = name
+        self.ret = ret
+        self.templates = []
+        self.subroutine = None
+        self.inline = False
+        self.size = None
+
+    def __str__(self):
+        return str(self.code)
+
+    def gen(self, node, params: list[Value]):
+        """
+        Generate the body at a call, after the parameters are set.
+
+        Args:
+            node: The call.
+            params: Values of the arguments.
+        """
+
+        site = Inliner.call(node, self, params)
+        if not site.inline:
+            if self._call():
+                return
+
+            # the body can't be repeated or reads different variables at this call
+            site.inline = CompilationContext.current().inline[node] = True
+
+        else:
+            self._inline()
+
+        Value.variable(ABI.function_return(self.name), self.ret).set(Value.null())
+
+    def _call(self) -> bool:
+        """
+        Call the body as a subroutine, or inline it if it can't be called.
+
+        Returns:
+            True if it was called.
+        """
+
+        if self.subroutine is not None:
+            if self.subroutine.call(self.name):
+                return True
+
+        elif not self.inline:
+            ctx = CompilationContext.current()
+
+            start, size = ctx.tmp_index, len(ctx.instructions)
+            self.subroutine, trace = Subroutine.generate(self.name, self.code, self.ret)
+            if self.subroutine is not None:
+                self.size = self.subroutine.size
+                return True
+
+            self.inline = True
+            self.size = len(ctx.instructions) - size
+            if trace is not None and Template.ENABLED:
+                self.templates.append(Template(ctx.instructions[size:], start, ctx.tmp_index, ctx.end_label, trace))
+
+            return False
+
+        self._inline()
+        return False
+
+    def _inline(self):
+        ctx = CompilationContext.current()
+
+        size = len(ctx.instructions)
+        self._inline_body()
+        if self.size is None:
+            self.size = len(ctx.instructions) - size
+
+    def _inline_body(self):
+        if not Template.ENABLED:
+            self.code.gen()
+            return
+
+        for template in self.templates:
+            if template.instantiate():
+                return
+
+        if (template := Template.record(self.code)) is not None:
+            self.templates.insert(0, template)
+            del self.templates[Template.VARIANTS:]
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from .context import CompilationContext
+from .instruction import Instruction
+from .scope import Scope
+
+
+class TemplateTrace:
+    """
+    Records what the generated body of an inlined function depends on.
+    """
+
+    __slots__ = ("depth", "loops", "reads", "calls", "storable", "resets_enum", "node")
+
+    # index of the scope of the call, reads from scopes below it are recorded
+    depth: int
+    # number of loops outside the call
+    loops: int
+    # name -> first value read from outside the call and whether it was const
+    reads: dict[str, tuple[Any, bool]]
+    # functions inlined by the body, which can't be called recursively
+    calls: set[str]
+    storable: bool
+    # whether the body clears the enum scope, which is done by calls with parameters
+    resets_enum: bool
+    # last node of the body, for errors
+    node: Any
+
+    def __init__(self, depth: int, loops: int):
+        self.depth = depth
+        self.loops = loops
+        self.reads = {}
+        self.calls = set()
+        self.storable = True
+        self.resets_enum = False
+        self.node = None
+
+    def read(self, name: str, value: Any):
+        if name not in self.reads:
+            self.reads[name] = (value, value.const())
+
+    def matches(self) -> bool:
+        """
+        Check if the body would read the same variables at the current call site.
+
+        Returns:
+            True if it would, False if the call site reads different variables
+            or the body would call a function recursively.
+        """
+
+        ctx = CompilationContext.current()
+        if not self.calls.isdisjoint(ctx.functions):
+            return False
+
+        for name, (value, const) in self.reads.items():
+            if Scope.lookup(name) is not value or value.const() != const:
+                return False
+
+        return True
+
+    def repeat(self):
+        """
+        Update the compilation as if the body was generated again.
+        """
+
+        ctx = CompilationContext.current()
+        for trace in ctx.traces:
+            trace.calls |= self.calls
+
+        if self.resets_enum:
+            Scope.enum()
+        ctx.node = self.node
+
+    @staticmethod
+    def generate(code) -> TemplateTrace | None:
+        """
+        Generate the body of an inlined function, recording what it depends on.
+
+        Args:
+            code: The body, generated in the scope of the call.
+
+        Returns:
+            The trace, None if the body can't be repeated.
+        """
+
+        ctx = CompilationContext.current()
+        trace = TemplateTrace(len(ctx.scopes) - 1, len(ctx.loops))
+
+        enum, state = ctx.scopes[0], TemplateTrace._state(ctx)
+        ctx.traces.append(trace)
+        try:
+            code.gen()
+        finally:
+            ctx.traces.pop(-1)
+
+        # values which became const when written can't be written again
+        if not trace.storable or TemplateTrace._state(ctx) != state or \
+                any(value.const() != const for value, const in trace.reads.values()):
+
+            return None
+
+        trace.resets_enum = ctx.scopes[0] is not enum
+        trace.node = ctx.node
+        return trace
+
+    @staticmethod
+    def _state(ctx: CompilationContext) -> tuple:
+        """
+        Get the state of the compilation which bodies of functions can change but templates don't repeat.
+        """
+
+        return len(ctx.typenames), len(ctx.implementations), tuple(map(id, ctx.configurations.values())), \
+            tuple(map(id, ctx.scopes[2].values()))
+
+
+class Template:
+    """
+    Instructions generated by the body of an inlined function, with its temporaries as placeholders.
+
+    The names of parameters and locals are the same for every call, the temporaries, and the labels and scopes named
+    by them, are renumbered when the template is copied to another call site.
+    """
+
+    __slots__ = ("code", "size", "trace")
+
+    # reuse generated function bodies
+    ENABLED: bool = True
+    # maximum number of templates of a function, for call sites where it reads different variables
+    VARIANTS: int = 4
+
+    _TMP: re.Pattern = re.compile(r"__tmp(\d+)")
+
+    # instruction and its parameters, a parameter is either unchanged or a list of strings and temporaries,
+    # a temporary is its index relative to the first temporary of the body, 0 is the label returned to
+    code: list[tuple[Instruction, list[str | list[str | int]]]]
+    # number of temporaries created by the body
+    size: int
+    trace: TemplateTrace
+
+    def __init__(self, code: list[Instruction], start: int, end: int, end_label: str, trace: TemplateTrace):
+        return_label = int(end_label[len("__tmp"):])
+
+        def placeholder(match: re.Match) -> int | None:
+            index = int(match.group(1))
+            if index == return_label:
+                return 0
+            elif start < index <= end:
+                return index - start
+
+            return None
+
+        self.code = []
+        for ins in code:
+            params = []
+            for param in ins.params:
+                parts = []
+                last = 0
+                for match in Template._TMP.finditer(param):
+                    if (index := placeholder(match)) is not None:
+                        parts += [param[last:match.start()], index]
+                        last = match.end()
+
+                params.append(param if len(parts) == 0 else parts + [param[last:]])
+
+            self.code.append((ins, params))
+
+        self.size = end - start
+        self.trace = trace
+
+    @classmethod
+    def record(cls, code) -> Template | None:
+        """
+        Generate the body of an inlined function and record it as a template.
+
+        Args:
+            code: The body, generated in the scope of the call.
+
+        Returns:
+            The template, None if the body can't be reused, for example when it declares types or uses loops of the
+            caller.
+        """
+
+        ctx = CompilationContext.current()
+
+        start, size = ctx.tmp_index, len(ctx.instructions)
+        if (trace := TemplateTrace.generate(code)) is None:
+            return None
+
+        return Template(ctx.instructions[size:], start, ctx.tmp_index, ctx.end_label, trace)
+
+    @classmethod
+    def trace_call(cls, name: str):
+        """
+        Record a call of an inlined function by the bodies being recorded.
+        """
+
+        for trace in CompilationContext.current().traces:
+            trace.calls.add(name)
+
+    def instantiate(self) -> bool:
+        """
+        Copy the template to the current call site.
+
+        Returns:
+            True if the template was copied, False if the call site reads different variables
+            or the body would call a function recursively.
+        """
+
+        if not self.trace.matches():
+            return False
+
+        ctx = CompilationContext.current()
+        start = ctx.tmp_index
+        ctx.tmp_index += self.size
+        end_label = ctx.end_label
+
+        ctx.instructions += [ins.copy([
+            param if isinstance(param, str) else "".join(
+                part if isinstance(part, str) else f"__tmp{start + part}" if part > 0 else end_label for part in param
+            ) for param in params
+        ]) for ins, params in self.code]
+
+        self.trace.repeat()
+        return True
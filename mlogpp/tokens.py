@@ -1,6 +1,10 @@
+from __future__ import annotations
+
 import enum
+from array import array
+from typing import Iterable, Iterator
 
-from .util import Position, sanitize
+from .util import Position, Source, sanitize
 
 
 class TokenType(enum.Flag):
@@ -63,3 +67,310 @@ class Token:
 
     def pos(self) -> Position:
         return self.pos
+
+
+class TokenTable:
+    """
+    Compact storage of tokens in parallel columns.
+
+    Token types are stored as bit indices of `TokenType` flags, values as indices into a table of interned strings
+    and positions as lines and offsets into a list of sources.
+    Tokens are only created when requested.
+    """
+
+    # token types indexed by their bit index
+    TYPES: list[TokenType] = [TokenType(1 << i) for i in range(len(TokenType))]
+
+    kinds: array
+    values: array
+    lines: array
+    starts: array
+    ends: array
+    source_ids: array
+
+    strings: list[str]
+    string_ids: dict[str, int]
+    sources: list[Source]
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.values = array("I")
+        self.lines = array("i")
+        self.starts = array("i")
+        self.ends = array("i")
+        self.source_ids = array("H")
+
+        self.strings = []
+        self.string_ids = {}
+        self.sources = []
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[Token]) -> TokenTable:
+        """
+        Create a table from tokens.
+
+        Args:
+            tokens: The tokens to be stored.
+
+        Returns:
+            The created table.
+        """
+
+        table = cls()
+        for tok in tokens:
+            table.append(tok.type, tok.value, tok.pos)
+        return table
+
+    @staticmethod
+    def kind(type_: TokenType) -> int:
+        """
+        Get the bit index of a single token type.
+        """
+
+        return type_.value.bit_length() - 1
+
+    def string_id(self, value: str) -> int:
+        """
+        Intern a string.
+
+        Args:
+            value: The string to be interned.
+
+        Returns:
+            Index of the string in `strings`.
+        """
+
+        if (i := self.string_ids.get(value)) is None:
+            i = self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+    def source_id(self, source: Source) -> int:
+        """
+        Get index of a source, adding it if necessary.
+
+        Args:
+            source: The source.
+
+        Returns:
+            Index of the source in `sources`.
+        """
+
+        for i, src in enumerate(self.sources):
+            if src is source:
+                return i
+
+        self.sources.append(source)
+        return len(self.sources) - 1
+
+    def append_raw(self, kind: int, value: str, line: int, start: int, end: int, source_id: int):
+        """
+        Add a token without creating a position.
+        """
+
+        self.kinds.append(kind)
+        self.values.append(self.string_id(value))
+        self.lines.append(line)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.source_ids.append(source_id)
+
+    def append(self, type_: TokenType, value: str, pos: Position):
+        """
+        Add a token.
+
+        Args:
+            type_: Type of the token.
+            value: Value of the token.
+            pos: Position of the token.
+        """
+
+        self.append_raw(self.kind(type_), value, pos.line, pos.start, pos.end, self.source_id(pos.source))
+
+    def extend(self, other: TokenTable):
+        """
+        Add all tokens of another table.
+        """
+
+        self.replace(len(self), len(self), other)
+
+    def extend_shared(self, other: TokenTable, start: int, end: int):
+        """
+        Add a range of tokens from a table this one was copied from, without remapping ids.
+
+        Args:
+            other: The table, its strings and sources must be a prefix of the ones of this table.
+            start: Index of the first added token.
+            end: Index after the last added token.
+        """
+
+        self.kinds += other.kinds[start:end]
+        self.values += other.values[start:end]
+        self.lines += other.lines[start:end]
+        self.starts += other.starts[start:end]
+        self.ends += other.ends[start:end]
+        self.source_ids += other.source_ids[start:end]
+
+    def replace(self, start: int, end: int, other: TokenTable):
+        """
+        Replace a range of tokens with tokens of another table.
+
+        Args:
+            start: Index of the first replaced token.
+            end: Index after the last replaced token.
+            other: The table containing the new tokens.
+        """
+
+        self.kinds[start:end] = other.kinds
+        self.values[start:end] = self._remap(other.values, [self.string_id(value) for value in other.strings], "I")
+        self.lines[start:end] = other.lines
+        self.starts[start:end] = other.starts
+        self.ends[start:end] = other.ends
+        self.source_ids[start:end] = self._remap(other.source_ids, [self.source_id(src) for src in other.sources], "H")
+
+    @staticmethod
+    def _remap(ids: array, mapping: list[int], typecode: str) -> array:
+        """
+        Map ids from another table to ids in this one.
+        """
+
+        # tables copied from each other mostly share ids
+        if all(new == old for old, new in enumerate(mapping)):
+            return ids
+
+        return array(typecode, [mapping[i] for i in ids])
+
+    def slice(self, start: int, end: int) -> TokenTable:
+        """
+        Copy a range of tokens into a new table.
+
+        Args:
+            start: Index of the first token.
+            end: Index after the last token.
+
+        Returns:
+            The new table, sharing strings with this one.
+        """
+
+        table = TokenTable()
+        table.kinds = self.kinds[start:end]
+        table.values = self.values[start:end]
+        table.lines = self.lines[start:end]
+        table.starts = self.starts[start:end]
+        table.ends = self.ends[start:end]
+        table.source_ids = self.source_ids[start:end]
+        table.strings = self.strings
+        table.string_ids = self.string_ids
+        table.sources = self.sources
+        return table
+
+    def copy(self, end: int = None) -> TokenTable:
+        """
+        Copy the table, without sharing anything with it.
+
+        Args:
+            end: Index after the last copied token, None to copy all tokens.
+
+        Returns:
+            The new table.
+        """
+
+        table = self.slice(0, len(self.kinds) if end is None else end)
+        table.strings = self.strings.copy()
+        table.string_ids = self.string_ids.copy()
+        table.sources = self.sources.copy()
+        return table
+
+    def shift(self, start: int, source: Source, offset: int, lines: int):
+        """
+        Move the positions of tokens from one source.
+
+        Args:
+            start: Index of the first moved token.
+            source: Source of the moved tokens.
+            offset: Added to the offsets of the tokens.
+            lines: Added to the lines of the tokens.
+        """
+
+        source_id = self.source_id(source)
+        source_ids = self.source_ids[start:]
+        # check if all tokens are from the source
+        same_source = source_ids.count(source_id) == len(source_ids)
+
+        for column, delta in ((self.starts, offset), (self.ends, offset), (self.lines, lines)):
+            if delta == 0:
+                continue
+
+            if same_source:
+                column[start:] = array("i", [i + delta for i in column[start:]])
+            else:
+                column[start:] = array("i", [i + delta if src == source_id else i
+                                             for i, src in zip(column[start:], source_ids)])
+
+    def retype(self, old: TokenType, new: TokenType):
+        """
+        Change the type of all tokens of a type.
+        """
+
+        old, new = self.kind(old), self.kind(new)
+        for i, kind in enumerate(self.kinds):
+            if kind == old:
+                self.kinds[i] = new
+
+    def matches(self, i: int, type_: TokenType | None = None, value: str | tuple | list | None = None) -> bool:
+        """
+        Check if a token matches.
+
+        Args:
+            i: Index of the token.
+            type_: The expected type(s) of the token, None for any type.
+            value: The expected value(s) of the token, None for any value.
+
+        Returns:
+            True if the token matches, otherwise False.
+        """
+
+        # `_value_` avoids the slow `Flag.value` property
+        if type_ is not None and not (1 << self.kinds[i]) & type_._value_:
+            return False
+
+        if value is not None:
+            if isinstance(value, str):
+                return self.strings[self.values[i]] == value
+
+            return self.strings[self.values[i]] in value
+
+        return True
+
+    def type(self, i: int) -> TokenType:
+        return TokenTable.TYPES[self.kinds[i]]
+
+    def value(self, i: int) -> str:
+        return self.strings[self.values[i]]
+
+    def line(self, i: int) -> int:
+        return self.lines[i]
+
+    def pos(self, i: int) -> Position:
+        return Position(self.lines[i], self.starts[i], self.ends[i], self.sources[self.source_ids[i]])
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, i: int) -> Token:
+        if i < 0:
+            i += len(self)
+        return Token(TokenTable.TYPES[self.kinds[i]], self.strings[self.values[i]], self.pos(i))
+
+    def __iter__(self) -> Iterator[Token]:
+        return (self[i] for i in range(len(self)))
+
+    def tokens(self) -> list[Token]:
+        """
+        Create all tokens.
+
+        Returns:
+            List of the tokens.
+        """
+
+        return list(self)
@@ -1,3 +1,10 @@
+from __future__ import annotations
+
+import bisect
+import weakref
+from typing import Any, Generator
+
+
 def sanitize(s: str) -> str:
     """
     Sanitize a string.
@@ -26,24 +33,229 @@ def flatten(lst: list[list]) -> list:
     return [item for sublist in lst for item in sublist]
 
 
+def trampoline(gen: Generator[Generator, Any, Any]) -> Any:
+    """
+    Run a generator without recursion.
+
+    The generator yields generators to run instead of calling them recursively, and is resumed with their results.
+    Nested generators can do the same, so the depth of the nesting is not limited by the Python stack.
+
+    Args:
+        gen: The generator to be run.
+
+    Returns:
+        The result of the generator.
+    """
+
+    stack = [gen]
+    value = None
+    while stack:
+        try:
+            value = stack[-1].send(value)
+        except StopIteration as e:
+            stack.pop()
+            value = e.value
+        else:
+            stack.append(value)
+            value = None
+
+    return value
+
+
+class Source:
+    """
+    Source code shared by all positions in it.
+    """
+
+    _SOURCES: weakref.WeakValueDictionary[tuple[str, str], Source] = weakref.WeakValueDictionary()
+
+    __slots__ = ("code", "file", "_line_starts", "__weakref__")
+
+    code: str
+    file: str
+    _line_starts: list[int] | None
+
+    def __init__(self, code: str, file: str):
+        self.code = code
+        self.file = file
+        self._line_starts = None
+
+    @classmethod
+    def intern(cls, code: str, file: str) -> Source:
+        """
+        Get the shared source for a file.
+
+        Args:
+            code: Code of the file.
+            file: Name of the file.
+
+        Returns:
+            The source, reused while any position still refers to it.
+        """
+
+        key = (file, code)
+        if (source := cls._SOURCES.get(key)) is None:
+            source = cls(code, file)
+            cls._SOURCES[key] = source
+
+        return source
+
+    def __reduce__(self):
+        # unpickled sources are shared like any other
+        return Source.intern, (self.code, self.file)
+
+    def line_start(self, offset: int) -> int:
+        """
+        Get the offset of the start of a line.
+
+        Args:
+            offset: Offset of a character on the line.
+
+        Returns:
+            Offset of the first character of the line.
+        """
+
+        line_starts = self.line_starts()
+        return line_starts[bisect.bisect_right(line_starts, max(offset, 0)) - 1]
+
+    def line_starts(self) -> list[int]:
+        """
+        Get the offsets of the first characters of all lines.
+        """
+
+        if self._line_starts is None:
+            self._line_starts = line_starts = [0]
+            code = self.code
+            i = code.find("\n")
+            while i != -1:
+                line_starts.append(i + 1)
+                i = code.find("\n", i + 1)
+
+        return self._line_starts
+
+    def edit(self, start: int, end: int, text: str) -> Source:
+        """
+        Get the source with a range of code replaced.
+
+        Args:
+            start: Offset of the first replaced character.
+            end: Offset after the last replaced character.
+            text: The new text.
+
+        Returns:
+            The edited source, its line starts are moved instead of being searched for again.
+        """
+
+        source = Source.intern(self.code[:start] + text + self.code[end:], self.file)
+
+        if source._line_starts is None and self._line_starts is not None:
+            line_starts = self._line_starts
+            delta = len(text) - (end - start)
+
+            # line starts after newlines before the edit, in the new text and after the edit
+            source._line_starts = new_line_starts = line_starts[:bisect.bisect_right(line_starts, start)]
+            i = text.find("\n")
+            while i != -1:
+                new_line_starts.append(start + i + 1)
+                i = text.find("\n", i + 1)
+            new_line_starts += [i + delta for i in line_starts[bisect.bisect_right(line_starts, end):]]
+
+        return source
+
+    def line_number(self, offset: int) -> int:
+        """
+        Get the line number of a character.
+
+        Args:
+            offset: Offset of the character.
+
+        Returns:
+            Index of the line containing the character.
+        """
+
+        return bisect.bisect_right(self.line_starts(), max(offset, 0)) - 1
+
+    def line_offset(self, line: int) -> int:
+        """
+        Get the offset of a line.
+
+        Args:
+            line: Index of the line.
+
+        Returns:
+            Offset of the first character of the line, or length of the code if the line does not exist.
+        """
+
+        line_starts = self.line_starts()
+        return line_starts[max(line, 0)] if line < len(line_starts) else len(self.code)
+
+    def line_end(self, offset: int) -> int:
+        """
+        Get the offset of the end of a line.
+
+        Args:
+            offset: Offset of a character on the line.
+
+        Returns:
+            Offset of the newline ending the line, or length of the code.
+        """
+
+        end = self.code.find("\n", max(offset, 0))
+        return len(self.code) if end == -1 else end
+
+    def __repr__(self) -> str:
+        return f"Source(\"{sanitize(self.file)}\")"
+
+
 class Position:
     """
     Position in code.
+
+    Stores offsets into a shared `Source`, the line text is only extracted when needed.
     """
 
+    __slots__ = ("line", "start", "end", "source")
+
     line: int
     start: int
     end: int
-    code: str
-    file: str
-    
-    def __init__(self, line: int, start: int, end: int, code: str, file: str):
+    source: Source
+
+    def __init__(self, line: int, start: int, end: int, source: Source):
+        """
+        Args:
+            line: Line number, used for errors and to separate statements.
+            start: Offset of the first character in the source.
+            end: Offset after the last character in the source.
+            source: The source the offsets point into.
+        """
+
         self.line = line
         self.start = start
         self.end = end
-        self.code = sanitize(code)
-        self.file = file
-    
+        self.source = source
+
+    @property
+    def file(self) -> str:
+        return self.source.file
+
+    @property
+    def column(self) -> int:
+        """
+        Column of the first character.
+        """
+
+        return self.start - self.source.line_start(self.start)
+
+    @property
+    def code(self) -> str:
+        """
+        Sanitized line of code containing the position.
+        """
+
+        line_start = self.source.line_start(self.start)
+        return sanitize(self.source.code[line_start:self.source.line_end(line_start)])
+
     def arrows(self) -> str:
         """
         Generate error arrows for the position.
@@ -52,7 +264,8 @@ class Position:
             The generated arrows.
         """
 
-        return f"{' ' * self.start}{'^' * (self.end - self.start)}"
+        end = min(self.end, self.source.line_end(self.start))
+        return f"{' ' * self.column}{'^' * max(end - self.start, 1)}"
     
     def code_section(self) -> str:
         """
@@ -62,19 +275,21 @@ class Position:
             The code section in the position.
         """
 
-        return self.code[self.start:self.end]
+        return self.source.code[self.start:self.end]
     
     def __add__(self, other: "Position") -> "Position":
         """
         Create a range of two positions.
         """
 
-        if self.line == other.line:
-            return Position(self.line, min(self.start, other.start), max(self.end, other.end), self.code, self.file)
+        if other.source is not self.source:
+            return Position(self.line, self.start, self.end, self.source)
+        elif self.line == other.line:
+            return Position(self.line, min(self.start, other.start), max(self.end, other.end), self.source)
         elif self.line < other.line:
-            return Position(self.line, self.start, len(self.code), self.code, self.file)
+            return Position(self.line, self.start, self.source.line_end(self.start), self.source)
         else:
-            return Position(other.line, other.start, len(other.code), other.code, self.file)
+            return Position(other.line, other.start, other.source.line_end(other.start), other.source)
 
     def __iadd__(self, other: "Position") -> "Position":
         """
@@ -85,10 +300,10 @@ class Position:
         self.line = new.line
         self.start = new.start
         self.end = new.end
-        self.code = new.code
-        self.file = new.file
+        self.source = new.source
 
         return self
     
     def __repr__(self) -> str:
-        return f"Position({self.line}, {self.start}, {self.end}, \"{sanitize(self.code)}\", \"{sanitize(self.file)}\")"
+        column = self.column
+        return f"Position({self.line}, {column}, {column + self.end - self.start}, \"{self.code}\", \"{sanitize(self.file)}\")"
@@ -1,21 +1,46 @@
 from __future__ import annotations
 
+import threading
 import typing
+from collections import OrderedDict
 from dataclasses import dataclass
 
 from .error import Error
+from .context import CompilationContext
 
 
 @dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
 class Type:
-    types: set[str]
+    """
+    Type of a value.
+
+    Types are interned, every distinct type is a single object with a small integer id,
+    which is used to cache the results of type checks.
+    Types are created by `Type.intern` and the other class methods, never by the constructor.
+    """
+
+    types: frozenset[str]
     any_: bool
-    convertible_from: set[str]
-    convertible_to: set[str]
+    convertible_from: frozenset[str]
+    convertible_to: frozenset[str]
+    id: int
 
-    typenames = {}
     any_type = None
 
+    # (types, any_, convertible_from, convertible_to) -> type
+    _interned: typing.ClassVar[dict[tuple, Type]] = {}
+    # guards the interned types and memos, compilations can run in multiple threads
+    _lock: typing.ClassVar[threading.Lock] = threading.Lock()
+
+    # maximum number of entries of every memo, the oldest are removed first
+    MEMO_SIZE: typing.ClassVar[int] = 65536
+    # (id, id) -> result of `in`
+    _contains: typing.ClassVar[OrderedDict[tuple[int, int], bool]] = OrderedDict()
+    # id -> types of `list_types`
+    _expanded: typing.ClassVar[OrderedDict[int, tuple[Type, ...]]] = OrderedDict()
+    # (ids of parameter types, ids of return types) -> name of a function type
+    _function_names: typing.ClassVar[OrderedDict[tuple, str]] = OrderedDict()
+
     # builtin types
     NUM = None
     STR = None
@@ -39,25 +64,66 @@ class Type:
 
     reset_typenames = {}
 
+    @classmethod
+    def intern(cls, types: typing.Iterable[str], any_: bool = False, convertible_from: typing.Iterable[str] = (),
+               convertible_to: typing.Iterable[str] = ()) -> Type:
+        """
+        Get the type with the given properties, creating it if it doesn't exist yet.
+
+        Args:
+            types: Names of the types in the union.
+            any_: Accept any type.
+            convertible_from: Names of other types which can be converted to this type.
+            convertible_to: Names of other types which this type can be converted to.
+
+        Returns:
+            The type, the same object for equal properties.
+        """
+
+        key = (frozenset(types), any_, frozenset(convertible_from), frozenset(convertible_to))
+        if (type_ := cls._interned.get(key)) is None:
+            with cls._lock:
+                if (type_ := cls._interned.get(key)) is None:
+                    type_ = cls._interned[key] = cls(*key, len(cls._interned))
+
+        return type_
+
+    @classmethod
+    def _memoize(cls, memo: OrderedDict, key, value):
+        """
+        Store a result in a memo, removing the oldest results if it is full.
+
+        Returns:
+            The value.
+        """
+
+        with cls._lock:
+            memo[key] = value
+            while len(memo) > cls.MEMO_SIZE:
+                memo.popitem(last=False)
+
+        return value
+
     @classmethod
     def register(cls, name: str, type_: Type):
-        cls.typenames[name] = type_
+        CompilationContext.current().typenames[name] = type_
 
     @classmethod
     def reset_set(cls):
-        cls.reset_typenames = cls.typenames.copy()
+        cls.reset_typenames = CompilationContext.current().typenames.copy()
 
     @classmethod
     def reset(cls):
-        cls.typenames = cls.reset_typenames.copy()
+        CompilationContext.current().typenames = cls.reset_typenames.copy()
 
     @classmethod
     def simple(cls, name: str) -> Type:
-        if name in cls.typenames:
-            return cls.typenames[name]
+        typenames = CompilationContext.current().typenames
+        if name in typenames:
+            return typenames[name]
 
-        type_ = cls({name}, False, set(), set())
-        cls.typenames[name] = type_
+        type_ = cls.intern({name})
+        typenames[name] = type_
         return type_
 
     @classmethod
@@ -69,32 +135,54 @@ class Type:
 
     @classmethod
     def function(cls, params: list[Type], ret: Type | list[Type]) -> Type:
-        if isinstance(ret, list):
-            return cls.simple(f"({','.join(map(str, params))} -> {','.join(map(str, ret))})")
+        key = (tuple(param.id for param in params), tuple(r.id for r in ret) if isinstance(ret, list) else ret.id)
+        if (name := cls._function_names.get(key)) is None:
+            if isinstance(ret, list):
+                name = f"({','.join(map(str, params))} -> {','.join(map(str, ret))})"
+
+            else:
+                name = f"({','.join(map(str, params))} -> {ret})"
 
-        else:
-            return cls.simple(f"({','.join(map(str, params))} -> {ret})")
+            cls._memoize(cls._function_names, key, name)
+
+        return cls.simple(name)
+
+    def with_parents(self, parents: typing.Iterable[str]) -> Type:
+        """
+        Get this type with additional types it can be converted to.
+
+        Args:
+            parents: Names of the types.
+
+        Returns:
+            The type.
+        """
+
+        return Type.intern(self.types, self.any_, self.convertible_from, self.convertible_to | frozenset(parents))
 
     @classmethod
     def any(cls):
         if cls.any_type is None:
-            cls.any_type = cls(set(), True, set(), set())
+            cls.any_type = cls.intern((), True)
 
         return cls.any_type
 
     @classmethod
     def parse(cls, name: str, node) -> Type:
-        if name in cls.typenames:
-            return cls.typenames[name]
+        typenames = CompilationContext.current().typenames
+        if name in typenames:
+            return typenames[name]
 
         Error.undefined_type(node, name)
 
     def list_types(self) -> typing.Iterable[Type]:
-        for name in self.types:
-            yield Type({name}, False, set(), set())
+        if (types := Type._expanded.get(self.id)) is None:
+            types = Type._memoize(Type._expanded, self.id, tuple(Type.intern({name}) for name in self.types))
+
+        return types
 
     def __class_getitem__(cls, name: str) -> Type:
-        return cls.typenames[name]
+        return CompilationContext.current().typenames[name]
 
     def __str__(self):
         if self.any_:
@@ -103,6 +191,9 @@ class Type:
         return f"[{' | '.join(self.types)}]"
 
     def __eq__(self, other):
+        if self is other:
+            return True
+
         if isinstance(other, Type):
             if self.any_:
                 return other.any_
@@ -115,25 +206,32 @@ class Type:
         if self.any_:
             return hash("AnyType")
 
-        return hash(tuple(self.types))
+        return hash(self.types)
 
     def __contains__(self, other):
         if isinstance(other, Type):
-            if self.any_:
-                return True
-
-            if other.any_:
-                return self.any_
+            key = (self.id, other.id)
+            if (result := Type._contains.get(key)) is None:
+                result = Type._memoize(Type._contains, key, self._check_contains(other))
 
-            return other.types & self.types == other.types or other.types == {"null"} \
-                   or other.types & self.convertible_from == other.types or self.types & other.convertible_to == self.types
+            return result
 
         return False
 
+    def _check_contains(self, other: Type) -> bool:
+        if self.any_:
+            return True
+
+        if other.any_:
+            return self.any_
+
+        return other.types & self.types == other.types or other.types == {"null"} \
+            or other.types & self.convertible_from == other.types or self.types & other.convertible_to == self.types
+
     def __or__(self, other):
         if isinstance(other, Type):
-            return Type(self.types | other.types, self.any_ or other.any_,
-                        self.convertible_from & other.convertible_from, self.convertible_to & other.convertible_to)
+            return Type.intern(self.types | other.types, self.any_ or other.any_,
+                               self.convertible_from & other.convertible_from, self.convertible_to & other.convertible_to)
 
         return NotImplemented
 
@@ -157,8 +255,8 @@ Type.LIQUID_TYPE = Type.simple("LiquidType")
 
 Type.CONTROLLER = Type.simple("Controller")
 
-Type.COLOR = Type.simple("Color")
-Type.COLOR.convertible_from.add("num")
+Type.COLOR = Type.intern({"Color"}, convertible_from={"num"})
+Type.register("Color", Type.COLOR)
 
 # private types
 Type.OBJECT = Type.private("object")
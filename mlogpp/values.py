@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from .value_types import Type
 from .generator import Gen
+from .context import CompilationContext
 from .instruction import InstructionSet, InstructionRead, InstructionWrite, InstructionControl, InstructionSensor, InstructionOp
 from .abi import ABI
 from .error import Error
-from .content import Content
 
 
 class Value:
@@ -110,16 +110,15 @@ class Value:
 
 
 class TypeImpl:
-    _IMPLEMENTATIONS: dict[Type, TypeImpl] = {}
     _DEFAULT_IMPL: TypeImpl = None
 
     @classmethod
     def add_impl(cls, type_: Type, impl: TypeImpl):
-        cls._IMPLEMENTATIONS[type_] = impl
+        CompilationContext.current().implementations[type_] = impl
 
     @classmethod
     def get_impl(cls, type_: Type) -> TypeImpl:
-        return cls._IMPLEMENTATIONS.get(type_, cls._DEFAULT_IMPL)
+        return CompilationContext.current().implementations.get(type_, cls._DEFAULT_IMPL)
 
     def get(self, value: Value) -> str:
         return value.value
@@ -153,11 +152,16 @@ class TypeImpl:
         return 1
 
     def getattr(self, value: Value, name: str) -> Value | None:
-        if name in Content.CONTROLLABLE and value.type() in Type.BLOCK:
-            return Value(Content.CONTROLLABLE[name], value.get(), False, type_impl=ControlSensorTypeImpl(name))
+        # the content is loaded when first used
+        from .content import Content
 
-        elif name in Content.SENSABLE and value.type() in Type.BLOCK | Type.UNIT:
-            return Value(Content.SENSABLE[name], value.get(), True, type_impl=ControlSensorTypeImpl(name))
+        content = Content.get()
+
+        if name in content.controllable and value.type() in Type.BLOCK:
+            return Value(content.controllable[name], value.get(), False, type_impl=ControlSensorTypeImpl(name))
+
+        elif (type_ := content.sensor_type(name)) is not None and value.type() in Type.BLOCK | Type.UNIT:
+            return Value(type_, value.get(), True, type_impl=ControlSensorTypeImpl(name))
 
         return None
 
@@ -294,7 +298,7 @@ class StructTypeImpl(TypeImpl):
             assert isinstance(impl, BaseFunctionTypeImpl)
 
             if value.const() and not impl.scope["self"].const():
-                Error.custom(node_module.Node.current.get_pos(), f"Calling method with non-const [self] on const struct")
+                Error.custom(CompilationContext.current().node.get_pos(), f"Calling method with non-const [self] on const struct")
 
             return Value(method.type(), method.value, type_impl=ClosureTypeImpl(impl.scope, method, [(0, value)]))
 
@@ -370,9 +374,7 @@ class MemberFunctionTypeImpl(BaseFunctionTypeImpl):
 
             Value.variable(name, type_).set(params[i])
 
-        self.code.gen()
-
-        Value.variable(ABI.function_return(value.value), self.ret).set(Value.null())
+        self.code.gen(node, params)
 
         return Value.variable(ABI.function_return(value.value), self.ret)
 
@@ -410,9 +412,7 @@ class FunctionTypeImpl(BaseFunctionTypeImpl):
 
             Value.variable(name, type_).set(params[i])
 
-        self.code.gen()
-
-        Value.variable(ABI.function_return(value.value), self.ret).set(Value.null())
+        self.code.gen(node, params)
 
         return Value.variable(ABI.function_return(value.value), self.ret)
 
@@ -430,7 +430,9 @@ class ControlSensorTypeImpl(TypeImpl):
         self.attrib = attrib
 
     def get(self, value: Value) -> str:
-        if self.attrib in Content.SENSABLE:
+        from .content import Content
+
+        if Content.get().sensor_type(self.attrib) is not None:
             val = Gen.tmp()
             Gen.emit(
                 InstructionSensor(val, value.value, "@" + self.attrib)
@@ -443,6 +445,3 @@ class ControlSensorTypeImpl(TypeImpl):
         Gen.emit(
             InstructionControl(self.attrib, value.value, source.get(), 0, 0, 0)
         )
-
-
-from . import node as node_module
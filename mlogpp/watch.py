@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Callable
+
+from .compile import compile_file, CompileResult
+from .context import CompilationContext
+from .error import Error
+from .lexer import Lexer
+
+
+class Watcher:
+    """
+    Recompiles the entry points of a directory when they or the files they import change.
+
+    Files imported by another file in the directory are libraries, all other files are entry points.
+    Changes are found by polling modification times, without any outside services.
+    """
+
+    # seconds between checks for changes
+    POLL_INTERVAL: float = 0.25
+    # seconds without further changes before recompiling, editors often write a file in multiple steps
+    DEBOUNCE: float = 0.1
+
+    directory: str
+    output_dir: str | None
+    assembly: bool
+    callback: Callable[[CompileResult, str | None], None]
+    inline_budget: int | None
+
+    # path -> modification time
+    mtimes: dict[str, int | None]
+    # path -> files imported by it, including nested imports
+    imports: dict[str, set[str]]
+
+    def __init__(self, directory: str, output_dir: str | None = None, assembly: bool = False,
+                 callback: Callable[[CompileResult, str | None], None] = lambda result, output_file: None,
+                 inline_budget: int | None = CompilationContext.DEFAULT_INLINE_BUDGET):
+        """
+        Args:
+            directory: The watched directory.
+            output_dir: Directory for the outputs, which keep the directory structure of the inputs.
+                The outputs are written next to the inputs if None.
+            assembly: Compile mlog++ assembly files.
+            callback: Called with every result and the file it was written to.
+            inline_budget: Maximum number of instructions before calls are made to subroutines, None to always inline.
+        """
+
+        self.directory = os.path.abspath(directory)
+        self.output_dir = output_dir
+        self.assembly = assembly
+        self.callback = callback
+        self.inline_budget = inline_budget
+
+        self.mtimes = {}
+        self.imports = {}
+
+    def sources(self) -> list[str]:
+        """
+        Find the source files in the watched directory.
+
+        Returns:
+            Absolute paths of the source files.
+        """
+
+        extension = ".ma" if self.assembly else ".mpp"
+
+        sources = []
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            sources += [os.path.join(root, fn) for fn in sorted(files) if fn.endswith(extension)]
+
+        return sources
+
+    def entries(self) -> list[str]:
+        """
+        Get the entry points, all sources which aren't imported by another source.
+
+        Returns:
+            Absolute paths of the entry points.
+        """
+
+        imported = set().union(*self.imports.values())
+        return [path for path in self.imports if path not in imported]
+
+    def output_file(self, path: str) -> str:
+        """
+        Get the output file of an entry point.
+
+        Args:
+            path: Absolute path of the entry point.
+
+        Returns:
+            Path of the output file.
+        """
+
+        if self.output_dir is None:
+            return os.path.splitext(path)[0] + ".mlog"
+
+        return os.path.join(self.output_dir, os.path.splitext(os.path.relpath(path, self.directory))[0] + ".mlog")
+
+    @staticmethod
+    def _mtime(path: str) -> int | None:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self) -> dict[str, int | None]:
+        """
+        Get the modification times of the sources and all files imported by them.
+
+        Returns:
+            Path -> modification time, None if the file doesn't exist.
+        """
+
+        paths = self.sources() + [path for imports in self.imports.values() for path in imports]
+        return {path: self._mtime(path) for path in paths}
+
+    def _lex_imports(self, path: str) -> set[str]:
+        """
+        Find the files imported by a source.
+
+        Args:
+            path: Absolute path of the source.
+
+        Returns:
+            Absolute paths of the imported files, including nested imports.
+        """
+
+        lexer = Lexer.create(os.path.dirname(path))
+
+        try:
+            with open(path, "r") as f:
+                lexer.lex_table(f.read(), path)
+
+        # the error is reported when the file is compiled
+        except (Error, OSError):
+            pass
+
+        return {os.path.abspath(dependency) for dependency in lexer.dependencies}
+
+    def poll(self) -> list[CompileResult]:
+        """
+        Check for changes once and recompile the affected entry points.
+        The first call compiles all entry points.
+
+        Returns:
+            Results of the recompiled entry points.
+        """
+
+        mtimes = self._scan()
+        if mtimes == self.mtimes:
+            return []
+
+        # wait until the files stop changing
+        while True:
+            time.sleep(self.DEBOUNCE)
+            if (current := self._scan()) == mtimes:
+                break
+
+            mtimes = current
+
+        changed = {path for path in mtimes.keys() | self.mtimes.keys() if mtimes.get(path) != self.mtimes.get(path)}
+        self.mtimes = mtimes
+
+        previous = {path: self.imports[path] for path in self.entries()}
+
+        # update the dependency graph
+        sources = set(self.sources())
+        for path in changed:
+            if path in sources:
+                self.imports[path] = self._lex_imports(path)
+
+            else:
+                self.imports.pop(path, None)
+
+        # the files imported by an entry point may have changed their imports
+        for path in self.entries():
+            if path not in changed and (self.imports[path] | previous.get(path, set())) & changed:
+                self.imports[path] = self._lex_imports(path)
+
+        # start watching newly imported files
+        for path in set().union(*self.imports.values()) - self.mtimes.keys():
+            self.mtimes[path] = self._mtime(path)
+
+        results = []
+        for path in self.entries():
+            if path in changed or path not in previous or (self.imports[path] | previous[path]) & changed:
+                results.append(result := compile_file(path, self.assembly, self.inline_budget))
+
+                output_file = None
+                if result.output is not None:
+                    output_file = self.output_file(path)
+                    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                    with open(output_file, "w+") as f:
+                        f.write(result.output)
+
+                self.callback(result, output_file)
+
+        return results
+
+    def run(self):
+        """
+        Watch the directory until interrupted.
+        """
+
+        while True:
+            self.poll()
+            time.sleep(self.POLL_INTERVAL)
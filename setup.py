@@ -24,6 +24,7 @@ setuptools.setup(
     ],
     package_dir={"": "."},
     packages=setuptools.find_packages(),
+    package_data={"mlogpp": ["data/content/*.json"]},
     python_requires=">=3.10",
     entry_points={
         "console_scripts": {
@@ -0,0 +1,147 @@
+import unittest
+import unittest.mock
+
+import os
+import tempfile
+
+from mlogpp.cache import ImportCache, DiskCache
+from mlogpp.compile import parse_code, compile_code
+from mlogpp.linker import Linker
+from mlogpp.lexer import Lexer, RegexLexer
+
+
+class ImportCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+        ImportCache.clear()
+
+    def _write(self, name: str, code: str, mtime: int = 0):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w") as f:
+            f.write(code)
+
+        if mtime:
+            os.utime(path, ns=(mtime, mtime))
+
+    def _lex(self, lexer: type[Lexer]) -> list[str]:
+        return [tok.value for tok in lexer(self.dir.name).lex_table("%lib.mpp\nnum c = a\n", "main.mpp")]
+
+    def test_import_cache(self):
+        for lexer in (RegexLexer, Lexer):
+            with self.subTest(lexer.__name__):
+                ImportCache.clear()
+                self._write("lib.mpp", "%nested.mpp\nnum a = 1\n")
+                self._write("nested.mpp", "num b = 2\n")
+
+                expected = ["num", "b", "=", "2", "num", "a", "=", "1", "num", "c", "=", "a"]
+                self.assertEqual(self._lex(lexer), expected)
+                self.assertEqual(ImportCache.stats(), {"hits": 0, "misses": 2, "size": 2})
+
+                self.assertEqual(self._lex(lexer), expected)
+                self.assertEqual(ImportCache.stats(), {"hits": 1, "misses": 2, "size": 2})
+
+                # touching a file without changing it keeps the cache valid
+                self._write("nested.mpp", "num b = 2\n", 10 ** 9)
+                self.assertEqual(self._lex(lexer), expected)
+                self.assertEqual(ImportCache.hits, 2)
+
+                # changing a nested import invalidates the files importing it
+                self._write("nested.mpp", "num b = 3\n", 2 * 10 ** 9)
+                expected[3] = "3"
+                self.assertEqual(self._lex(lexer), expected)
+                self.assertEqual(ImportCache.stats(), {"hits": 2, "misses": 4, "size": 2})
+
+    def test_size_limit(self):
+        max_size = ImportCache.MAX_SIZE
+        ImportCache.MAX_SIZE = 1
+        try:
+            self._write("lib.mpp", "%nested.mpp\nnum a = 1\n")
+            self._write("nested.mpp", "num b = 2\n")
+            self._lex(RegexLexer)
+            self.assertEqual(ImportCache.stats()["size"], 1)
+
+        finally:
+            ImportCache.MAX_SIZE = max_size
+
+
+class DiskCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        DiskCache.DIRECTORY = os.path.join(self.dir.name, "cache")
+        DiskCache.reset_stats()
+        ImportCache.ENABLED = False
+
+    def tearDown(self):
+        self.dir.cleanup()
+        DiskCache.DIRECTORY = None
+        DiskCache.reset_stats()
+        ImportCache.ENABLED = True
+
+    def _write(self, name: str, code: str, mtime: int = 0):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w") as f:
+            f.write(code)
+
+        if mtime:
+            os.utime(path, ns=(mtime, mtime))
+
+    def _parse(self) -> str:
+        return str(parse_code("%lib.mpp\nprint(a + b)\n", os.path.join(self.dir.name, "main.mpp")))
+
+    def test_disk_cache(self):
+        self._write("lib.mpp", "%nested.mpp\nnum a = 1\n")
+        self._write("nested.mpp", "num b = 2\n")
+
+        tree = self._parse()
+        self.assertEqual(DiskCache.stats(), {"hits": 0, "misses": 3, "writes": 3})
+
+        self.assertEqual(self._parse(), tree)
+        self.assertEqual(DiskCache.stats(), {"hits": 1, "misses": 3, "writes": 3})
+
+        # changing a nested import invalidates the tree and the tokens of files importing it
+        self._write("nested.mpp", "num b = 3\n", 10 ** 9)
+        self.assertIn("num b = 3", self._parse())
+        self.assertEqual(DiskCache.stats(), {"hits": 1, "misses": 6, "writes": 6})
+
+        # corrupted entries are ignored
+        for name in os.listdir(DiskCache.DIRECTORY):
+            with open(os.path.join(DiskCache.DIRECTORY, name), "wb") as f:
+                f.write(b"corrupted")
+
+        self.assertIn("num b = 3", self._parse())
+        self.assertEqual(DiskCache.stats()["hits"], 1)
+
+    def test_output_cache(self):
+        self._write("lib.mpp", "%nested.mpp\nnum a = 1\n")
+        self._write("nested.mpp", "num b = 2\n")
+
+        filename = os.path.join(self.dir.name, "main.mpp")
+        code = "%lib.mpp\nprint(a + b)\n"
+
+        output = compile_code(code, filename)
+        self.assertEqual(DiskCache.stats(), {"hits": 0, "misses": 4, "writes": 4})
+
+        # nothing is lexed or parsed when the output is cached
+        with unittest.mock.patch("mlogpp.compile._parse_code") as mock:
+            self.assertEqual(compile_code(code, filename), output)
+            mock.assert_not_called()
+        self.assertEqual(DiskCache.stats(), {"hits": 1, "misses": 4, "writes": 4})
+
+        # compiler options are part of the key
+        Linker.EMIT_LABELS = True
+        try:
+            compile_code(code, filename)
+            self.assertEqual(DiskCache.stats(), {"hits": 2, "misses": 5, "writes": 5})
+
+        finally:
+            Linker.EMIT_LABELS = False
+
+        self._write("nested.mpp", "num b = 3\n", 10 ** 9)
+        self.assertNotEqual(compile_code(code, filename), output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+import json
+import os
+import tempfile
+
+from mlogpp.compile import compile_code
+from mlogpp.content import Content
+from mlogpp.error import Error
+
+
+class ContentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+        with open(os.path.join(Content.DIRECTORY, f"{Content.versions()[-1]}.json")) as f:
+            data = json.load(f)
+
+        with open(os.path.join(self.dir.name, "1000.json"), "w") as f:
+            json.dump(data, f)
+
+        # an older version without some content
+        data["version"] = "99.5"
+        data["content"]["blocks"].remove("breach")
+        data["content"]["items"].remove("carbide")
+        del data["setprop"]["health"]
+        with open(os.path.join(self.dir.name, "99.5.json"), "w") as f:
+            json.dump(data, f)
+
+        self.directory = Content.DIRECTORY
+        Content.DIRECTORY = self.dir.name
+
+    def tearDown(self):
+        Content.DIRECTORY = self.directory
+        Content.VERSION = None
+        self.dir.cleanup()
+
+    def test_database(self):
+        self.assertEqual(Content.versions(), ["99.5", "1000"])
+        self.assertEqual(Content.version(), "1000")
+        self.assertIs(Content.get(), Content.get("1000"))
+
+        content = Content.get("99.5")
+        self.assertTrue(content.contains("copper", "items"))
+        self.assertTrue(content.contains("water", "items", "liquids"))
+        self.assertFalse(content.contains("water", "items"))
+        self.assertFalse(content.contains("carbide", "items"))
+        self.assertFalse(content.contains("health", "blocks", "items"))
+
+        self.assertNotIn("carbide", content.category("items"))
+        self.assertEqual(set(content.category("items")) | {"carbide"}, set(Content.get().category("items")))
+
+        self.assertIsNotNone(content.sensor_type("health"))
+        self.assertIsNotNone(content.sensor_type("copper"))
+        self.assertIsNone(content.sensor_type("carbide"))
+
+        with self.assertRaises(ValueError):
+            Content.get("1")
+
+    def test_game_version(self):
+        code = "Block b = getlink(0)\nprint(BlockType.breach)\nprint(b.carbide)\n"
+        self.assertIn("print @breach", compile_code(code, "<test>"))
+
+        Content.VERSION = "99.5"
+        with self.assertRaises(Error):
+            compile_code(code, "<test>")
+
+        self.assertIn("print @router", compile_code("print(BlockType.router)", "<test>"))
+
+    def test_builtins(self):
+        # the properties of builtin functions depend on the targeted version
+        code = "Block b = getlink(0)\nsetprop.health(1, b)\n"
+        self.assertIn("setprop health", compile_code(code, "<test>"))
+
+        Content.VERSION = "99.5"
+        with self.assertRaises(Error):
+            compile_code(code, "<test>")
+
+        self.assertIn("setprop x", compile_code(code.replace("health", "x"), "<test>"))
+
+        Content.VERSION = "1000"
+        self.assertIn("setprop health", compile_code(code, "<test>"))
+
+
+if __name__ == '__main__':
+    unittest.main()
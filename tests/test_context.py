@@ -0,0 +1,49 @@
+import unittest
+
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from mlogpp.compile import compile_code, compile_asm
+from mlogpp.context import CompilationContext
+from mlogpp.generator import Gen
+from mlogpp.instruction import InstructionNoop
+
+
+class ContextTestCase(unittest.TestCase):
+    @staticmethod
+    def _compile(filename: str) -> str:
+        with open(filename) as f:
+            code = f.read()
+
+        return (compile_asm if filename.endswith(".ma") else compile_code)(code, filename)
+
+    def test_reentrant(self):
+        with CompilationContext() as ctx:
+            Gen.emit(InstructionNoop())
+            tmp = Gen.tmp()
+
+            compile_code("num a = 1\nprint(a)", "<test>")
+
+            self.assertIs(CompilationContext.current(), ctx)
+            self.assertEqual(Gen.get(), [InstructionNoop()])
+            self.assertEqual(Gen.tmp(), f"__tmp{int(tmp[5:]) + 1}")
+
+        self.assertIsNot(CompilationContext.current(), ctx)
+
+    def test_concurrent(self):
+        directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+        examples = sorted(glob.glob(os.path.join(directory, "**", "*.mpp"), recursive=True) +
+                          glob.glob(os.path.join(directory, "**", "*.ma"), recursive=True))
+
+        expected = {filename: self._compile(filename) for filename in examples}
+
+        with ThreadPoolExecutor(8) as executor:
+            filenames = examples * 8
+            for filename, output in zip(filenames, executor.map(self._compile, filenames)):
+                with self.subTest(filename):
+                    self.assertEqual(output, expected[filename])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,13 @@
 import unittest
+import functools
+import multiprocessing
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
 
-from mlogpp.compile import compile_code, compile_asm
+from mlogpp.compile import compile_code, compile_asm, compile_many
+from mlogpp.linker import Linker
 
 
 class ExamplesTestCase(unittest.TestCase):
@@ -25,6 +31,54 @@ class ExamplesTestCase(unittest.TestCase):
 
                 compile_asm(code, filename)
 
+    def test_compile_many(self):
+        directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), "examples")
+        examples = sorted(os.path.join(directory, fn) for fn in os.listdir(directory) if fn.endswith(".mpp"))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".mpp", delete=False) as f:
+            f.write("num a = \n")
+        try:
+            results = list(compile_many(examples + [f.name], jobs=2))
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual([result.path for result in results], examples + [f.name])
+        for result in results[:-1]:
+            with self.subTest(msg=result.path):
+                with open(result.path, "r") as f:
+                    self.assertEqual(result.output, compile_code(f.read(), result.path))
+
+        self.assertIsNone(results[-1].output)
+        self.assertIsNotNone(results[-1].error)
+
+    def test_compile_many_internal_error(self):
+        # a jump to a missing label fails in the linker, the other files are still compiled
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, fn) for fn in ("a.ma", "b.ma", "c.ma")]
+            for path, code in zip(paths, ("print(1)\n", ":missing\n", "print(2)\n")):
+                with open(path, "w") as f:
+                    f.write(code)
+
+            results = list(compile_many(paths, jobs=2, assembly=True))
+
+        self.assertEqual([result.output is not None for result in results], [True, False, True])
+        self.assertTrue(results[1].error.msg.startswith("Internal error: InternalError"))
+
+    def test_compile_many_options(self):
+        # the options of this process are used by the workers, even when they don't inherit it
+        directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), "examples")
+        examples = sorted(os.path.join(directory, fn) for fn in os.listdir(directory) if fn.endswith(".mpp"))
+
+        spawn = functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn"))
+
+        Linker.EMIT_LABELS = True
+        try:
+            with mock.patch("concurrent.futures.ProcessPoolExecutor", spawn):
+                self.assertEqual([result.output for result in compile_many(examples, jobs=2)],
+                                 [result.output for result in compile_many(examples, jobs=1)])
+        finally:
+            Linker.EMIT_LABELS = False
+
 
 if __name__ == '__main__':
     unittest.main()
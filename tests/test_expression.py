@@ -1,17 +1,130 @@
 import unittest
+import unittest.mock
 
-from mlogpp.expression import Expression
-from mlogpp.util import Position
+from mlogpp.compile import compile_code
+from mlogpp.context import CompilationContext
+from mlogpp.error import Error
+from mlogpp.expression import Expression, ExpressionCompiler
+from mlogpp.lexer import Lexer
+from mlogpp.parser import Parser
+from mlogpp.util import Position, Source
 
 
 class ExpressionTestCase(unittest.TestCase):
     def test_expression(self):
-        pos = Position(0, 0, 0, "<test>", "<test>")
+        pos = Position(0, 0, 0, Source.intern("<test>", "<test>"))
         expr = Expression()
         self.assertEqual(expr.execute(pos, 'n=3\n"a"*(10//n+2)'), [None, "aaaaa"])
         self.assertEqual(expr.execute(pos, '"a" if 2 > 3 else "b"'), ["b"])
         self.assertEqual(expr.execute(pos, "''.join(map(str, [x**2 for x in range(10) if x % 2 == 0]))"), ["04163664"])
 
+    def test_compilation(self):
+        pos = Position(0, 0, 0, Source.intern("<test>", "<test>"))
+        expr = Expression()
+
+        code = "def sq(v):\n    return v * v\n[sq(i) for i in range(5) if i != 2]"
+        self.assertEqual(expr.execute(pos, code), [None, [0, 1, 9, 16]])
+        info = ExpressionCompiler.compile.cache_info()
+        self.assertEqual(Expression().execute(pos, code), [None, [0, 1, 9, 16]])
+        self.assertEqual(ExpressionCompiler.compile.cache_info().hits, info.hits + 1)
+
+        # unsupported syntax only fails when it is evaluated
+        self.assertEqual(expr.execute(pos, '1 if 1 else {1: 2}'), [1])
+
+        for code, message in (("__import__('os')", "Variable not found"), ("''.__class__", "Invalid"),
+                              ("(1).__class__", "Invalid"), ("1 // 0", "Arithmetic error"), ("[1][2]", "Index error"),
+                              ("{1: 2}", "Invalid"), ("lambda: 1", "Invalid"), ("1 and 2", "Invalid")):
+            with self.subTest(code):
+                with self.assertRaises(Error) as ctx:
+                    expr.execute(pos, code)
+                self.assertTrue(ctx.exception.message.startswith(message))
+
+    def test_memoization(self):
+        pos = Position(0, 0, 0, Source.intern("<test>", "<test>"))
+        Expression.memo_clear()
+
+        expr = Expression()
+        expr.execute(pos, "def fib(n):\n    return n if n < 2 else fib(n - 1) + fib(n - 2)\nk = 1")
+        self.assertEqual(expr.execute(pos, "fib(60)"), [1548008755920])
+        self.assertGreater(Expression.memo_hits, 50)
+
+        # functions can read variables of the caller, which are part of the memoized result
+        expr.execute(pos, "def add(v):\n    return v + k")
+        self.assertEqual(expr.execute(pos, "add(1)"), [2])
+        self.assertEqual(expr.execute(pos, "k = 2\nadd(1)"), [None, 3])
+
+        # whole expressions are memoized across different expressions, including their assignments
+        hits = Expression.memo_hits
+        code = "def sq(v):\n    return v * v\ns = sq(k)"
+        self.assertEqual(expr.execute(pos, code), [None, None])
+        other = Expression()
+        other.execute(pos, "k = 2")
+        self.assertEqual(other.execute(pos, code), [None, None])
+        self.assertEqual(other.execute(pos, "[s, sq(3)]"), [[4, 9]])
+        self.assertEqual(Expression.memo_hits, hits + 1)
+
+        # printing is never memoized
+        with unittest.mock.patch("builtins.print") as mock:
+            expr.execute(pos, "def say(v):\n    print(v)\n    return v")
+            expr.execute(pos, "say(1)\nsay(1)")
+            self.assertEqual(mock.call_count, 2)
+
+        Expression.MEMOIZE = False
+        try:
+            Expression.memo_clear()
+            self.assertEqual(expr.execute(pos, "add(1)\nadd(1)"), [3, 3])
+            self.assertEqual((Expression.memo_hits, Expression.memo_misses), (0, 0))
+
+        finally:
+            Expression.MEMOIZE = True
+
+    def test_limits(self):
+        pos = Position(0, 0, 0, Source.intern("<test>", "<test>"))
+        expr = Expression()
+
+        limits = Expression.MAX_STEPS, Expression.MAX_SIZE
+        Expression.MAX_STEPS, Expression.MAX_SIZE = 10000, 10000
+        try:
+            self.assertEqual(expr.execute(pos, "len = 10000\n[x for x in range(len)][-1]"), [None, 9999])
+
+            for code, limit in (("[x for x in range(10 ** 8)]", "step"), ("list(range(10 ** 8))", "size"),
+                                ('"-".join(map(str, range(10 ** 8)))', "size"), ('"a" * 10 ** 9', "size"),
+                                ("2 ** 10 ** 9", "size"), ("def f(n): return f(n + 1)\nf(0)", "recursion"),
+                                ("[[0] * 100] * 200", "size"),
+                                ("def f(n): return [f(n - 1), f(n - 1)] if n else 0\nf(40)", "step")):
+                with self.subTest(code):
+                    with self.assertRaises(Error) as ctx:
+                        expr.execute(pos, code)
+                    self.assertEqual(ctx.exception.msg, f"Const expression exceeded the {limit} limit [{code}]")
+                    self.assertIs(ctx.exception.pos, pos)
+
+        finally:
+            Expression.MAX_STEPS, Expression.MAX_SIZE = limits
+
+        # const expressions expanding into themselves
+        tokens = Lexer.create("").lex_table('${ def f(): return "${ f() }"\nf() }', "<test>")
+        with self.assertRaises(Error) as ctx:
+            Parser().parse(tokens)
+        self.assertTrue(ctx.exception.msg.startswith("Const expression exceeded the recursion limit"))
+
+    def test_expansion(self):
+        code = 'num a = ${ 1 + 2 }\nprint(${ "${ 3 * 2 }" })\nprint(${ "${" } 4 })\n' * 3
+        tokens = Lexer.create("").lex_table(code, "<test>")
+        self.assertEqual(str(Parser().parse(tokens)), "{\n" + "num a = 3\nprint(6)\nprint(4)\n" * 3 + "}")
+
+    def test_timings(self):
+        # timings are recorded in the context of every compilation separately
+        ctx = CompilationContext(timings=True)
+        compile_code("print(${1 + 2})\nprint(${3 * 4})\n", "<test>", ctx)
+        self.assertEqual([expr.strip() for _, expr, _ in ctx.timings], ["1 + 2", "3 * 4"])
+
+        compile_code("print(${5})\n", "<test>", ctx)
+        self.assertEqual([expr.strip() for _, expr, _ in ctx.timings], ["5"])
+
+        ctx = CompilationContext()
+        compile_code("print(${1 + 2})\n", "<test>", ctx)
+        self.assertIsNone(ctx.timings)
+
 
 if __name__ == '__main__':
     unittest.main()
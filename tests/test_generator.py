@@ -1,12 +1,13 @@
 import unittest
 
 from mlogpp.generator import Gen
+from mlogpp.context import CompilationContext
 from mlogpp.instruction import InstructionNoop
 
 
 class GeneratorTestCase(unittest.TestCase):
     def test_variables(self):
-        Gen._tmp_index = 0
+        CompilationContext.current().tmp_index = 0
 
         self.assertEqual(Gen.tmp(), "__tmp1")
         self.assertEqual(Gen.tmp(), "__tmp2")
@@ -17,10 +18,10 @@ class GeneratorTestCase(unittest.TestCase):
 
         Gen.reset()
 
-        # should not reset to avoid name collisions
-        self.assertNotEqual(Gen._tmp_index, 0)
+        self.assertEqual(Gen.get(), [])
 
-        self.assertEqual(Gen._instructions, [])
+        # temporary names only depend on the compiled code
+        self.assertEqual(Gen.tmp(), "__tmp1")
 
     def test_emit(self):
         Gen.reset()
@@ -0,0 +1,33 @@
+import unittest
+
+import mlogpp.compile  # noqa: F401
+from mlogpp.instruction import InstructionSet, InstructionOp, InstructionControl, InstructionNoop, Label
+
+
+class InstructionTestCase(unittest.TestCase):
+    def test_operands(self):
+        a, b = InstructionOp("add", "a", "b", "1"), InstructionOp("sub", "c", "d", "2")
+        self.assertEqual((a.inputs, a.outputs), ((0, 2, 3), (1,)))
+        self.assertIs(a.inputs, b.inputs)
+
+        # subcommands have their own parameters
+        self.assertEqual(InstructionControl("enabled", "switch1", "1", 0, 0, 0).inputs, (1, 2))
+        self.assertEqual(InstructionControl("shoot", "ripple1", "x", "y", "1", 0).inputs, (1, 2, 3, 4))
+
+        self.assertEqual(InstructionSet("a", 1).params, ["a", "1"])
+        self.assertEqual(Label("x").name, "x")
+
+    def test_slots(self):
+        for ins in (InstructionSet("a", 1), InstructionNoop(), Label("x")):
+            with self.subTest(str(ins)):
+                self.assertFalse(hasattr(ins, "__dict__"))
+
+    def test_compare(self):
+        self.assertEqual(InstructionSet("a", 1), InstructionSet("a", "1"))
+        self.assertNotEqual(InstructionSet("a", 1), InstructionSet("a", 2))
+        self.assertEqual(InstructionNoop(), InstructionNoop())
+        self.assertEqual(len({InstructionNoop(), InstructionNoop(), InstructionSet("a", 1)}), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
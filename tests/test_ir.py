@@ -0,0 +1,54 @@
+import unittest
+
+import mlogpp.compile  # noqa: F401
+from mlogpp.instruction import InstructionSet, InstructionOp, InstructionJump, InstructionPrint, \
+    InstructionPrintFlush, Label
+from mlogpp.ir import *
+from mlogpp.optimizer import Optimizer
+
+
+class IRTestCase(unittest.TestCase):
+    def test_symbols(self):
+        symbols = Symbols()
+        self.assertEqual(symbols.intern("0"), ZERO)
+        self.assertEqual(symbols.intern("notEqual"), NOT_EQUAL)
+
+        x = symbols.intern("x")
+        self.assertEqual(symbols.intern("x"), x)
+        self.assertEqual(symbols.names[x], "x")
+        self.assertIsNone(symbols.numbers[x])
+
+        self.assertEqual(symbols.numbers[symbols.intern("2.0")], 2)
+        self.assertIsInstance(symbols.numbers[symbols.intern("2.0")], int)
+        self.assertEqual(symbols.numbers[symbols.intern("0.5")], 0.5)
+
+        self.assertEqual(symbols.names[symbols.version(x, 2)], "x:2")
+        self.assertEqual(symbols.version(x, 2), symbols.intern("x:2"))
+
+        # a new table doesn't contain symbols of other tables
+        self.assertNotIn("x", Symbols().ids)
+
+    def test_round_trip(self):
+        code = [Label("start"), InstructionOp("add", "x", "y", 1), InstructionJump("start", "lessThan", "x", 10),
+                InstructionPrint("x")]
+        text = list(map(str, code))
+
+        symbols = Symbols()
+        ir = to_ir(code, symbols)
+        self.assertEqual([ins.op for ins in ir], [LABEL, OP, JUMP, PRINT])
+        self.assertEqual(ir[1].args[0], ADD)
+
+        ir.append(IRInstruction.set(symbols.intern("z"), ir[1].args[1]))
+        result = from_ir(ir, symbols)
+        self.assertEqual(list(map(str, result)), text + ["set z x"])
+        self.assertIs(result[1], code[1])
+        self.assertEqual(result[-1].inputs, InstructionSet("z", "x").inputs)
+
+    def test_optimize(self):
+        code = [InstructionSet("a", 2), InstructionOp("mul", "b", "a", 3), InstructionOp("add", "c", "b", 0.5),
+                InstructionPrint("c"), InstructionPrint("\"!\""), InstructionPrintFlush("message1")]
+        self.assertEqual(list(map(str, Optimizer.optimize(code))), ["print \"6.5!\"", "printflush message1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
+import os
 
 from mlogpp.lexer import *
+from mlogpp.parser import Parser
 
 
 class LexerTestCase(unittest.TestCase):
@@ -199,6 +201,72 @@ ubind(@mega)
         token_tuples = tuple(map(lambda t: (t.type, t.value), tokens))
         self.assertEqual(token_tuples, LexerTestCase.TOKENS)
 
+    @staticmethod
+    def _token_data(tokens: list[Token]) -> list[tuple]:
+        return [(t.type, t.value, t.pos.line, t.pos.start, t.pos.end, t.pos.code, t.pos.file) for t in tokens]
+
+    def test_regex_lexer(self):
+        tokens = RegexLexer("TEST_CODE_DIR").lex(LexerTestCase.SOURCE_CODE, "TEST_CODE_FILE")
+        expected = Lexer("TEST_CODE_DIR").lex(LexerTestCase.SOURCE_CODE, "TEST_CODE_FILE")
+        self.assertEqual(self._token_data(tokens), self._token_data(expected))
+
+    def test_positions(self):
+        tokens = Lexer.create("TEST_CODE_DIR").lex("num x = 1\n\tf(a) -> b", "TEST_CODE_FILE")
+        arrow = tokens[8].pos
+        self.assertEqual((arrow.line, arrow.column, arrow.code_section()), (1, 6, "->"))
+        self.assertEqual(arrow.code, "\\tf(a) -> b")
+        self.assertIs(arrow.source, tokens[0].pos.source)
+
+        # errors show the columns of the line, not the offsets in the source
+        with self.assertRaises(Error) as cm:
+            Parser().parse(Lexer.create("TEST_CODE_DIR").lex("num a = 1\nnum b = a ) 2\n", "TEST_CODE_FILE"))
+        self.assertEqual(cm.exception.message, "Unexpected token [)]: Position(1, 10, 11, \"num b = a ) 2\", \"TEST_CODE_FILE\")")
+
+    def test_regex_lexer_examples(self):
+        directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+        for root, _, files in os.walk(directory):
+            for fn in files:
+                filename = os.path.join(root, fn)
+                with self.subTest(msg=filename):
+                    with open(filename, "r") as f:
+                        code = f.read()
+
+                    tokens = RegexLexer(root).lex(code, filename)
+                    expected = Lexer(root).lex(code, filename)
+                    self.assertEqual(self._token_data(tokens), self._token_data(expected))
+
+    def test_incremental_lexer(self):
+        directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+        filename = os.path.join(directory, "main.mpp")
+        code = "num a = 1\n%imports_library.mpp\n${\n    1 +\n    2\n}\nstr s = \"x\ny\"\nprint(a)\n"
+
+        lexer = IncrementalLexer(directory)
+        lexer.lex_table(code, filename)
+
+        for start_line, end_line, text in (
+                (0, 1, "num a = 2\n"),           # single line
+                (3, 4, "    10 *\n    3 +\n"),  # inside a multi-line const expression
+                (7, 8, "\"\n"),                 # inside a multi-line string
+                (6, 6, "str t = \"\n"),         # opening a string that swallows the following lines
+                (6, 7, ""),                      # closing it again
+                (1, 2, ""),                      # removing an import
+                (0, 0, "%imports_library.mpp\n"),
+                (100, 100, "\nprint(s)")):       # after the end of the code
+
+            with self.subTest(msg=repr(text)):
+                lines = code.splitlines(keepends=True)
+                code = "".join(lines[:start_line]) + text + "".join(lines[end_line:])
+
+                tokens = lexer.relex(start_line, end_line, text)
+                expected = RegexLexer(directory).lex_table(code, filename)
+                self.assertEqual(self._token_data(tokens), self._token_data(expected))
+
+        # an edit importing a file twice is rejected and the previous state is kept
+        with self.assertRaises(Error):
+            lexer.relex(2, 2, "%imports_library.mpp\n")
+
+        self.assertEqual(self._token_data(lexer.relex(0, 0, "")), self._token_data(expected))
+
 
 if __name__ == '__main__':
     unittest.main()
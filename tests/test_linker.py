@@ -1,6 +1,7 @@
 import unittest
 
-from mlogpp.instruction import InstructionPrint, InstructionJump, Label
+from mlogpp.instruction import InstructionPrint, InstructionJump, Label, InstructionSetAddress, InstructionCall, \
+    InstructionReturn, InstructionEnd
 from mlogpp.linker import Linker
 
 
@@ -18,6 +19,20 @@ print 1
 jump 1 always _ _
 print 2""")
 
+    def test_return_address(self):
+        self.assertEqual(Linker.link([
+            InstructionSetAddress("ret", "back"),
+            InstructionCall("entry"),
+            Label("back"),
+            InstructionEnd(),
+            Label("entry"),
+            InstructionReturn("ret")
+        ]), """\
+set ret 2
+jump 3 always 0 0
+end 
+set @counter ret""")
+
 
 if __name__ == '__main__':
     unittest.main()
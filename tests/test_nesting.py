@@ -0,0 +1,30 @@
+import unittest
+
+import sys
+
+from mlogpp.compile import compile_code
+
+
+class NestingTestCase(unittest.TestCase):
+    def test_deep_nesting(self):
+        limit = sys.getrecursionlimit()
+
+        depth = 5000
+        kinds = ("if (a < {i}) {{\n", "while (a > {i}) {{\n", "for (i{i} : 2) {{\n",
+                 "for (num j{i} = 0; j{i} < 2; j{i} += 1) {{\n")
+        code = "num a = 5\n" + "".join(kinds[i % len(kinds)].format(i=i) for i in range(depth)) + \
+               "print(a)\n" + "}\n" * depth
+        self.assertIn("print 5", compile_code(code, "<test>"))
+
+        branches = 50000
+        code = "num a = 5\nif (a == 0) { print(0) }\n" + \
+               "".join(f"elif (a == {i}) {{ print({i}) }}\n" for i in range(1, branches)) + "else { print(-1) }\n"
+        out = compile_code(code, "<test>").splitlines()
+        self.assertIn(f"print {branches - 1}", out)
+        self.assertIn("print -1", out)
+
+        self.assertEqual(sys.getrecursionlimit(), limit)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from mlogpp.error import Error
+from mlogpp.lexer import Lexer
+from mlogpp.node import BinaryOpNode, UnaryOpNode
+from mlogpp.parser import Parser
+
+
+def tree(node) -> str:
+    if isinstance(node, BinaryOpNode):
+        return f"({tree(node.left)} {node.op} {tree(node.right)})"
+    elif isinstance(node, UnaryOpNode):
+        return f"({node.op}{tree(node.value)})"
+
+    return str(node)
+
+
+class ParserTestCase(unittest.TestCase):
+    def _parse(self, code: str) -> str:
+        return tree(Parser().parse(Lexer.create("").lex_table(code, "<test>")).code[0])
+
+    def test_precedence(self):
+        for code, expected in (("a + b * c", "(a + (b * c))"),
+                               ("a - b - c", "((a - b) - c)"),
+                               ("a ** b ** c", "((a ** b) ** c)"),
+                               ("-a ** b", "(-(a ** b))"),
+                               ("--~a * b", "((-(-(~a))) * b)"),
+                               ("!a == b && c || d", "(((!(a == b)) && c) || d)"),
+                               ("a | b ^ c & d << e + f", "(a | (b ^ (c & (d << (e + f)))))"),
+                               ("a <= b + 1", "(a <= (b + 1))"),
+                               ("x = (a || b) * c", "(x = ((a || b) * c))")):
+            with self.subTest(code):
+                self.assertEqual(self._parse(code), expected)
+
+        # unary operators can't appear in the operand of tighter binding operators
+        for code in ("a == !b", "a ** -b", "-!a"):
+            with self.subTest(code):
+                with self.assertRaises(Error):
+                    self._parse(code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import unittest
 
 from mlogpp.scope import *
+from mlogpp.context import CompilationContext
+from mlogpp.node import Node
+from mlogpp.util import Position, Source
+from mlogpp.value_types import Type
 
 
 class ScopesTestCase(unittest.TestCase):
@@ -9,10 +13,56 @@ class ScopesTestCase(unittest.TestCase):
 
         Scope.push("test_scope")
 
-        self.assertEqual(Scope.scopes, [{}, {}, {}, {}, {}])
-        self.assertEqual(Scope.names, ["<enum>", "<builtins>", "<config>", "<main>", "test_scope"])
-        self.assertEqual(Scope.loops, [])
-        self.assertEqual(Scope.functions, [])
+        ctx = CompilationContext.current()
+        self.assertEqual(ctx.scopes, [{}, {}, {}, {}, {}])
+        self.assertEqual(ctx.scope_names, ["<enum>", "<builtins>", "<config>", "<main>", "test_scope"])
+        self.assertEqual(ctx.loops, [])
+        self.assertEqual(ctx.functions, [])
+
+    def test_shadowing(self):
+        Scope.reset({"print": Value.null()})
+        node = Node(Position(0, 0, 0, Source.intern("<test>", "<test>")))
+
+        a, b, c = Value.variable("a", Type.NUM), Value.variable("b", Type.NUM), Value.variable("c", Type.STR)
+        Scope.declare(node, "a", a)
+
+        Scope.push("outer")
+        Scope.declare(node, "a", b)
+        self.assertIs(Scope.get(node, "a"), b)
+
+        # a captured scope is shared, not copied or modified
+        captured = {"a": c, "p": a}
+        Scope.push("__f_func", captured)
+        self.assertIs(Scope.get(node, "a"), c)
+        self.assertIs(Scope.get(node, "print"), Scope.scopes()[1]["print"])
+        with self.assertRaises(Error):
+            Scope.declare(node, "p", b)
+
+        Scope.set(node, "p", b)
+        self.assertIs(Scope.get(node, "p"), b)
+        self.assertIs(captured["p"], a)
+
+        Scope.pop()
+        self.assertIs(Scope.get(node, "a"), b)
+        with self.assertRaises(Error):
+            Scope.get(node, "p")
+
+        Scope.pop()
+        self.assertIs(Scope.get(node, "a"), a)
+        self.assertEqual(CompilationContext.current().bindings, {"a": [3]})
+
+        Scope.delete(node, "a")
+        self.assertEqual(CompilationContext.current().bindings, {})
+
+    def test_if_else(self):
+        from mlogpp.compile import compile_code
+
+        # the branches of an if statement share a scope, which ends after the else branch
+        code = compile_code("num a = 2\nif (a > 1) {\n    num x = 5\n} else {\n    print(x)\n}\n", "<test>")
+        self.assertIn("print x@", code)
+
+        with self.assertRaises(Error):
+            compile_code("num a = 2\nif (a > 1) {\n    num x = 5\n}\nprint(x)\n", "<test>")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,99 @@
+import unittest
+
+import os
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from unittest import mock
+
+from mlogpp.client import compile_remote, request, socket_path
+from mlogpp.compile import compile_code
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not supported")
+class ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        from mlogpp.server import Server
+
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "mlogpp.sock")
+
+        self.server = Server(self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.dir.cleanup()
+
+    def test_server(self):
+        self.assertIsNotNone(request({"ping": True}, self.path))
+        self.assertIsNone(request({"ping": True}, os.path.join(self.dir.name, "missing.sock")))
+
+        # only one daemon can run on a socket
+        from mlogpp.server import Server
+        with self.assertRaises(OSError):
+            Server(self.path)
+
+        directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+        examples = sorted(os.path.join(directory, fn) for fn in os.listdir(directory) if fn.endswith(".mpp"))
+
+        def compile_(filename: str) -> tuple[dict, str]:
+            with open(filename) as f:
+                code = f.read()
+
+            return compile_remote(code, filename, path=self.path), compile_code(code, filename)
+
+        with ThreadPoolExecutor(8) as executor:
+            for filename, (response, expected) in zip(examples * 4, executor.map(compile_, examples * 4)):
+                with self.subTest(filename):
+                    self.assertEqual(response["output"], expected)
+
+        response = compile_remote("num a = \n", "main.mpp", path=self.path)
+        self.assertEqual(response["error"]["file"], os.path.abspath("main.mpp"))
+        self.assertEqual((response["error"]["line"], response["error"]["column"]), (0, 4))
+
+        response = request({"path": os.path.join(self.dir.name, "missing.mpp")}, self.path)
+        self.assertTrue(response["error"]["message"].startswith("FileNotFoundError"))
+
+        # the daemon only compiles for its game version
+        self.assertIsNone(compile_remote("print(1)", "main.mpp", game_version="1", path=self.path))
+
+    def test_internal_error(self):
+        response = compile_remote(":missing\n", "main.ma", True, path=self.path)
+        self.assertTrue(response["error"]["message"].startswith("Internal error: InternalError"))
+
+        # the daemon still responds
+        self.assertIn("output", compile_remote("print(1)", "main.mpp", path=self.path))
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "the system has no users")
+    def test_socket_path(self):
+        environ = {k: v for k, v in os.environ.items() if k not in ("MLOGPP_SOCKET", "XDG_RUNTIME_DIR")}
+        with mock.patch.dict(os.environ, environ, clear=True), mock.patch("tempfile.tempdir", self.dir.name):
+            path = socket_path(True)
+            directory = os.path.dirname(path)
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+
+            # other users could replace the socket
+            os.chmod(directory, 0o777)
+            with self.assertRaises(OSError):
+                socket_path(True)
+            self.assertIsNone(request({"ping": True}))
+
+    def test_timeout(self):
+        # nothing is accepted on the socket, the client gives up instead of waiting for a response
+        path = os.path.join(self.dir.name, "stuck.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(path)
+            sock.listen()
+
+            with mock.patch("mlogpp.client.TIMEOUT", 0.1):
+                self.assertIsNone(request({"ping": True}, path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import os
+import subprocess
+import sys
+import tempfile
+
+# cumulative time of `import mlogpp.compile` in microseconds, about 35 ms was measured with cached bytecode
+IMPORT_BUDGET = 60_000
+
+# modules which are only needed by some compilations
+LAZY_MODULES = ("mlogpp.cache", "mlogpp.content", "mlogpp.inliner", "mlogpp.template", "mlogpp.subroutine",
+                "hashlib", "json", "pickle", "tempfile")
+
+
+class StartupTestCase(unittest.TestCase):
+    @staticmethod
+    def _loaded(code: str) -> set[str]:
+        result = subprocess.run([sys.executable, "-c", code + "\nimport sys\nprint(' '.join(sys.modules))"],
+                                capture_output=True, text=True, check=True)
+        return set(result.stdout.split())
+
+    def test_lazy_imports(self):
+        loaded = self._loaded("import mlogpp.cli")
+        self.assertNotIn("mlogpp.compile", loaded)
+        self.assertNotIn("pyperclip", loaded)
+
+        loaded = self._loaded("import mlogpp.compile")
+        self.assertNotIn("concurrent.futures.process", loaded)
+        self.assertNotIn("pyperclip", loaded)
+
+    @staticmethod
+    def _import_times(env: dict[str, str]) -> dict[str, int]:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import mlogpp.compile"],
+                                capture_output=True, text=True, check=True, env=env)
+
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+
+            _, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = int(cumulative)
+
+        return times
+
+    def test_import_time(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # bytecode is written to a separate directory, the first run compiles it
+            env = os.environ.copy()
+            env.pop("PYTHONDONTWRITEBYTECODE", None)
+            env["PYTHONPYCACHEPREFIX"] = directory
+            self._import_times(env)
+
+            # the fastest run has the least noise
+            times = min((self._import_times(env) for _ in range(5)), key=lambda t: t["mlogpp.compile"])
+
+        self.assertFalse(set(LAZY_MODULES) & times.keys())
+
+        self.assertLess(times["mlogpp.compile"], IMPORT_BUDGET)
+
+    def test_lazy_enums(self):
+        from mlogpp.enums import EnumTypeImpl, EnumBlock, enum_values
+        from mlogpp.values import Type
+
+        impl = EnumTypeImpl("Test", Type.private("Test"), {"a", "b"}, True)
+        self.assertIsNone(impl._values)
+        self.assertEqual(impl.getattr(None, "a").value, "@a")
+        self.assertIsNotNone(impl._values)
+
+        self.assertIs(enum_values(Type.BLOCK_TYPE), EnumBlock.impl().values)
+        self.assertIsNone(enum_values(Type.NUM))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from mlogpp.compile import compile_code
+from mlogpp.context import CompilationContext
+
+from mlog_emulator.vm import VM
+from mlog_emulator.parser_ import Parser as VMParser
+from mlog_emulator.building import Building, BuildingType
+
+
+FUNCTION = """
+num scale = 3
+function mix(num a, num b) -> num {
+    num r = a * scale + b
+    if (r > 10) {
+        r = r - 7
+    } else {
+        r = r * 2 + 1
+    }
+    if (r > 100) {
+        return r / 2
+    }
+""" + "    r = r * 3 + a * b - scale\n    r = r % 1000\n" * 6 + """
+    return r + 1
+}
+"""
+
+CALLS = """
+Block message1
+num x = mix(1, 2)
+print(x)
+x = mix(x % 50, 3)
+scale = x % 7
+print(" ")
+print(mix(x % 50, x))
+printflush(message1)
+"""
+
+
+class SubroutineTestCase(unittest.TestCase):
+    @staticmethod
+    def run_code(code: str) -> str:
+        vm = VM(*VMParser.parse(code))
+        vm.env["variables"]["message1"] = Building(BuildingType.MESSAGE, "message1", {})
+        vm.cycle()
+
+        return vm["message1"].state["text"]
+
+    def test_subroutine(self):
+        inlined = compile_code(FUNCTION + CALLS, "<test>", CompilationContext(None))
+        called = compile_code(FUNCTION + CALLS, "<test>", CompilationContext(60))
+
+        self.assertEqual(called.count("set __ret_pos@mix()"), 3)
+        self.assertEqual(called.count("set @counter __ret_pos@mix()"), 1)
+        self.assertLess(len(called.splitlines()), len(inlined.splitlines()))
+        self.assertEqual(self.run_code(called), self.run_code(inlined))
+
+    def test_budget(self):
+        code = compile_code(FUNCTION + CALLS, "<test>")
+        self.assertNotIn("@counter", code)
+
+    def test_loop(self):
+        # the call in the loop is executed the most, it stays inlined
+        ctx = CompilationContext(120)
+        code = compile_code(FUNCTION + CALLS.replace("print(mix(x % 50, x))", "for (num i = 0; i < 5; i += 1) {\n"
+                                                                              "    print(mix(x % 50, i))\n}"),
+                            "<test>", ctx)
+
+        self.assertEqual(code.count("set __ret_pos@mix()"), 2)
+        self.assertLessEqual(len(code.splitlines()), 120)
+        self.assertEqual([(site.depth, site.inline) for site in ctx.call_sites.values()],
+                         [(0, False), (0, False), (1, True)])
+        self.assertTrue(all(site.saved() > 0 for site in ctx.call_sites.values()))
+
+        # the call sites are kept for every compilation separately
+        ctx = CompilationContext(120)
+        compile_code(FUNCTION + "print(mix(1, 2))\n", "<test>", ctx)
+        self.assertEqual(len(ctx.call_sites), 1)
+
+    def test_small(self):
+        code = compile_code("function f(num a) -> num { return a * 2 }\nprint(f(1))\nprint(f(2))\n", "<test>")
+        self.assertNotIn("@counter", code)
+
+    def test_different_reads(self):
+        # `scale` of the last call is a different variable, the body is inlined there
+        code = compile_code(FUNCTION + CALLS.replace("print(\" \")", "print(\" \")\nif (1) {\n    num scale = 2")
+                            .replace("printflush", "}\nprintflush"), "<test>", CompilationContext(60))
+        self.assertEqual(code.count("set __ret_pos@mix()"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
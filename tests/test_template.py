@@ -0,0 +1,79 @@
+import unittest
+
+from mlogpp.builtins import BUILTINS
+from mlogpp.compile import parse_code
+from mlogpp.context import CompilationContext
+from mlogpp.error import Error
+from mlogpp.generator import Gen
+from mlogpp.scope import Scope
+from mlogpp.template import Template
+from mlogpp.value_types import Type
+
+
+CODE = """
+num k = 1
+struct Vec {
+    num x, y
+}
+function add(Vec a, Vec b) -> Vec { return Vec(a.x + b.x, a.y + b.y) }
+function offset(num v) -> num {
+    num r = v + k
+    if (r > 3) {
+        return r
+    }
+    return 0
+}
+function stop() {
+    break
+}
+Vec v = add(Vec(1, 2), Vec(3, 4))
+v = add(v, v)
+print(offset(v.x))
+if (k > 0) {
+    num k = 5
+    print(offset(2))
+}
+while (k < 10) {
+    k = offset(k)
+    stop()
+}
+while (k < 20) {
+    stop()
+}
+"""
+
+
+class TemplateTestCase(unittest.TestCase):
+    @staticmethod
+    def gen(code: str) -> list[str]:
+        with CompilationContext():
+            Gen.reset()
+            Scope.reset(BUILTINS.copy())
+            Type.reset()
+
+            parse_code(code, "<test>").gen()
+            return list(map(str, Gen.get()))
+
+    def tearDown(self):
+        Template.ENABLED = True
+
+    def test_same_code(self):
+        Template.ENABLED = False
+        expected = self.gen(CODE)
+
+        Template.ENABLED = True
+        self.assertEqual(self.gen(CODE), expected)
+
+    def test_recursion(self):
+        # `g` is copied from its first call, but `cb` calls it recursively when `cb` is shadowed
+        code = "function cb() {\n    print(1)\n}\nfunction f() {\n    cb()\n}\nfunction g() {\n    f()\n}\ng()\n" \
+               "if (1) {\n    function cb() {\n        g()\n    }\n    cb()\n}\n"
+
+        for enabled in (False, True):
+            Template.ENABLED = enabled
+            with self.subTest(enabled=enabled), self.assertRaises(Error):
+                self.gen(code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+from mlogpp.value_types import Type
+
+
+class TypesTestCase(unittest.TestCase):
+    def test_interning(self):
+        self.assertIs(Type.intern({"num"}), Type.NUM)
+        self.assertIs(Type.BLOCK | Type.UNIT, Type.UNIT | Type.BLOCK)
+        self.assertIs(Type.function([Type.NUM], Type.STR), Type.function([Type.NUM], Type.STR))
+        self.assertEqual(len({t.id for t in (Type.NUM, Type.STR, Type.CONTENT, Type.ANY)}), 4)
+
+        self.assertEqual(set(Type.CONTENT.list_types()),
+                         {Type.UNIT_TYPE, Type.ITEM_TYPE, Type.BLOCK_TYPE, Type.LIQUID_TYPE})
+        self.assertIs(Type.CONTENT.list_types(), Type.CONTENT.list_types())
+
+    def test_compatibility(self):
+        self.assertIn(Type.NUM, Type.ANY)
+        self.assertIn(Type.ITEM_TYPE, Type.CONTENT)
+        self.assertNotIn(Type.CONTENT, Type.ITEM_TYPE)
+        self.assertIn(Type.NULL, Type.BLOCK)
+        self.assertIn(Type.NUM, Type.COLOR)
+        self.assertNotIn(Type.COLOR, Type.NUM)
+
+        child = Type.intern({"Child"}).with_parents({"Parent"})
+        self.assertIn(child, Type.intern({"Parent"}))
+        self.assertNotIn(Type.intern({"Child"}), Type.intern({"Parent"}))
+
+    def test_memo_size(self):
+        # the memos don't grow with every type compiled by a long-running process
+        with mock.patch.object(Type, "MEMO_SIZE", 8):
+            types = [Type.intern({f"Memo{i}"}) for i in range(20)]
+            for type_ in types:
+                self.assertIn(type_, type_)
+                self.assertIs(Type.function([type_], Type.NUM), Type.function([type_], Type.NUM))
+
+            self.assertLessEqual(len(Type._contains), 8)
+            self.assertLessEqual(len(Type._function_names), 8)
+            self.assertIn((types[-1].id, types[-1].id), Type._contains)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import os
+import tempfile
+
+from mlogpp.cache import ImportCache
+from mlogpp.watch import Watcher
+
+
+class WatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.mtime = 10 ** 9
+
+    def tearDown(self):
+        self.dir.cleanup()
+        ImportCache.clear()
+
+    def _write(self, name: str, code: str):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w") as f:
+            f.write(code)
+
+        # distinct modification times, even on file systems with a coarse resolution
+        self.mtime += 10 ** 9
+        os.utime(path, ns=(self.mtime, self.mtime))
+
+    @staticmethod
+    def _poll(watcher: Watcher) -> list[str]:
+        return sorted(os.path.basename(result.path) for result in watcher.poll())
+
+    def test_watch(self):
+        self._write("lib.mpp", "%nested.mpp\nnum a = 1\n")
+        self._write("nested.mpp", "num b = 2\n")
+        self._write("main.mpp", "%lib.mpp\nprint(a + b)\n")
+        self._write("other.mpp", "print(4)\n")
+
+        watcher = Watcher(self.dir.name)
+        watcher.DEBOUNCE = 0
+
+        # libraries are not compiled on their own
+        self.assertEqual(self._poll(watcher), ["main.mpp", "other.mpp"])
+        with open(os.path.join(self.dir.name, "main.mlog")) as f:
+            self.assertIn("print 3", f.read())
+        self.assertEqual(self._poll(watcher), [])
+
+        # only the entry points importing a changed file are recompiled
+        self._write("nested.mpp", "num b = 3\n")
+        self.assertEqual(self._poll(watcher), ["main.mpp"])
+        with open(os.path.join(self.dir.name, "main.mlog")) as f:
+            self.assertIn("print 4", f.read())
+
+        # new imports are added to the dependency graph
+        self._write("other.mpp", "%nested.mpp\nprint(b)\n")
+        self.assertEqual(self._poll(watcher), ["other.mpp"])
+        self._write("nested.mpp", "num b = 5\n")
+        self.assertEqual(self._poll(watcher), ["main.mpp", "other.mpp"])
+
+        # a file which stops being imported becomes an entry point
+        self._write("main.mpp", "print(1)\n")
+        self.assertEqual(self._poll(watcher), ["lib.mpp", "main.mpp"])
+
+
+if __name__ == '__main__':
+    unittest.main()